@@ -0,0 +1,77 @@
+"""Clan table sorting and loading, formatting every row vs the paginated model.
+
+Usage:
+    python benchmarks/bench_clan_table.py [n_rows] [rounds]
+
+Sorting formats the table values of every row and sorts the rows with
+sort_rows, or sorts the precomputed keys of ClanTable and formats a page.
+Loading redraws the table after each row, sorting and formatting every row,
+or sets the row in ClanTable and gets a page only when it changed.
+"""
+
+import random
+import sys
+import time
+
+from royale_tools.clan import COLUMNS, ClanTable, format_row, sort_rows
+
+
+def make_rows(n_rows: int):
+    """Random member rows."""
+    rng = random.Random(0)
+    rows = []
+    for i in range(n_rows):
+        row = {key: rng.randint(0, 10000) for key, _ in COLUMNS}
+        row.update(tag=f"#P{i:05d}", name=f"Player {rng.randint(0, 10000)}")
+        rows.append(row)
+    return rows
+
+
+def timed(name: str, function, rounds: int):
+    """Print the median milliseconds of a function."""
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    print(f"{name:<30}{1000 * sorted(times)[len(times) // 2]:>10.3f} ms")
+
+
+def main(n_rows: int = 1000, rounds: int = 5):
+    """Run the benchmark."""
+    rows = make_rows(n_rows)
+    keys = [key for key, _ in COLUMNS]
+    table = ClanTable()
+    for row in rows:
+        table.set_row(row)
+    print(f"{n_rows} rows, {len(keys)} columns, {table.page_size} rows per page")
+
+    def sort_all():
+        for key in keys:
+            [format_row(row) for row in sort_rows(rows, key)]
+
+    def sort_model():
+        for key in keys:
+            table.sort(key)
+            table.page_values()
+
+    def load_all():
+        loaded = []
+        for row in rows:
+            loaded.append(row)
+            [format_row(row) for row in sort_rows(loaded, "trophies")]
+
+    def load_model():
+        loading = ClanTable()
+        for row in rows:
+            if loading.set_row(row):
+                loading.page_values()
+
+    timed("sort every column, all rows", sort_all, rounds)
+    timed("sort every column, model", sort_model, rounds)
+    timed("load, all rows", load_all, max(1, rounds // 5))
+    timed("load, model", load_model, rounds)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,52 @@
+"""Clan scan with and without coalescing of duplicate in-flight requests.
+
+Usage:
+    python benchmarks/bench_coalescing.py [n_members] [workers] [latency]
+
+Every member row requests the player, then the river race log and current race
+of the same clan, so concurrent rows ask for the same clan data. The response
+cache is disabled to only measure the coalescing.
+"""
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from royale_tools.api import RoyaleApi
+from royale_tools.clan import get_player_row
+from royale_tools.mock_api import MockApi, SyntheticData
+
+
+def scan(api: MockApi, tags, workers: int, all_cards, coalesce: bool):
+    """Print the requests sent and avoided by a concurrent scan."""
+    RoyaleApi.coalesce = coalesce
+    n_requests, n_coalesced = api.n_requests, RoyaleApi.n_coalesced
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as executor:
+        rows = list(executor.map(lambda tag: get_player_row(tag, all_cards), tags))
+    elapsed = time.perf_counter() - start
+    n_requests = api.n_requests - n_requests
+    n_coalesced = RoyaleApi.n_coalesced - n_coalesced
+    name = "coalesced" if coalesce else "not coalesced"
+    print(
+        f"{name:<16}{len(rows):>5} rows{n_requests:>6} requests"
+        f"{n_coalesced:>6} avoided{1000 * elapsed:>10.1f} ms"
+    )
+
+
+def main(n_members: int = 50, workers: int = 8, latency: float = 0.05):
+    """Run the benchmark."""
+    data = SyntheticData(n_members=n_members, n_races=10)
+    with MockApi(data, latency=latency) as api:
+        RoyaleApi.configure(base_url=api.base_url)
+        all_cards = RoyaleApi.get_cards()
+        tags = data.member_tags("#ABC")
+        print(f"{n_members} members, {workers} workers, {latency * 1000:g} ms latency")
+        scan(api, tags, workers, all_cards, coalesce=False)
+        scan(api, tags, workers, all_cards, coalesce=True)
+    RoyaleApi.coalesce = True
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(*(int(a) for a in args[:2]), *(float(a) for a in args[2:3]))
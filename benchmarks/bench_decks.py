@@ -0,0 +1,50 @@
+"""War decks of a whole clan with the deck optimizer, with and without constraints.
+
+Usage:
+    python benchmarks/bench_decks.py [n_members]
+"""
+
+import sys
+import time
+
+from royale_tools.decks import best_war_decks
+from royale_tools.mock_api import SyntheticData
+
+CONSTRAINTS = {
+    "No constraints": {},
+    "2 required cards": {"required": 2},
+    "Elixir 3.0-3.5": {"min_elixir": 3.0, "max_elixir": 3.5},
+    "Elixir <= 2.5": {"max_elixir": 2.5},
+    "Elixir >= 5.0": {"min_elixir": 5.0},
+    "Required, elixir <= 3.5": {"required": 2, "max_elixir": 3.5},
+}
+
+
+def main(n_members: int = 50):
+    """Run the benchmark."""
+    data = SyntheticData(n_members=n_members)
+    players = [data.player(tag)["cards"] for tag in data.member_tags("#ABC")]
+    best_war_decks(players[0], max_elixir=4.0)  # Import NumPy
+    print(f"{n_members} players")
+    for name, constraints in CONSTRAINTS.items():
+        timings, n_optimal = [], 0
+        for cards in players:
+            settings = dict(constraints)
+            if "required" in settings:
+                # The worst cards, so that they change the decks
+                worst = sorted(cards, key=lambda c: c["level"] - c["maxLevel"])
+                settings["required"] = [
+                    c["name"] for c in worst[: settings["required"]]
+                ]
+            start = time.perf_counter()
+            result = best_war_decks(cards, **settings)
+            timings.append(time.perf_counter() - start)
+            n_optimal += bool(result and result["optimal"])
+        print(
+            f"{name:<26}{1000 * sum(timings) / len(timings):8.2f} ms/player"
+            f"{1000 * max(timings):8.2f} ms max{n_optimal:>5}/{len(players)} optimal"
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,90 @@
+"""Cards stats of many players: previous implementation, tables and NumPy batch.
+
+Usage:
+    python benchmarks/bench_economy.py [n_players]
+"""
+
+import statistics as st
+import sys
+import time
+from copy import deepcopy as dc
+from typing import Dict
+
+from royale_tools.economy import batch_cards_stats, cards_stats
+from royale_tools.mock_api import SyntheticData
+
+
+def previous_cards_stats(player_cards: Dict, all_cards: Dict) -> Dict:
+    """Previous RoyaleApi.get_cards_stats implementation."""
+
+    def get_remaining_cards(level: int, max_level: int, count: int):
+        if level == max_level:
+            return 0
+        n_cards = [1, 2, 4, 10, 20, 50, 100, 200, 400, 800, 1000, 2000, 5000]
+        return sum(n_cards[level:max_level]) - count
+
+    def get_remaining_gold(level: int, max_level: int):
+        if level == max_level:
+            return 0
+        n_gold = [100000, 50000, 20000, 8000, 4000, 2000, 1000, 400, 150, 50, 20, 5]
+        if max_level == 5:
+            n_gold.append(0)
+            n_gold[3] = 5000
+        if max_level == 8:
+            n_gold[6] = 400
+        return sum(n_gold[: max_level - level])
+
+    empty: Dict = {"rem_cards": 0, "rem_gold": 0, "levels": []}
+    stats: Dict = {13: dc(empty), 11: dc(empty), 8: dc(empty), 5: dc(empty)}
+    collected = set()
+    levels = []
+    for card in player_cards:
+        collected.add(card["name"])
+        lvl, max_lvl, cnt = card["level"], card["maxLevel"], card["count"]
+        stats[max_lvl]["rem_cards"] += get_remaining_cards(lvl, max_lvl, cnt)
+        stats[max_lvl]["rem_gold"] += get_remaining_gold(lvl, max_lvl)
+        stats[max_lvl]["levels"].append(lvl)
+        levels.append(lvl + (13 - max_lvl))
+    stats["best_32"] = sorted(levels, reverse=True)[:32]
+    for card in all_cards["items"]:
+        if card["name"] not in collected:
+            lvl, max_lvl, cnt = 0, card["maxLevel"], 0
+            stats[max_lvl]["rem_cards"] += get_remaining_cards(lvl, max_lvl, cnt)
+            stats[max_lvl]["rem_gold"] += get_remaining_gold(lvl, max_lvl)
+            stats[max_lvl]["levels"].append(lvl)
+    stats["collected"] = (len(collected), len(all_cards["items"]))
+    for max_lvl in (13, 11, 8, 5):
+        mean = st.mean(stats[max_lvl]["levels"])
+        stats[max_lvl]["progress"] = mean * (100.0 / max_lvl)
+        stats[max_lvl]["avg_level"] = mean + (13 - max_lvl)
+    return stats
+
+
+def main(n_players: int = 2000):
+    """Run the benchmark."""
+    data = SyntheticData()
+    all_cards = data.cards()
+    players_cards = [data.player(f"#ABCP{i:04d}")["cards"] for i in range(n_players)]
+    print(f"{n_players} players, {len(all_cards['items'])} cards")
+
+    batch_cards_stats(players_cards[:1], all_cards)  # Import NumPy
+    timings = {}
+    for name, function in (
+        (
+            "Previous implementation",
+            lambda: [previous_cards_stats(c, all_cards) for c in players_cards],
+        ),
+        (
+            "Precomputed tables",
+            lambda: [cards_stats(c, all_cards) for c in players_cards],
+        ),
+        ("NumPy batch", lambda: batch_cards_stats(players_cards, all_cards)),
+    ):
+        start = time.perf_counter()
+        function()
+        timings[name] = time.perf_counter() - start
+        print(f"{name:<24}{1000 * timings[name]:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,68 @@
+"""Stats of unchanged payloads: recomputed vs memoized.
+
+Usage:
+    python benchmarks/bench_memo.py [n_members] [rounds]
+
+Every member of a clan gets their cards and war stats, like a refresh of the clan
+or reopening their player windows, with the memo disabled and then warm, without
+and with the history store. The fingerprints only read the fields the stats
+depend on, hashing the whole JSON payloads is shown for comparison.
+"""
+
+import hashlib
+import json
+import sys
+import time
+
+from royale_tools.api import RoyaleApi
+from royale_tools.history import HistoryStore
+from royale_tools.memo import StatsMemo
+from royale_tools.mock_api import SyntheticData
+
+
+def timed(name: str, function, rounds: int):
+    """Print the median milliseconds of a function."""
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    print(f"{name:<30}{1000 * sorted(times)[len(times) // 2]:>10.3f} ms")
+
+
+def main(n_members: int = 50, rounds: int = 5):
+    """Run the benchmark."""
+    data = SyntheticData(n_members=n_members)
+    all_cards = data.cards()
+    log, current = data.river_race_log("#ABC"), data.current_river_race("#ABC")
+    players = [data.player(tag) for tag in data.member_tags("#ABC")]
+    print(f"{len(players)} members, {len(log['items'])} races")
+
+    def all_stats():
+        for player in players:
+            RoyaleApi.get_cards_stats(player["cards"], all_cards)
+            RoyaleApi.get_war_stats(player["tag"], log, current)
+
+    def json_fingerprints():
+        for player in players:
+            for payload in ([player["cards"], all_cards], [log, current]):
+                hashlib.blake2b(json.dumps(payload).encode()).digest()
+
+    for history in (None, HistoryStore()):
+        RoyaleApi.history = history
+        label = ", history" if history is not None else ""
+        RoyaleApi.memo = None
+        timed(f"recomputed{label}", all_stats, rounds)
+        RoyaleApi.memo = StatsMemo()
+        all_stats()
+        timed(f"memoized, warm{label}", all_stats, rounds)
+    timed("JSON hash fingerprints only", json_fingerprints, rounds)
+    stats = RoyaleApi.memo.stats()
+    for name in ("cards_stats", "war_index", "war_history"):
+        if name not in stats:
+            continue
+        print(f"{name} hit rate: {stats[name]['hit_rate']:.1%}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,81 @@
+"""Memory of a 50-member clan scan: raw JSON dicts vs slotted column models.
+
+The peak memory of scan_clan, which keeps the members as models until the scan
+ends, is measured with the responses served from the synthetic data, without the
+response cache and the stats memo.
+
+Usage:
+    python benchmarks/bench_models.py [n_members] [n_races]
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, List
+
+from royale_tools.api import RoyaleApi
+from royale_tools.clan import scan_clan
+from royale_tools.mock_api import SyntheticData
+from royale_tools.models import Player, RiverRace, loads
+
+
+def measure(build: Callable[[], Any]) -> List[float]:
+    """Memory kept by the objects built by a function and the time to build them.
+
+    Returns:
+        List[float]: Kept memory in KiB and elapsed time in milliseconds.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return [size / 1024, 1000 * elapsed]
+
+
+def main(n_members: int = 50, n_races: int = 10):
+    """Run the benchmark."""
+    data = SyntheticData(n_members, n_races)
+    tags = data.member_tags("#ABC")
+    players = [json.dumps(data.player(tag)).encode() for tag in tags]
+    log = json.dumps(data.river_race_log("#ABC")).encode()
+    current = json.dumps(data.current_river_race("#ABC")).encode()
+    print(f"{n_members} members, {n_races} races")
+
+    def raw():
+        return (
+            [json.loads(player) for player in players],
+            json.loads(log),
+            json.loads(current),
+        )
+
+    def models():
+        return (
+            [Player.from_bytes(player) for player in players],
+            RiverRace.from_log(loads(log), "#ABC"),
+            RiverRace.from_current(loads(current)),
+        )
+
+    raw_size, raw_time = measure(raw)
+    print(f"Raw dicts (before):     {raw_size:9.1f} KiB {raw_time:8.2f} ms")
+    models_size, models_time = measure(models)
+    print(f"Slotted models (after): {models_size:9.1f} KiB {models_time:8.2f} ms")
+    print(f"Memory saved: {100 * (1 - models_size / raw_size):.1f}%")
+
+    RoyaleApi.source, RoyaleApi.cache, RoyaleApi.memo = data, None, None
+    all_cards = data.cards()
+    scan_clan("#ABC", all_cards)
+    tracemalloc.start()
+    start = time.perf_counter()
+    scan_clan("#ABC", all_cards)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"scan_clan peak:         {peak / 1024:9.1f} KiB {1000 * elapsed:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,66 @@
+"""War points projection of whole clans: per player window formula vs batch.
+
+Usage:
+    python benchmarks/bench_projection.py [n_members] [n_races] [n_polls]
+
+Each poll recomputes the projection of every member of a clan, as a background
+poll would, from precomputed best 32 levels, winrates and war history.
+"""
+
+import sys
+import time
+from typing import Dict, List
+
+from royale_tools.mock_api import SyntheticData
+from royale_tools.projection import WarProjection
+from royale_tools.war import WarIndex
+
+
+def previous_projection(best_32: List[int], winrate: float) -> Dict:
+    """Previous inline estimate of CustomWindows.player_war_window."""
+    base_fp = sum(best_32)
+    est_fp = int(winrate * (2 * base_fp) + (1 - winrate) * base_fp)
+    return {
+        "min_daily": base_fp,
+        "max_daily": 2 * base_fp,
+        "expected_daily": est_fp,
+        "min_weekly": 7 * base_fp,
+        "max_weekly": 14 * base_fp,
+        "expected_weekly": 7 * est_fp,
+    }
+
+
+def main(n_members: int = 50, n_races: int = 10, n_polls: int = 200):
+    """Run the benchmark."""
+    data = SyntheticData(n_members=n_members, n_races=n_races)
+    tags = data.member_tags("#ABC")
+    war_index = WarIndex(data.river_race_log("#ABC"), data.current_river_race("#ABC"))
+    best_32 = [[13 - i % 4] * 32 for i in range(n_members)]
+    winrates = [i / n_members for i in range(n_members)]
+    war_points = [war_index.get(tag)["war_points"] for tag in tags]
+    print(f"{n_members} members, {n_races} races, {n_polls} polls")
+
+    WarProjection(tags, best_32, winrates, war_points)  # Import NumPy
+    for name, function in (
+        (
+            "Per player formula",
+            lambda: [previous_projection(b, w) for b, w in zip(best_32, winrates)],
+        ),
+        (
+            "Pure Python columns",
+            lambda: WarProjection.compute_python(best_32, winrates, war_points),
+        ),
+        (
+            "NumPy batch",
+            lambda: WarProjection(tags, best_32, winrates, war_points),
+        ),
+    ):
+        start = time.perf_counter()
+        for _ in range(n_polls):
+            function()
+        elapsed = (time.perf_counter() - start) / n_polls
+        print(f"{name:<24}{1e6 * elapsed:10.1f} us/poll")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,55 @@
+"""Leaderboard scan throughput with 1, 2 and 4 worker processes.
+
+Usage:
+    python benchmarks/bench_scanner.py [n_clans] [n_members] [max_processes]
+
+The mock API runs in its own process with a small latency, so the workers wait
+on the network like with the real API and the server doesn't share their CPU.
+The throughput should grow close to linearly with the processes, up to the
+number of CPUs.
+"""
+
+import multiprocessing
+import os
+import sys
+import time
+
+from royale_tools.api import RoyaleApi
+from royale_tools.mock_api import MockApi, SyntheticData
+from royale_tools.scanner import scan_leaderboard
+
+
+def serve(n_members: int, queue, stop):
+    """Run the mock API until stop is set, sending its URL to the queue."""
+    with MockApi(SyntheticData(n_members=n_members, n_races=10), latency=0.02) as api:
+        queue.put(api.base_url)
+        stop.wait()
+
+
+def main(n_clans: int = 16, n_members: int = 20, max_processes: int = 4):
+    """Run the benchmark."""
+    context = multiprocessing.get_context("spawn")
+    queue, stop = context.Queue(), context.Event()
+    server = context.Process(target=serve, args=(n_members, queue, stop))
+    server.start()
+    try:
+        RoyaleApi.configure(base_url=queue.get(timeout=30))
+        tags = [f"#C{i:03d}" for i in range(n_clans)]
+        print(f"{n_clans} clans, {n_members} members, {os.cpu_count()} CPUs")
+        processes = 1
+        while processes <= max_processes:
+            start = time.perf_counter()
+            rows, _ = scan_leaderboard(tags, ["x"], processes, threads=8)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{processes:>2} processes{len(rows):>7} rows{1000 * elapsed:>10.1f} ms"
+                f"{len(rows) / elapsed:>10.1f} rows/s"
+            )
+            processes *= 2
+    finally:
+        stop.set()
+        server.join()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
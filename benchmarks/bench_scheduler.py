@@ -0,0 +1,60 @@
+"""Opening a watched player, and the background requests of the refreshes.
+
+Usage:
+    python benchmarks/bench_scheduler.py [latency_ms] [hours]
+
+The player screens are loaded with a cold response cache, then after the
+scheduler refreshed the player. Then a simulated clock runs the scheduler for
+some hours with a watched player and clan, printing the refreshes of each
+endpoint. The mock data doesn't change, so the intervals grow to their maximum.
+"""
+
+import sys
+import time
+
+from royale_tools.api import RoyaleApi
+from royale_tools.cache import ResponseCache
+from royale_tools.mock_api import MockApi, SyntheticData
+from royale_tools.scheduler import RefreshScheduler
+
+
+def open_player(tag: str) -> float:
+    """Milliseconds to load the player screens."""
+    start = time.perf_counter()
+    RoyaleApi.load_player(tag)
+    return 1000 * (time.perf_counter() - start)
+
+
+def main(latency_ms: int = 50, hours: int = 6):
+    """Run the benchmark."""
+    with MockApi(SyntheticData(n_members=50), latency=latency_ms / 1000) as api:
+        RoyaleApi.configure(base_url=api.base_url)
+        RoyaleApi.cache = ResponseCache()
+        print(f"{latency_ms} ms latency")
+        print(f"open player, cold cache{open_player('#ABCP01'):>10.1f} ms")
+        RoyaleApi.cache.clear()
+        scheduler = RefreshScheduler(max_rate=100)
+        scheduler.watch_player("#ABCP01")
+        while scheduler.get("currentriverrace", "#ABC") is None:
+            scheduler.run_pending()
+        print(f"open player, watched   {open_player('#ABCP01'):>10.1f} ms")
+
+        now = [0.0]
+        scheduler = RefreshScheduler(clock=lambda: now[0])
+        scheduler.watch_player("#ABCP01")
+        scheduler.watch_clan("#DEF")
+        n_requests = api.n_requests
+        while now[0] < hours * 3600:
+            now[0] += scheduler.run_pending()
+        n_requests = api.n_requests - n_requests
+        print(f"{hours} h of refreshes: {n_requests} requests")
+        for name, stats in sorted(scheduler.stats().items()):
+            print(
+                f"  {name:<26}{stats['refreshes']:>6} refreshes"
+                f"{stats['interval']:>10.0f} s interval"
+            )
+    RoyaleApi.cache = None
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,62 @@
+"""Requests/sec against a local mock API, with and without the pooled session.
+
+Usage:
+    python benchmarks/bench_session.py [n_requests]
+
+The mock API is served over HTTPS with a throwaway self-signed certificate when
+the openssl command is available, so that handshakes are part of the cost.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Optional
+
+import requests
+
+from royale_tools.api import RoyaleApi
+from royale_tools.mock_api import MockApi
+
+
+def make_certificate(folder: str) -> Optional[str]:
+    """Create a self-signed certificate for 127.0.0.1, None without openssl."""
+    if not shutil.which("openssl"):
+        return None
+    path = os.path.join(folder, "mock-api.pem")
+    command = "openssl req -x509 -newkey rsa:2048 -nodes -days 1 -subj /CN=127.0.0.1"
+    command += f" -addext subjectAltName=IP:127.0.0.1 -keyout {path} -out {path}"
+    subprocess.run(command.split(), check=True, capture_output=True)
+    return path
+
+
+def measure(name: str, get: Callable[[str], object], url: str, n: int, api: MockApi):
+    """Print the throughput of n sequential requests."""
+    get(url)  # Warm up
+    n_connections = api.n_connections
+    start = time.perf_counter()
+    for _ in range(n):
+        get(url)
+    elapsed = time.perf_counter() - start
+    n_connections = api.n_connections - n_connections
+    print(f"{name:<24}{n / elapsed:>10.1f} req/s{n_connections:>8} connections")
+
+
+def main(n: int = 500):
+    """Run the benchmark."""
+    with tempfile.TemporaryDirectory() as folder:
+        certfile = make_certificate(folder)
+        with MockApi(certfile=certfile) as api:
+            verify = certfile or True
+            RoyaleApi.configure(base_url=api.base_url, verify=verify)
+            url = f"{api.base_url}/players/%23ABCP01/upcomingchests"
+            print(f"{n} requests to {url}")
+            before = lambda u: requests.get(u, verify=verify).json()  # noqa: E731
+            measure("requests.get (before)", before, url, n, api)
+            measure("RoyaleApi (after)", RoyaleApi.get_request, url, n, api)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,106 @@
+"""Snapshot files vs raw JSON: size and load time of a multi-clan export.
+
+Usage:
+    python benchmarks/bench_snapshot.py [n_clans] [n_members]
+
+The responses of a clan scan and of every member's player screens are exported
+for some clans to a JSON file, and to snapshots with each compression. Loading the
+JSON file parses everything, opening a snapshot only maps it and reads its
+index, then a player or all the responses are decoded.
+"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+from royale_tools.mock_api import SyntheticData
+from royale_tools.models import loads
+from royale_tools.snapshot import Snapshot, SnapshotRecorder
+from royale_tools.streaming import own_current_river_race, own_river_race_log
+
+
+def record(n_clans: int, n_members: int) -> SnapshotRecorder:
+    """Responses of the clan and player screens of some clans."""
+    data = SyntheticData(n_members=n_members)
+    recorder = SnapshotRecorder()
+    recorder.add("/cards", data.cards())
+    for i in range(n_clans):
+        tag = f"#C{i:03d}"
+        # Tags are quoted in the API paths
+        path = tag.replace("#", "%23")
+        log = json.dumps(data.river_race_log(tag)).encode()
+        current = json.dumps(data.current_river_race(tag)).encode()
+        recorder.add(f"/clans/{path}/members", data.members(tag))
+        recorder.add(
+            f"/clans/{path}/riverracelog#own", own_river_race_log(io.BytesIO(log), tag)
+        )
+        recorder.add(
+            f"/clans/{path}/currentriverrace#own",
+            own_current_river_race(io.BytesIO(current)),
+        )
+        for member in data.member_tags(tag):
+            path = member.replace("#", "%23")
+            recorder.add(f"/players/{path}", data.player(member))
+            recorder.add(
+                f"/players/{path}/upcomingchests", data.upcoming_chests(member)
+            )
+    return recorder
+
+
+def timed(function, rounds: int = 5) -> float:
+    """Median milliseconds of a function."""
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return 1000 * sorted(times)[len(times) // 2]
+
+
+def main(n_clans: int = 10, n_members: int = 50):
+    """Run the benchmark."""
+    recorder = record(n_clans, n_members)
+    player = next(key for key in recorder.responses if key.startswith("/players/"))
+    print(f"{n_clans} clans, {len(recorder)} responses")
+    print(
+        f"{'format':<16}{'size KB':>10}{'open ms':>10}{'player ms':>11}{'all ms':>10}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "snapshot.json")
+        with open(path, "w") as f:
+            json.dump(recorder.responses, f)
+
+        def load_json():
+            with open(path, "rb") as f:
+                return loads(f.read())
+
+        load_ms = timed(load_json)
+        print(
+            f"{'JSON':<16}{os.path.getsize(path) / 1024:>10.0f}{load_ms:>10.2f}"
+            f"{load_ms:>11.2f}{load_ms:>10.2f}"
+        )
+        for compression in ("zlib", "zstd"):
+            path = os.path.join(directory, f"snapshot.{compression}")
+            size = recorder.write(path, compression)
+
+            def load_player():
+                with Snapshot(path) as snapshot:
+                    snapshot.get(player)
+
+            def load_all():
+                with Snapshot(path) as snapshot:
+                    for key in snapshot.entries:
+                        snapshot.get(key)
+
+            print(
+                f"{compression:<16}{size / 1024:>10.0f}"
+                f"{timed(lambda: Snapshot(path).close()):>10.2f}"
+                f"{timed(load_player):>11.2f}{timed(load_all):>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,62 @@
+"""Import time of the headless entry points, measured with python -X importtime.
+
+The median cumulative import time of each module is compared with a threshold, so
+the script exits with an error if startup regresses, e.g. in CI.
+
+Usage:
+    python benchmarks/bench_startup.py [max_ms] [n_runs]
+"""
+
+import statistics as st
+import subprocess
+import sys
+from typing import Dict, List
+
+MODULES = ("royale_tools.cli", "royale_tools.api")
+# Modules that the headless entry points must not load
+HEAVY_MODULES = ("PySimpleGUI", "requests", "pkg_resources", "loguru")
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """Import a module in a new interpreter.
+
+    Args:
+        module (str): Module name.
+
+    Returns:
+        Dict[str, int]: Cumulative import time in microseconds of every module.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main(max_ms: float = 60.0, n_runs: int = 7):
+    """Run the benchmark."""
+    failed: List[str] = []
+    for module in MODULES:
+        runs = [import_times(module) for _ in range(n_runs)]
+        elapsed = st.median(run[module] for run in runs) / 1000
+        heavy = [name for name in HEAVY_MODULES if name in runs[0]]
+        print(f"{module:20} {elapsed:8.2f} ms (median of {n_runs})")
+        if heavy:
+            failed.append(f"{module} imports {', '.join(heavy)}")
+        if elapsed > max_ms:
+            failed.append(f"{module} takes {elapsed:.2f} ms, limit is {max_ms} ms")
+    for error in failed:
+        print(f"FAIL: {error}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main(*map(float, sys.argv[1:2]), *map(int, sys.argv[2:3]))
@@ -0,0 +1,95 @@
+"""River race parsing: full JSON tree vs streaming only the clan's standings.
+
+The response body is split in 64 KiB chunks, like a download, and both
+approaches read it from them: the full parse buffers the whole body first, as
+req.json() does. The current river race is parsed the same way, without the
+"clans" list.
+
+Usage:
+    python benchmarks/bench_streaming.py [n_members] [n_races] [n_clans]
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, List
+
+from royale_tools.mock_api import SyntheticData
+from royale_tools.models import loads
+from royale_tools.streaming import own_current_river_race, own_river_race_log
+from royale_tools.war import WarIndex
+
+
+class ChunkReader:
+    """File-like object reading from a list of chunks."""
+
+    def __init__(self, chunks: List[bytes]):
+        self.chunks = iter(chunks)
+
+    def read(self, size: int = -1) -> bytes:
+        """Read the next chunk, the size is ignored unless it is 0."""
+        return next(self.chunks, b"") if size else b""
+
+
+def measure(parse: Callable[[], Any], n_runs: int = 5) -> List[float]:
+    """Peak memory in KiB and best elapsed time in milliseconds of a parse.
+
+    The time is measured without tracemalloc, which slows allocations down.
+    """
+    tracemalloc.start()
+    parse()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    times = []
+    for _ in range(n_runs):
+        start = time.perf_counter()
+        parse()
+        times.append(time.perf_counter() - start)
+    return [peak / 1024, 1000 * min(times)]
+
+
+def split(body: bytes, size: int = 65536) -> List[bytes]:
+    """Split a response body in chunks."""
+    starts = range(0, len(body), size)
+    return [body[start : start + size] for start in starts]  # noqa: E203
+
+
+def main(n_members: int = 50, n_races: int = 40, n_clans: int = 5):
+    """Run the benchmark."""
+    data = SyntheticData(n_members, n_races, n_clans)
+    body = json.dumps(data.river_race_log("#ABC")).encode()
+    current = data.current_river_race("#ABC")
+    chunks = split(body)
+    current_chunks = split(json.dumps(current).encode())
+    size = len(body) / 1024
+    print(f"{n_members} members, {n_races} races, {n_clans} clans: {size:.0f} KiB")
+
+    def full():
+        return WarIndex(loads(b"".join(chunks)), current)
+
+    def streamed():
+        return WarIndex(own_river_race_log(ChunkReader(chunks), "#ABC"), current)
+
+    def full_current():
+        race = loads(b"".join(current_chunks))
+        race.pop("clans")
+        return race
+
+    def streamed_current():
+        return own_current_river_race(ChunkReader(current_chunks))
+
+    assert full().stats == streamed().stats
+    assert full_current() == streamed_current()
+    for name, parse in (
+        ("Full parse (before)", full),
+        ("Streaming (after)", streamed),
+        ("Current, full parse", full_current),
+        ("Current, streaming", streamed_current),
+    ):
+        peak, elapsed = measure(parse)
+        print(f"{name:20} peak {peak:9.1f} KiB {elapsed:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,61 @@
+"""War stats of a whole clan: nested scan per member vs a single WarIndex.
+
+Usage:
+    python benchmarks/bench_war_index.py [n_members] [n_races] [n_clans]
+"""
+
+import sys
+import time
+from typing import Dict
+
+from royale_tools.mock_api import SyntheticData
+from royale_tools.war import WarIndex
+
+
+def nested_war_stats(player_tag: str, river_race_log: Dict, curr_river_race) -> Dict:
+    """Previous RoyaleApi.get_war_stats implementation."""
+    clan_tag = curr_river_race["clan"]["tag"]
+    stats: Dict = {"fame_points": [], "repair_points": [], "war_points": []}
+    for race in river_race_log["items"]:
+        for clan in race["standings"]:
+            if clan["clan"]["tag"] != clan_tag:
+                continue
+            for player in clan["clan"]["participants"]:
+                if player["tag"] != player_tag:
+                    continue
+                stats["fame_points"].append(float(player["fame"]))
+                stats["repair_points"].append(float(player["repairPoints"]))
+                stats["war_points"].append(
+                    float(player["fame"]) + float(player["repairPoints"])
+                )
+    for player in curr_river_race["clan"]["participants"]:
+        if player["tag"] != player_tag:
+            continue
+        stats["current_fame_points"] = player["fame"]
+        stats["current_repair_points"] = player["repairPoints"]
+        stats["current_war_points"] = player["fame"] + player["repairPoints"]
+    return stats
+
+
+def main(n_members: int = 50, n_races: int = 200, n_clans: int = 5):
+    """Run the benchmark."""
+    data = SyntheticData(n_members, n_races, n_clans)
+    log, current = data.river_race_log("#ABC"), data.current_river_race("#ABC")
+    tags = data.member_tags("#ABC")
+    print(f"{n_members} members, {n_races} races, {n_clans} clans per race")
+
+    start = time.perf_counter()
+    before = {tag: nested_war_stats(tag, log, current) for tag in tags}
+    elapsed = time.perf_counter() - start
+    print(f"Nested scan per member (before): {1000 * elapsed:8.2f} ms")
+
+    start = time.perf_counter()
+    index = WarIndex(log, current)
+    after = {tag: index.get(tag) for tag in tags}
+    elapsed = time.perf_counter() - start
+    print(f"WarIndex for the clan (after):   {1000 * elapsed:8.2f} ms")
+    assert before == after
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
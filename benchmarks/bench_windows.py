@@ -0,0 +1,132 @@
+"""Time to render each view, rebuilding its window or updating it in place.
+
+Usage:
+    python benchmarks/bench_windows.py [n_members] [rounds]
+
+Each round shows every view with the data of another player, like navigating
+through the app, until the window is drawn. Without a display, only the
+layouts are built, and the updates go to stand-in elements: the Tk widgets,
+most of the cost of a rebuild, aren't included.
+"""
+
+import statistics
+import sys
+import time
+import tkinter
+
+import PySimpleGUI as sg
+
+from royale_tools.api import RoyaleApi
+from royale_tools.clan import ClanTable, get_member_row
+from royale_tools.mock_api import SyntheticData
+from royale_tools.utils import CustomWindows as cw
+from royale_tools.utils import WindowManager
+from royale_tools.war import WarIndex
+
+
+def views(data: SyntheticData, tag: str, all_cards, rows):
+    """Name, builder, values function and layout key of every view for a player."""
+    player = data.player(tag)
+    cards = RoyaleApi.get_cards_stats(player["cards"], all_cards)
+    chests = data.upcoming_chests(tag)
+    war = RoyaleApi.get_war_stats(
+        tag, data.river_race_log("#ABC"), data.current_river_race("#ABC")
+    )
+    table = ClanTable()
+    for row in rows:
+        table.set_row(row)
+    return [
+        ("main", cw.main_window, lambda: None, None),
+        (
+            "player",
+            lambda: cw.player_main_window(player),
+            lambda: cw.player_main_values(player),
+            None,
+        ),
+        (
+            "cards",
+            lambda: cw.player_cards_window(player, cards),
+            lambda: cw.player_cards_values(player, cards),
+            None,
+        ),
+        (
+            "chests",
+            lambda: cw.player_chests_window(chests),
+            lambda: cw.player_chests_values(chests),
+            len(chests["items"]),
+        ),
+        (
+            "war",
+            lambda: cw.player_war_window(player, cards["best_32"], war),
+            lambda: cw.player_war_values(player, cards["best_32"], war),
+            None,
+        ),
+        (
+            "clan",
+            lambda: cw.clan_window("#ABC", table),
+            lambda: cw.clan_values("#ABC", table),
+            None,
+        ),
+    ]
+
+
+class Element:
+    """Element stand-in, updated without a display."""
+
+    def update(self, value):
+        """Set the value."""
+        self.value = value
+
+
+def main(n_members: int = 50, rounds: int = 10):
+    """Run the benchmark."""
+    try:
+        tkinter.Tk().destroy()
+        display = True
+    except tkinter.TclError:
+        print("No display available, the Tk widgets aren't built")
+        display = False
+    data = SyntheticData(n_members=n_members, n_races=10)
+    all_cards = data.cards()
+    war_index = WarIndex(data.river_race_log("#ABC"), data.current_river_race("#ABC"))
+    tags = data.member_tags("#ABC")
+    rows = [get_member_row(data.player(tag), all_cards, war_index) for tag in tags]
+    rebuilt, updated = {}, {}
+    manager = WindowManager()
+    for i in range(rounds):
+        player_views = views(data, tags[i % len(tags)], all_cards, rows)
+        for name, build, values, layout in player_views:
+            if not display:
+                start = time.perf_counter()
+                build()
+                rebuilt.setdefault(name, []).append(time.perf_counter() - start)
+                elements = {key: Element() for key in values() or {}}
+                start = time.perf_counter()
+                cw.update(elements, values() or {})
+                updated.setdefault(name, []).append(time.perf_counter() - start)
+                continue
+            start = time.perf_counter()
+            window = build()
+            window.finalize()
+            window.refresh()
+            rebuilt.setdefault(name, []).append(time.perf_counter() - start)
+            window.close()
+            start = time.perf_counter()
+            window = manager.show(name, build, values(), layout)
+            window.refresh()
+            # The first show builds the window, like before
+            if i:
+                updated.setdefault(name, []).append(time.perf_counter() - start)
+            manager.hide(name)
+    manager.close()
+    print(f"{n_members} members, {rounds} rounds, median ms")
+    print(f"{'view':<10}{'rebuilt':>10}{'updated':>10}")
+    for name in rebuilt:
+        before = 1000 * statistics.median(rebuilt[name])
+        after = 1000 * statistics.median(updated.get(name, [float("nan")]))
+        print(f"{name:<10}{before:>10.3f}{after:>10.3f}")
+
+
+if __name__ == "__main__":
+    sg.theme("Reddit")
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,59 @@
+"""End-to-end performance suite against the local API stand-in.
+
+It isn't collected by the default test run, use:
+    python -m pytest benchmarks/test_benchmarks.py
+"""
+
+import pytest
+
+from royale_tools.api import RoyaleApi
+from royale_tools.clan import scan_clan
+from royale_tools.mock_api import MockApi, SyntheticData
+
+pytest.importorskip("pytest_benchmark")
+
+# Latency of each endpoint, roughly like the real API from Europe
+LATENCY = {
+    "players": 0.005,
+    "upcomingchests": 0.005,
+    "cards": 0.005,
+    "members": 0.005,
+    "riverracelog": 0.015,
+    "currentriverrace": 0.01,
+}
+
+
+@pytest.fixture(scope="module")
+def data():
+    return SyntheticData(n_members=50, n_races=10)
+
+
+@pytest.fixture(params=[0.0, LATENCY], ids=["no-latency", "latency"])
+def api(request, data):
+    with MockApi(data, latency=request.param) as api:
+        RoyaleApi.configure(base_url=api.base_url)
+        yield api
+    RoyaleApi.configure(base_url="https://api.clashroyale.com/v1")
+
+
+def test_cards_stats(benchmark, data):
+    player_cards, all_cards = data.player("#ABCP01")["cards"], data.cards()
+    stats = benchmark(RoyaleApi.get_cards_stats, player_cards, all_cards)
+    assert stats["collected"][1] == 100
+
+
+def test_war_stats(benchmark, data):
+    log, current = data.river_race_log("#ABC"), data.current_river_race("#ABC")
+    stats = benchmark(RoyaleApi.get_war_stats, "#ABCP01", log, current)
+    assert len(stats["war_points"]) == 10
+
+
+def test_load_player(benchmark, api):
+    data = benchmark(RoyaleApi.load_player, "#ABCP01")
+    assert "war_stats" in data
+
+
+def test_scan_clan(benchmark, api):
+    all_cards = RoyaleApi.get_cards()
+    rows = benchmark.pedantic(scan_clan, ("#ABC", all_cards), rounds=3)
+    assert len(rows) == 50
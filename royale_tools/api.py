@@ -0,0 +1,676 @@
+import contextlib
+import functools
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    CancelledError,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+from urllib.parse import unquote, urlparse
+
+from royale_tools.cache import ResponseCache
+from royale_tools.decks import best_war_decks
+from royale_tools.economy import cards_stats
+from royale_tools.exceptions import ApiError, status_error
+from royale_tools.memo import (
+    StatsMemo,
+    cards_fingerprint,
+    decks_fingerprint,
+    war_fingerprint,
+)
+from royale_tools.models import loads
+from royale_tools.session import API_URL, create_session
+from royale_tools.streaming import (
+    decode_errors,
+    own_current_river_race,
+    own_river_race_log,
+)
+from royale_tools.tracing import (
+    NULL_TRACE,
+    NullTrace,
+    profiled,
+    profiled_task,
+    task_profiles,
+)
+from royale_tools.war import WarIndex
+
+if TYPE_CHECKING:
+    import requests
+
+    from royale_tools.history import HistoryStore
+    from royale_tools.ratelimit import RateLimiter
+    from royale_tools.snapshot import SnapshotRecorder
+    from royale_tools.tracing import RequestTrace, Tracer
+
+HTTP_SETTINGS = (
+    "base_url",
+    "timeout",
+    "pool_size",
+    "retries",
+    "backoff_factor",
+    "verify",
+)
+
+
+class RoyaleApi:
+
+    token = None
+    # HTTP settings
+    base_url = API_URL
+    timeout = 10.0
+    pool_size = 10
+    retries = 3
+    backoff_factor = 0.5
+    verify: Union[bool, str] = True
+    session: Optional["requests.Session"] = None
+    cache: Optional[ResponseCache] = None
+    history: Optional["HistoryStore"] = None
+    tracer: Optional["Tracer"] = None
+    # Stats of unchanged payloads are reused, None to always recompute them
+    memo: Optional[StatsMemo] = StatsMemo()
+    # Offline data with a route method, e.g. a snapshot, used instead of the API
+    source: Optional[Any] = None
+    # Records every successful response, e.g. to write them to a snapshot
+    recorder: Optional["SnapshotRecorder"] = None
+    # Shared quota of one or several API tokens, used instead of token if set
+    rate_limiter: Optional["RateLimiter"] = None
+    lock = threading.Lock()
+    # Single-flight requests: concurrent calls for the same URL share one request
+    coalesce = True
+    in_flight: Dict[str, Future] = {}
+    n_coalesced = 0
+    # Per thread state, e.g. the time to live of background refreshes
+    local = threading.local()
+
+    @staticmethod
+    def configure(**settings: Any):
+        """Change HTTP settings and reset the shared session.
+
+        Args:
+            settings: Any of base_url, timeout, pool_size, retries,
+                backoff_factor and verify. Use base_url to point to a local
+                stand-in server and verify for its certificate, if any.
+        """
+        for key, value in settings.items():
+            if key not in HTTP_SETTINGS:
+                raise ValueError(f"Unknown HTTP setting: {key}")
+            setattr(RoyaleApi, key, value)
+        if RoyaleApi.session is not None:
+            RoyaleApi.session.close()
+        RoyaleApi.session = None
+
+    @staticmethod
+    def get_session() -> "requests.Session":
+        """Get the shared HTTP session, creating it if needed.
+
+        Returns:
+            requests.Session: Pooled keep-alive session.
+        """
+        with RoyaleApi.lock:
+            if RoyaleApi.session is None:
+                RoyaleApi.session = create_session(
+                    RoyaleApi.pool_size, RoyaleApi.retries, RoyaleApi.backoff_factor
+                )
+            return RoyaleApi.session
+
+    @staticmethod
+    def span(name: str) -> ContextManager:
+        """Time a block of code with the tracer, if it is enabled."""
+        if RoyaleApi.tracer is None:
+            return contextlib.nullcontext()
+        return RoyaleApi.tracer.span(name)
+
+    @staticmethod
+    def memoized(name: str, fingerprint: Callable[[], Any], compute: Callable) -> Any:
+        """Compute stats with the memo, if it is enabled, counting hits and misses.
+
+        Args:
+            name (str): Kind of stats, also the name of the span.
+            fingerprint (Callable): Function getting the key of the payloads.
+            compute (Callable): Function computing the stats.
+
+        Returns:
+            Any: Stats, shared with the memo so they must not be modified.
+        """
+        with RoyaleApi.span(name):
+            memo = RoyaleApi.memo
+            if memo is None:
+                return compute()
+            value, cached = memo.get(name, fingerprint(), compute)
+            if RoyaleApi.tracer is not None:
+                result = "hit" if cached else "miss"
+                RoyaleApi.tracer.count(
+                    "royale_tools_memo_total", stats=name, result=result
+                )
+            return value
+
+    @staticmethod
+    @contextlib.contextmanager
+    def refreshing(ttl: Optional[float] = None) -> Iterator[None]:
+        """Refresh the cached responses of the requests sent in a block.
+
+        The requests of the calling thread skip the fresh cached responses,
+        revalidating them if possible, and store the new ones with the given
+        time to live. It is used to keep the cache warm in the background.
+
+        Args:
+            ttl (float): Time to live of the refreshed responses in seconds.
+                Defaults to None (the one of each endpoint).
+        """
+        previous = getattr(RoyaleApi.local, "refresh", None)
+        RoyaleApi.local.refresh = (ttl,)
+        try:
+            yield
+        finally:
+            RoyaleApi.local.refresh = previous
+
+    @staticmethod
+    def get_request(
+        url: str,
+        params: Optional[Any] = None,
+        parse: Optional[Callable[[IO[bytes]], Dict]] = None,
+        variant: str = "",
+    ) -> Dict:
+        """Get request.
+
+        Concurrent calls for the same request are coalesced: the first one sends
+        it and the others wait for its result, or its error.
+
+        Args:
+            url: URL of the request.
+            params: Optional parameters of the request.
+            parse: Function that parses the response body while it is downloaded,
+                e.g. to keep only a part of it. Defaults to None (full JSON).
+            variant (str): Name of the part returned by parse, it identifies
+                the response in the cache. Defaults to "".
+
+        Raises:
+            ApiError: If the request fails or the response is not successful.
+
+        Returns:
+            Dict: JSON response. It may be shared with other callers if the
+                response cache is enabled or the request was coalesced, so it
+                must not be modified.
+        """
+        if not RoyaleApi.coalesce:
+            return RoyaleApi.traced_request(url, params, parse, variant)
+        key = ResponseCache.key(f"{url}#{variant}" if variant else url, params)
+        leader = False
+        with RoyaleApi.lock:
+            future = RoyaleApi.in_flight.get(key)
+            if future is not None:
+                RoyaleApi.n_coalesced += 1
+                if RoyaleApi.tracer is not None:
+                    RoyaleApi.tracer.count(
+                        "royale_tools_coalesced_total",
+                        endpoint=ResponseCache.endpoint(url),
+                    )
+            else:
+                future = RoyaleApi.in_flight[key] = Future()
+                future.set_running_or_notify_cancel()
+                leader = True
+        if not leader:
+            # Another thread is sending the same request, share its result
+            return future.result()
+        try:
+            data = RoyaleApi.traced_request(url, params, parse, variant)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(data)
+            return data
+        finally:
+            with RoyaleApi.lock:
+                del RoyaleApi.in_flight[key]
+
+    @staticmethod
+    def traced_request(
+        url: str,
+        params: Optional[Any],
+        parse: Optional[Callable[[IO[bytes]], Dict]],
+        variant: str,
+    ) -> Dict:
+        """Get request, see get_request, traced if the tracer is enabled."""
+        tracer = RoyaleApi.tracer
+        trace = tracer.request(url) if tracer is not None else NULL_TRACE
+        with trace:
+            if RoyaleApi.source is not None:
+                data = RoyaleApi.read_source(url, params, variant, trace)
+            else:
+                data = RoyaleApi.send_request(url, params, parse, variant, trace)
+        if RoyaleApi.recorder is not None:
+            RoyaleApi.recorder.add(RoyaleApi.api_path(url, params, variant), data)
+        return data
+
+    @staticmethod
+    def api_path(url: str, params: Optional[Any], variant: str) -> str:
+        """Path of a request relative to the base URL, see snapshot.snapshot_key.
+
+        Args:
+            url (str): URL of the request.
+            params: Optional parameters of the request.
+            variant (str): Name of the parsed part of the response, if any.
+
+        Returns:
+            str: Path with the query string and the variant as fragment.
+        """
+        n_base = len(RoyaleApi.base_url)
+        if url.startswith(RoyaleApi.base_url):
+            url = url[n_base:]
+        path = ResponseCache.key(url, params)
+        return f"{path}#{variant}" if variant else path
+
+    @staticmethod
+    def read_source(
+        url: str,
+        params: Optional[Any],
+        variant: str,
+        trace: Union["RequestTrace", NullTrace],
+    ) -> Dict:
+        """Get request, see get_request, answered by the offline source."""
+        with trace.phase("decode"):
+            status, data = RoyaleApi.source.route(
+                RoyaleApi.api_path(url, params, variant)
+            )
+        trace.cache = "offline"
+        trace.status = status
+        if status != 200:
+            raise status_error(f"Request to {url} failed", status)
+        return data
+
+    @staticmethod
+    def send_request(
+        url: str,
+        params: Optional[Any],
+        parse: Optional[Callable[[IO[bytes]], Dict]],
+        variant: str,
+        trace: Union["RequestTrace", NullTrace],
+    ) -> Dict:
+        """Get request, see get_request, recording its phases in a trace."""
+        cache = RoyaleApi.cache
+        cache_url = f"{url}#{variant}" if variant else url
+        validators: Dict[str, str] = {}
+        # Time to live of a background refresh, see refreshing
+        refresh = getattr(RoyaleApi.local, "refresh", None)
+        ttl = refresh[0] if refresh else None
+        if cache is not None:
+            with trace.phase("cache"):
+                data, validators = cache.get(cache_url, params, refresh is not None)
+            trace.cache = "hit" if data is not None else "miss"
+            if data is not None:
+                trace.status = 200
+                return data
+        token = RoyaleApi.token
+        if RoyaleApi.rate_limiter is not None:
+            with trace.phase("throttle"):
+                token = RoyaleApi.rate_limiter.acquire()
+        headers = {
+            "Accept": "application/json",
+            "authorization": f"Bearer {token}",
+            **validators,
+        }
+        session = RoyaleApi.get_session()
+        import requests
+        import urllib3
+
+        try:
+            with trace.phase("response"), trace.connections(session, url):
+                req = session.get(
+                    url,
+                    headers=headers,
+                    params=params,
+                    timeout=RoyaleApi.timeout,
+                    verify=RoyaleApi.verify,
+                    stream=parse is not None,
+                )
+            # Time until the response headers were parsed
+            trace.set_phase("headers", req.elapsed.total_seconds())
+            trace.status = req.status_code
+            trace.size = int(req.headers.get("Content-Length", 0))
+            with req:
+                if cache is not None and validators and req.status_code == 304:
+                    data = cache.revalidate(cache_url, params, req.headers, ttl)
+                    if data is not None:
+                        trace.cache = "revalidated"
+                        return data
+                    # Evicted since the validators were read, request it in full
+                    evicted = True
+                elif req.status_code != 200:
+                    raise status_error(f"Request to {url} failed", req.status_code)
+                else:
+                    evicted = False
+                    with trace.phase("decode"):
+                        if parse is not None:
+                            req.raw.decode_content = True
+                            data = parse(req.raw)
+                        else:
+                            data = loads(req.content)
+        except (
+            requests.RequestException,
+            urllib3.exceptions.HTTPError,
+            # Body that isn't valid JSON, e.g. a maintenance page
+            *decode_errors(),
+        ) as e:
+            raise ApiError(f"Request to {url} failed: {e}") from e
+        if evicted:
+            return RoyaleApi.send_request(url, params, parse, variant, trace)
+        if cache is not None:
+            cache.put(cache_url, params, data, req.headers, ttl)
+        if RoyaleApi.history is not None:
+            RoyaleApi.store_history(url, data)
+        return data
+
+    @staticmethod
+    def store_history(url: str, data: Dict):
+        """Store a response downloaded from the API in the history store.
+
+        Only new responses are stored, the cached and shared ones were already
+        stored when they were downloaded.
+
+        Args:
+            url (str): URL of the request.
+            data (Dict): JSON response, or the parsed part of it.
+        """
+        endpoint = ResponseCache.endpoint(url)
+        if endpoint == "players":
+            RoyaleApi.history.add_player(data)
+        elif endpoint == "riverracelog":
+            clan_tag = unquote(urlparse(url).path.rstrip("/").split("/")[-2])
+            RoyaleApi.history.add_river_race_log(clan_tag, data)
+        elif endpoint == "currentriverrace":
+            RoyaleApi.history.add_current_river_race(data)
+
+    @staticmethod
+    def get_player_data(tag: str, query: str = "") -> Dict:
+        """Get player data.
+
+        Args:
+            tag (str): Player tag.
+            query (str): Query type. Defaults to "".
+
+        Returns:
+            Dict: Player data in JSON format.
+        """
+        if not tag.startswith("#"):
+            tag = "#" + tag
+        tag = tag.replace("#", "%23")
+        url = f"{RoyaleApi.base_url}/players/{tag}/{query}"
+        return RoyaleApi.get_request(url)
+
+    @staticmethod
+    def get_clan_data(tag: str, query: str = "", own_only: bool = False) -> Dict:
+        """Get clan data.
+
+        Args:
+            tag (str): Clan tag.
+            query (str): Query type. Defaults to "".
+            own_only (bool): Whether to keep only the clan's own standings of the
+                "riverracelog" and "currentriverrace" queries. They are parsed
+                while downloaded, so the rival clans are never fully built.
+                Defaults to False.
+
+        Returns:
+            Dict: Clan data in JSON format.
+        """
+        if not tag.startswith("#"):
+            tag = "#" + tag
+        url = f"{RoyaleApi.base_url}/clans/{tag.replace('#', '%23')}/{query}"
+        if own_only and query == "riverracelog":
+            parse = functools.partial(own_river_race_log, clan_tag=tag)
+            data = RoyaleApi.get_request(url, parse=parse, variant="own")
+        elif own_only and query == "currentriverrace":
+            data = RoyaleApi.get_request(
+                url, parse=own_current_river_race, variant="own"
+            )
+        else:
+            data = RoyaleApi.get_request(url)
+        return data
+
+    @staticmethod
+    def get_cards() -> Dict:
+        """Get all the cards available in the game.
+
+        Returns:
+            Dict: Cards catalogue in JSON format.
+        """
+        return RoyaleApi.get_request(f"{RoyaleApi.base_url}/cards")
+
+    @staticmethod
+    def prefetch_player(
+        tag: str,
+        on_done: Optional[Callable[[str, float], None]] = None,
+        max_workers: int = 5,
+        cancel: Optional[threading.Event] = None,
+    ) -> Dict[str, Dict]:
+        """Get all the data shown in the player screens.
+
+        Independent requests run at the same time. The clan requests are sent as
+        soon as the player data is known, if the player is in a clan.
+
+        Args:
+            tag (str): Player tag.
+            on_done (Callable): Function called from the calling thread with the
+                name and duration in seconds of each finished request.
+                Defaults to None.
+            max_workers (int): Maximum concurrent requests. Defaults to 5.
+            cancel (threading.Event): Event to stop waiting for the requests.
+                Defaults to None.
+
+        Raises:
+            ApiError: If any of the requests fails.
+            CancelledError: If cancel is set before all the requests finish.
+
+        Returns:
+            Dict: JSON responses with the keys "player", "cards", "upcomingchests"
+                and, if the player is in a clan, "riverracelog" and
+                "currentriverrace" with the clan's own standings only.
+        """
+        # The worker threads don't see the block being profiled
+        profiles = task_profiles()
+
+        def timed(function: Callable, *args: Any) -> Tuple[Dict, float]:
+            start = time.perf_counter()
+            return profiled_task(profiles, function, *args), time.perf_counter() - start
+
+        data = {}
+        pool = ThreadPoolExecutor(max_workers)
+        pending = {
+            pool.submit(timed, RoyaleApi.get_player_data, tag): "player",
+            pool.submit(timed, RoyaleApi.get_cards): "cards",
+            pool.submit(timed, RoyaleApi.get_player_data, tag, "upcomingchests"): (
+                "upcomingchests"
+            ),
+        }
+        try:
+            while pending:
+                done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                if cancel is not None and cancel.is_set():
+                    raise CancelledError
+                for future in done:
+                    name = pending.pop(future)
+                    data[name], seconds = future.result()
+                    if name == "player" and "clan" in data[name]:
+                        clan_tag = data[name]["clan"]["tag"]
+                        for query in ("riverracelog", "currentriverrace"):
+                            future = pool.submit(
+                                timed, RoyaleApi.get_clan_data, clan_tag, query, True
+                            )
+                            pending[future] = query
+                    if on_done:
+                        on_done(name, seconds)
+        finally:
+            # If it was cancelled or a request failed, the queued requests are
+            # cancelled and the running ones aren't waited for
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=not pending)
+        return data
+
+    @staticmethod
+    def get_winrate(n_losses: int, n_wins: int) -> float:
+        """Compute winrate.
+
+        Args:
+            n_losses (int): Number of losses.
+            n_wins (int): Number of wins.
+
+        Returns:
+            float: Winrate.
+        """
+        try:
+            return 100.0 * n_wins / (n_wins + n_losses)
+        except Exception:
+            return -1.0
+
+    @staticmethod
+    def get_cards_stats(player_cards: Dict, all_cards: Optional[Dict] = None) -> Dict:
+        """Get cards stats.
+
+        Args:
+            player_cards (Dict): Player cards in JSON format.
+            all_cards (Dict): Cards catalogue in JSON format. It is requested if
+                not given. Defaults to None.
+
+        Returns:
+            Dict: Cards stats.
+        """
+        if all_cards is None:
+            all_cards = RoyaleApi.get_cards()
+        return RoyaleApi.memoized(
+            "cards_stats",
+            lambda: cards_fingerprint(player_cards, all_cards),
+            lambda: cards_stats(player_cards, all_cards),
+        )
+
+    @staticmethod
+    def get_war_decks(player_cards: List[Dict]) -> Optional[Dict]:
+        """Get the best disjoint war decks of a player.
+
+        Args:
+            player_cards (List[Dict]): Player cards in JSON format.
+
+        Returns:
+            Optional[Dict]: Best decks, see decks.best_war_decks, shared with the
+                memo so they must not be modified.
+        """
+        return RoyaleApi.memoized(
+            "war_decks",
+            lambda: decks_fingerprint(player_cards),
+            lambda: best_war_decks(player_cards),
+        )
+
+    @staticmethod
+    def get_war_index(river_race_log: Dict, curr_river_race: Dict) -> WarIndex:
+        """Get the war stats of every member of a clan.
+
+        Args:
+            river_race_log (Dict): Clan river race log data in JSON format.
+            curr_river_race (Dict): Clan current river race data in JSON format.
+
+        Returns:
+            WarIndex: War stats, shared with the memo so it must not be modified.
+        """
+        return RoyaleApi.memoized(
+            "war_index",
+            lambda: war_fingerprint(river_race_log, curr_river_race),
+            lambda: WarIndex(river_race_log, curr_river_race),
+        )
+
+    @staticmethod
+    def get_war_stats(player_tag: str, river_race_log: Dict, curr_river_race) -> Dict:
+        """Get war stats.
+
+        Use get_war_index instead to get the stats of many players of the same
+        clan. If the history store is enabled, the stats include every race of
+        the clan stored since it was enabled, not only the ones of the given
+        river race log, so they may have more races than the clan table.
+
+        Args:
+            player_tag (str): Player tag.
+            river_race_log (Dict): Clan river race log data in JSON format.
+            curr_river_race (Dict): Clan current river race data in JSON format.
+
+        Returns:
+            Dict: War stats.
+        """
+        with RoyaleApi.span("war_stats"):
+            if RoyaleApi.history is None:
+                war_index = RoyaleApi.get_war_index(river_race_log, curr_river_race)
+                return dict(war_index.get(player_tag))
+            # The stored races of the clan only change with its river race data
+            stats = RoyaleApi.memoized(
+                "war_history",
+                lambda: (
+                    id(RoyaleApi.history),
+                    player_tag,
+                    war_fingerprint(river_race_log, curr_river_race),
+                ),
+                lambda: RoyaleApi.history_war_stats(
+                    player_tag, river_race_log, curr_river_race
+                ),
+            )
+            return dict(stats)
+
+    @staticmethod
+    def history_war_stats(
+        player_tag: str, river_race_log: Dict, curr_river_race: Dict
+    ) -> Dict:
+        """Get war stats from the history store, see get_war_stats.
+
+        The river race data is stored first, in case it wasn't downloaded while
+        the store was enabled.
+        """
+        clan_tag = curr_river_race["clan"]["tag"]
+        RoyaleApi.history.add_river_race_log(clan_tag, river_race_log)
+        RoyaleApi.history.add_current_river_race(curr_river_race)
+        return RoyaleApi.history.war_stats(player_tag, clan_tag=clan_tag)
+
+    @staticmethod
+    def load_player(
+        tag: str,
+        on_done: Optional[Callable[[str, float], None]] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Dict:
+        """Get everything shown in the player window.
+
+        Args:
+            tag (str): Player tag.
+            on_done (Callable): See prefetch_player. Defaults to None.
+            cancel (threading.Event): See prefetch_player. Defaults to None.
+
+        Raises:
+            ApiError: If any of the requests fails.
+            CancelledError: If cancel is set before all the requests finish.
+
+        Returns:
+            Dict: Responses of prefetch_player with the "cards_stats" and, if the
+                player is in a clan, "war_stats".
+        """
+        with profiled("load_player"):
+            data = RoyaleApi.prefetch_player(tag, on_done, cancel=cancel)
+            player_data = data["player"]
+            data["cards_stats"] = RoyaleApi.get_cards_stats(
+                player_data["cards"], data["cards"]
+            )
+            if "clan" in player_data:
+                data["war_stats"] = RoyaleApi.get_war_stats(
+                    player_data["tag"], data["riverracelog"], data["currentriverrace"]
+                )
+        return data
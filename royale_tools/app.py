@@ -1,25 +1,74 @@
+import atexit
+import itertools
 import json
+import locale
+import os
 import sys
+import threading
+from concurrent.futures import CancelledError
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
 
 import PySimpleGUI as sg
 from loguru import logger
-from utils import CustomWindows as cw
-from utils import RoyaleApi
+
+from royale_tools.api import RoyaleApi
+from royale_tools.cache import ResponseCache
+from royale_tools.clan import COLUMNS, ClanTable, project_clan, scan_clan
+from royale_tools.exceptions import ApiError
+from royale_tools.history import HistoryStore
+from royale_tools.scheduler import RefreshScheduler
+from royale_tools.snapshot import Snapshot, SnapshotRecorder
+from royale_tools.tracing import Tracer
+from royale_tools.utils import CustomWindows as cw
+from royale_tools.utils import WindowManager
+
+# Environment variable with the file to write request metrics to
+TRACE_VARIABLE = "ROYALE_TOOLS_TRACE"
+# Environment variable with the database to keep the war and player history in
+HISTORY_VARIABLE = "ROYALE_TOOLS_HISTORY"
+# Environment variables with a snapshot file to read the responses from, instead
+# of the API, or to save the responses to when the app exits
+SNAPSHOT_VARIABLE = "ROYALE_TOOLS_SNAPSHOT"
+EXPORT_VARIABLE = "ROYALE_TOOLS_EXPORT"
+# App attributes saved in the configuration file
+CONFIG_ATTRS = ("token", "player_tag", "clan_tag", "theme")
+PLAYER_STEPS = ("player", "cards", "upcomingchests", "riverracelog", "currentriverrace")
 
 
 class App:
     """Clash Royale tools application."""
 
+    # Identifiers of the tasks run in worker threads, sent with their events
+    task_ids = itertools.count(1)
+
     def __init__(self):
+        locale.setlocale(locale.LC_ALL, "")
         # General settings
         self.token = None
         self.player_tag = None
         self.clan_tag = None
         # Appeareance settings
         self.theme = "Reddit"
+        self.windows = WindowManager()
+        self.scheduler = RefreshScheduler()
+        self.watched: List[str] = []
         # Load and apply configuration
         self.load_config()
         RoyaleApi.token = self.token
+        RoyaleApi.cache = ResponseCache(path=".royale-tools-cache")
+        if os.environ.get(HISTORY_VARIABLE):
+            RoyaleApi.history = HistoryStore(os.environ[HISTORY_VARIABLE])
+        if os.environ.get(TRACE_VARIABLE):
+            RoyaleApi.tracer = Tracer()
+            atexit.register(RoyaleApi.tracer.write, os.environ[TRACE_VARIABLE])
+        if os.environ.get(SNAPSHOT_VARIABLE):
+            RoyaleApi.source = Snapshot(os.environ[SNAPSHOT_VARIABLE])
+        if os.environ.get(EXPORT_VARIABLE):
+            RoyaleApi.recorder = SnapshotRecorder()
+            atexit.register(RoyaleApi.recorder.write, os.environ[EXPORT_VARIABLE])
+        # Keep the configured player and clan warm in the background
+        self.watch()
+        self.scheduler.start()
         sg.theme(self.theme)
         sg.SetOptions(font="Any 11")
         # Start main app
@@ -27,30 +76,27 @@ class App:
 
     def main(self):
         """Main application behaviour."""
-        window = cw.main_window()
         while True:
+            window = self.windows.show("main", cw.main_window)
             event, values = window.read()
             # Exit app
             if event in (sg.WIN_CLOSED, "Exit"):
-                window.close()
+                self.windows.close()
                 sys.exit()
             # Event handler
-            if event == "Settings":
+            if event in ("Settings", "About", "Player", "Clan"):
                 window.hide()
+            if event == "Settings":
                 refresh = self.settings(mandatory=False)
                 if refresh:
-                    window.close()
-                    window = cw.main_window()
-                else:
-                    window.un_hide()
+                    # Every view is rebuilt with the new theme
+                    self.windows.close()
             if event == "About":
-                window.hide()
                 self.about()
-                window.un_hide()
             if event == "Player":
-                window.hide()
                 self.player()
-                window.un_hide()
+            if event == "Clan":
+                self.clan()
 
     def settings(self, mandatory: bool) -> bool:
         """Settings behaviour.
@@ -68,7 +114,12 @@ class App:
             theme=self.theme,
         )
         orig_theme = self.theme
-        window = cw.settings_window(mandatory, config)
+        window = self.windows.show(
+            "settings",
+            lambda: cw.settings_window(mandatory, config),
+            cw.settings_values(config),
+            layout=mandatory,
+        )
         while True:
             event, values = window.read()
             # Exit settings
@@ -87,6 +138,7 @@ class App:
                     setattr(self, key.split(".")[1], value)
                 sg.theme(self.theme)
                 RoyaleApi.token = self.token
+                self.watch()
                 self.save_config()
                 sg.popup("Settings saved succesfully!", title="Settings")
                 break
@@ -94,14 +146,24 @@ class App:
                 sg.theme(values["cmb.theme"])
                 _, _ = cw.theme_sample_window().read(close=True)
                 sg.theme(self.theme)
-        window.close()
+        window.hide()
         if orig_theme != self.theme:
             return True
         return False
 
+    def watch(self):
+        """Refresh the data of the configured player and clan in the background."""
+        for tag in self.watched:
+            self.scheduler.unwatch(tag)
+        if self.player_tag:
+            self.scheduler.watch_player(self.player_tag)
+        if self.clan_tag:
+            self.scheduler.watch_clan(self.clan_tag)
+        self.watched = [tag for tag in (self.player_tag, self.clan_tag) if tag]
+
     def about(self):
         """About behaviour."""
-        window = cw.about_window()
+        window = self.windows.show("about", cw.about_window)
         while True:
             event, values = window.read()
             if event == sg.WIN_CLOSED:
@@ -119,38 +181,31 @@ class App:
                 if item == "book":
                     price = 40
                 open_url(f"paypal.me/igonro/{price}")
-        window.close()
+        window.hide()
 
     def player(self):
         """Player behaviour."""
         # Select player tag
-        event, values = cw.player_tag_window(self.player_tag).read(close=True)
-        if event == sg.WIN_CLOSED:
+        values = self.select_tag("player_tag", cw.player_tag_window)
+        if values is None:
             return
         tag = values["in.player_tag"]
         if not tag.startswith("#"):
             tag = f"#{tag}"
         # Pre-load data
-        prog_window = cw.progress_window(5)
-        _, _ = prog_window.read(timeout=0)
-        player_data = RoyaleApi.get_player_data(tag)
-        prog_window["pbar"].update_bar(1)
-        cards_data = RoyaleApi.get_cards_stats(player_data["cards"])
-        prog_window["pbar"].update_bar(2)
-        chests_data = RoyaleApi.get_player_data(tag, "upcomingchests")
-        prog_window["pbar"].update_bar(3)
-        if "clan" in player_data:
-            clan_tag = player_data["clan"]["tag"]
-            river_race_log = RoyaleApi.get_clan_data(clan_tag, "riverracelog")
-            prog_window["pbar"].update_bar(4)
-            current_river_race = RoyaleApi.get_clan_data(clan_tag, "currentriverrace")
-            war_data = RoyaleApi.get_war_stats(tag, river_race_log, current_river_race)
-        else:
-            war_data = None
-        prog_window["pbar"].update_bar(5)
-        prog_window.close()
+        data = self.load_player(tag)
+        if data is None:
+            return
+        player_data = data["player"]
+        cards_data = data["cards_stats"]
+        chests_data = data["upcomingchests"]
+        war_data = data.get("war_stats")
         # Window
-        window = cw.player_main_window(player_data)
+        window = self.windows.show(
+            "player",
+            lambda: cw.player_main_window(player_data),
+            cw.player_main_values(player_data),
+        )
         while True:
             event, values = window.read()
             if event == sg.WIN_CLOSED:
@@ -159,30 +214,267 @@ class App:
                 break
             if event == "Chests":
                 window.hide()
-                e, _ = cw.player_chests_window(chests_data).read(close=True)
-                if e == sg.WINDOW_CLOSED:
-                    sys.exit()
+                self.show_view(
+                    "chests",
+                    lambda: cw.player_chests_window(chests_data),
+                    cw.player_chests_values(chests_data),
+                    layout=len(chests_data["items"]),
+                )
                 window.un_hide()
             if event == "Cards":
                 window.hide()
-                e, _ = cw.player_cards_window(player_data, cards_data).read(close=True)
-                if e == sg.WINDOW_CLOSED:
-                    sys.exit()
+                self.show_view(
+                    "cards",
+                    lambda: cw.player_cards_window(player_data, cards_data),
+                    cw.player_cards_values(player_data, cards_data),
+                )
                 window.un_hide()
             if event == "War":
                 if not war_data:
                     sg.popup_error("Player must be in a clan!", title="Clan required")
                     continue
                 window.hide()
-                e, _ = cw.player_war_window(
-                    player_data, cards_data["best_32"], war_data
-                ).read(close=True)
-                if e == sg.WINDOW_CLOSED:
-                    sys.exit()
+                best_32 = cards_data["best_32"]
+                self.show_view(
+                    "war",
+                    lambda: cw.player_war_window(player_data, best_32, war_data),
+                    cw.player_war_values(player_data, best_32, war_data),
+                )
                 window.un_hide()
             if event == "Royale API":
                 open_url(f"royaleapi.com/player/{tag[1:]}")
-        window.close()
+        window.hide()
+
+    def select_tag(
+        self, name: str, build: Callable[[str], sg.Window]
+    ) -> Optional[Dict]:
+        """Tag selection behaviour.
+
+        Args:
+            name (str): Tag setting, "player_tag" or "clan_tag".
+            build (Callable): Function building the window from the default tag.
+
+        Returns:
+            Optional[Dict]: Window values, None if the window was closed.
+        """
+        default_tag = getattr(self, name) or ""
+        window = self.windows.show(
+            name, lambda: build(default_tag), {f"in.{name}": default_tag}
+        )
+        event, values = window.read()
+        if event == sg.WIN_CLOSED:
+            self.windows.close(name)
+            return None
+        window.hide()
+        return values
+
+    def show_view(
+        self,
+        name: str,
+        build: Callable[[], sg.Window],
+        values: Dict[str, Any],
+        layout: Hashable = None,
+    ):
+        """Behaviour of a view with only a back button.
+
+        Args:
+            name (str): View name.
+            build (Callable): Function building the window of the view.
+            values (Dict[str, Any]): Value of each element key.
+            layout (Hashable): Layout key, see WindowManager.show. Defaults to
+                None.
+        """
+        window = self.windows.show(name, build, values, layout)
+        event, _ = window.read()
+        if event == sg.WIN_CLOSED:
+            sys.exit()
+        window.hide()
+
+    def load_player(self, tag: str) -> Optional[Dict]:
+        """Player data loading behaviour.
+
+        Args:
+            tag (str): Player tag.
+
+        Returns:
+            Optional[Dict]: Data of RoyaleApi.load_player, None if the load was
+                cancelled.
+        """
+        prog_window = cw.progress_window(len(PLAYER_STEPS), PLAYER_STEPS, cancel=True)
+        finished: List[str] = []
+
+        def load(report: Callable, cancel: threading.Event) -> Dict:
+            def on_done(name: str, seconds: float):
+                report((name, seconds))
+
+            return RoyaleApi.load_player(tag, on_done, cancel)
+
+        def on_progress(value: Tuple[str, float]):
+            name, seconds = value
+            finished.append(name)
+            prog_window["pbar"].update_bar(len(finished))
+            prog_window[f"t.{name}"].update(f"{name}: {1000 * seconds:.0f} ms")
+
+        return self.load(prog_window, load, on_progress)
+
+    def clan(self):
+        """Clan behaviour."""
+        # Select clan tag
+        values = self.select_tag("clan_tag", cw.clan_tag_window)
+        if values is None:
+            return
+        tag = values["in.clan_tag"]
+        if not tag.startswith("#"):
+            tag = f"#{tag}"
+        # The table is shown at once and filled as the members are loaded
+        table = ClanTable()
+        loading = True
+        finish: Optional[List[Dict]] = None
+        window = self.windows.show(
+            "clan",
+            lambda: cw.clan_window(tag, table, loading),
+            cw.clan_values(tag, table, loading),
+        )
+
+        def load(report: Callable, cancel: threading.Event) -> List[Dict]:
+            scan_clan(tag, cancel=cancel, on_row=report)
+            # Projected from the responses of the scan, kept in the cache
+            return project_clan(tag)[1]
+
+        def redraw(*keys: str):
+            values = cw.clan_values(tag, table, loading, finish)
+            cw.update(window, {key: values[key] for key in keys})
+
+        column_keys = {heading: key for key, heading in COLUMNS}
+        cancel = threading.Event()
+        task_id = self.run_task(window, load, cancel)
+        while True:
+            event, values = window.read()
+            if event == sg.WIN_CLOSED:
+                cancel.set()
+                sys.exit()
+            if event == "\u2190":
+                cancel.set()
+                break
+            if event in ("-PROGRESS-", "-DONE-"):
+                # Events of an earlier scan of the reused window are ignored
+                event_task_id, value = values[event]
+                if event_task_id != task_id:
+                    continue
+            if event == "-PROGRESS-":
+                if table.set_row(value):
+                    redraw("t.clan", "t.page", "tbl.members")
+                else:
+                    redraw("t.clan", "t.page")
+            if event == "-DONE-":
+                loading = False
+                finish = self.check_result(value)
+                redraw("t.clan", "t.finish")
+            if event == "Sort":
+                key = column_keys[values["cmb.sort"]]
+                table.sort(key, values["chk.descending"])
+                redraw("tbl.members", "t.page")
+            if event in ("b.prev", "b.next"):
+                table.set_page(table.page + (1 if event == "b.next" else -1))
+                redraw("tbl.members", "t.page")
+        window.hide()
+
+    def load(
+        self,
+        prog_window: sg.Window,
+        task: Callable[[Callable, threading.Event], Any],
+        on_progress: Callable[[Any], None],
+    ) -> Any:
+        """Loading behaviour.
+
+        The task runs in a worker thread, so the progress window keeps responding
+        and the load can be cancelled.
+
+        Args:
+            prog_window (sg.Window): Progress window with a Cancel button.
+            task (Callable): Function run in the worker thread. It receives a
+                function to report its progress and the cancel event.
+            on_progress (Callable): Function called in this thread with each
+                value reported by the task.
+
+        Returns:
+            Any: Result of the task, None if it was cancelled.
+        """
+        cancel = threading.Event()
+        task_id = self.run_task(prog_window, task, cancel)
+        while True:
+            event, values = prog_window.read()
+            if event in (sg.WIN_CLOSED, "Cancel"):
+                cancel.set()
+                prog_window.close()
+                return None
+            if event not in ("-PROGRESS-", "-DONE-"):
+                continue
+            event_task_id, value = values[event]
+            if event_task_id != task_id:
+                continue
+            if event == "-PROGRESS-":
+                on_progress(value)
+            else:
+                prog_window.close()
+                return self.check_result(value)
+
+    def run_task(
+        self,
+        window: sg.Window,
+        task: Callable[[Callable, threading.Event], Any],
+        cancel: threading.Event,
+    ) -> int:
+        """Run a task in a worker thread that reports to a window.
+
+        Each value reported by the task is sent as a "-PROGRESS-" event, and its
+        result or error as a "-DONE-" event, unless cancel is set. The events
+        are tuples of the task identifier and the value, as events sent before
+        cancel was set may still be queued when the window runs a new task.
+
+        Args:
+            window (sg.Window): Window receiving the events.
+            task (Callable): Function run in the worker thread. It receives a
+                function to report its progress and the cancel event.
+            cancel (threading.Event): Event to stop the task.
+
+        Returns:
+            int: Task identifier.
+        """
+        task_id = next(App.task_ids)
+
+        def report(value: Any):
+            if not cancel.is_set():
+                window.write_event_value("-PROGRESS-", (task_id, value))
+
+        def worker():
+            try:
+                result = task(report, cancel)
+            except CancelledError:
+                return
+            except Exception as e:
+                result = e
+            if not cancel.is_set():
+                window.write_event_value("-DONE-", (task_id, result))
+
+        threading.Thread(target=worker, daemon=True).start()
+        return task_id
+
+    def check_result(self, result: Any) -> Any:
+        """Task result behaviour, exit if an API request failed.
+
+        Args:
+            result (Any): Result or error of a task.
+
+        Returns:
+            Any: The result, if it isn't an error.
+        """
+        if isinstance(result, ApiError):
+            cw.api_error_popup(result)
+            sys.exit()
+        if isinstance(result, Exception):
+            raise result
+        return result
 
     def load_config(self):
         """Load the saved configuration if it exists."""
@@ -191,7 +483,7 @@ class App:
                 config = json.load(f)
             if "token" not in config:
                 raise ValueError("Token field missing in configuration")
-            for attr in self.__dict__:
+            for attr in CONFIG_ATTRS:
                 if attr in config:
                     setattr(self, attr, config[attr])
         except (FileNotFoundError, ValueError):
@@ -201,9 +493,9 @@ class App:
     def save_config(self):
         """Save the current parameters."""
         config = {}
-        for attr, val in self.__dict__.items():
-            if val is not None:
-                config[attr] = val
+        for attr in CONFIG_ATTRS:
+            if getattr(self, attr) is not None:
+                config[attr] = getattr(self, attr)
         with open(".royale-tools-config", "w") as f:
             json.dump(config, f, indent=2)
 
@@ -222,5 +514,10 @@ def open_url(url: str):
     webbrowser.open(url)
 
 
+def main():
+    """Run the application."""
+    App()
+
+
 if __name__ == "__main__":
-    app = App()
+    main()
@@ -0,0 +1,280 @@
+import asyncio
+import itertools
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+
+from royale_tools.exceptions import ApiError, RateLimitError, status_error
+from royale_tools.session import API_URL, RETRY_STATUS
+
+# Request priorities, lower values are sent first
+INTERACTIVE = 0
+BACKGROUND = 10
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header.
+
+    Args:
+        value (str): Header value, a number of seconds or an HTTP date.
+
+    Returns:
+        Optional[float]: Seconds until the date, 0 if it passed, None if the
+            header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max((date - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class TokenBucket:
+    """Asynchronous token bucket rate limiter.
+
+    Args:
+        rate (float): Tokens added per second.
+        capacity (float): Maximum number of tokens, i.e. burst size.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock: Optional[asyncio.Lock] = None
+
+    def refill(self):
+        """Add the tokens earned since the last update."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        async with self.lock:
+            self.refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self.refill()
+            self.tokens -= 1
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for some time, e.g. after a 429 response."""
+        self.refill()
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+class AsyncRoyaleApi:
+    """Asynchronous Clash Royale API client.
+
+    Requests go through a priority queue served by a fixed number of workers, so
+    interactive lookups are sent before queued background scans. Every request
+    takes a token from a rate limiter matching the API token quota. Use it as an
+    asynchronous context manager.
+
+    Args:
+        token (str): Clash Royale API token.
+        base_url (str): API URL, change it to use a local stand-in server.
+            Defaults to the official API.
+        rate (float): Requests per second allowed by the token. Defaults to 10.
+        burst (float): Requests that can be sent at once. Defaults to 10.
+        max_concurrency (int): Maximum requests in flight. Defaults to 8.
+        timeout (float): Request timeout in seconds. Defaults to 10.
+        retries (int): Retries for 429 and 5xx responses. Defaults to 3.
+        backoff_factor (float): Backoff factor between retries, in seconds.
+            Defaults to 0.5.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        base_url: str = API_URL,
+        rate: float = 10.0,
+        burst: float = 10.0,
+        max_concurrency: int = 8,
+        timeout: float = 10.0,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+    ):
+        self.token = token
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.limiter = TokenBucket(rate, burst)
+        self.queue: Optional["asyncio.PriorityQueue[Tuple]"] = None
+        self.counter = itertools.count()
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.workers: list = []
+
+    async def __aenter__(self) -> "AsyncRoyaleApi":
+        self.queue = asyncio.PriorityQueue()
+        self.session = aiohttp.ClientSession(
+            headers={
+                "Accept": "application/json",
+                "authorization": f"Bearer {self.token}",
+            },
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+        )
+        self.workers = [
+            asyncio.ensure_future(self.worker()) for _ in range(self.max_concurrency)
+        ]
+        return self
+
+    async def __aexit__(self, *args: Any):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def worker(self):
+        """Send the queued requests in priority order."""
+        assert self.queue is not None
+        while True:
+            _, _, url, params, future = await self.queue.get()
+            try:
+                if future.cancelled():
+                    continue
+                try:
+                    result = await self.fetch(url, params)
+                except Exception as e:
+                    if not future.cancelled():
+                        future.set_exception(e)
+                else:
+                    if not future.cancelled():
+                        future.set_result(result)
+            finally:
+                self.queue.task_done()
+
+    async def fetch(self, url: str, params: Optional[Dict] = None) -> Dict:
+        """Send a request now, retrying throttled and failed ones.
+
+        Args:
+            url: URL of the request.
+            params: Optional parameters of the request.
+
+        Raises:
+            ApiError: If the request fails, typed by the response status.
+
+        Returns:
+            Dict: JSON response.
+        """
+        if self.session is None:
+            raise RuntimeError("AsyncRoyaleApi must be used with 'async with'")
+        for attempt in range(self.retries + 1):
+            await self.limiter.acquire()
+            try:
+                async with self.session.get(url, params=params) as resp:
+                    if resp.status == 200:
+                        return await resp.json()
+                    error = status_error(f"Request to {url} failed", resp.status)
+                    retry_after = resp.headers.get("Retry-After")
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                # ValueError: body that isn't valid JSON
+                raise ApiError(f"Request to {url} failed: {e!r}") from e
+            if resp.status not in RETRY_STATUS or attempt == self.retries:
+                break
+            delay = self.backoff_factor * 2**attempt
+            if isinstance(error, RateLimitError):
+                retry_seconds = retry_after_seconds(retry_after)
+                if retry_seconds is not None:
+                    delay = max(delay, retry_seconds)
+                error.retry_after = delay
+                # Every request waits for it, including the retry
+                self.limiter.pause(delay)
+            else:
+                await asyncio.sleep(delay)
+        raise error
+
+    async def request(
+        self, url: str, params: Optional[Dict] = None, priority: int = BACKGROUND
+    ) -> Dict:
+        """Queue a request and wait for its response.
+
+        Args:
+            url: URL of the request.
+            params: Optional parameters of the request.
+            priority (int): Request priority, lower values are sent first.
+                Defaults to BACKGROUND.
+
+        Raises:
+            ApiError: If the request fails, typed by the response status.
+
+        Returns:
+            Dict: JSON response.
+        """
+        if self.queue is None:
+            raise RuntimeError("AsyncRoyaleApi must be used with 'async with'")
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((priority, next(self.counter), url, params, future))
+        return await future
+
+    async def get_player_data(
+        self, tag: str, query: str = "", priority: int = BACKGROUND
+    ) -> Dict:
+        """Get player data.
+
+        Args:
+            tag (str): Player tag.
+            query (str): Query type. Defaults to "".
+            priority (int): Request priority. Defaults to BACKGROUND.
+
+        Returns:
+            Dict: Player data in JSON format.
+        """
+        if not tag.startswith("#"):
+            tag = "#" + tag
+        tag = tag.replace("#", "%23")
+        return await self.request(
+            f"{self.base_url}/players/{tag}/{query}", None, priority
+        )
+
+    async def get_clan_data(
+        self, tag: str, query: str = "", priority: int = BACKGROUND
+    ) -> Dict:
+        """Get clan data.
+
+        Args:
+            tag (str): Clan tag.
+            query (str): Query type. Defaults to "".
+            priority (int): Request priority. Defaults to BACKGROUND.
+
+        Returns:
+            Dict: Clan data in JSON format.
+        """
+        if not tag.startswith("#"):
+            tag = "#" + tag
+        tag = tag.replace("#", "%23")
+        return await self.request(
+            f"{self.base_url}/clans/{tag}/{query}", None, priority
+        )
+
+    async def get_cards(self, priority: int = BACKGROUND) -> Dict:
+        """Get all the cards available in the game.
+
+        Args:
+            priority (int): Request priority. Defaults to BACKGROUND.
+
+        Returns:
+            Dict: Cards catalogue in JSON format.
+        """
+        return await self.request(f"{self.base_url}/cards", None, priority)
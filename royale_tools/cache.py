@@ -0,0 +1,215 @@
+import atexit
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlencode, urlparse
+
+# Seconds each endpoint is considered fresh
+DEFAULT_TTLS = {
+    "cards": 24 * 3600.0,
+    "players": 120.0,
+    "upcomingchests": 300.0,
+    "clans": 300.0,
+    "members": 300.0,
+    "riverracelog": 600.0,
+    "currentriverrace": 60.0,
+}
+
+
+class ResponseCache:
+    """LRU cache of API responses with a time to live for each endpoint.
+
+    Expired responses are kept to revalidate them with ETag/Last-Modified headers,
+    so an unchanged response doesn't need to be downloaded again.
+
+    Args:
+        max_entries (int): Maximum number of cached responses. Defaults to 256.
+        ttls (Dict[str, float]): Time to live in seconds for each endpoint, it
+            updates DEFAULT_TTLS. Defaults to None.
+        path (str): File used to keep the cache between runs. Defaults to None
+            (memory only).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttls: Optional[Dict[str, float]] = None,
+        path: Optional[str] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.path = path
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self.refreshes = 0
+        if path:
+            self.load()
+            atexit.register(self.save)
+
+    @staticmethod
+    def key(url: str, params: Optional[Dict] = None) -> str:
+        """Cache key of a request."""
+        return f"{url}?{urlencode(sorted(params.items()))}" if params else url
+
+    @staticmethod
+    def endpoint(url: str) -> str:
+        """Endpoint name of an API URL, e.g. "riverracelog" or "players"."""
+        parts = [p for p in urlparse(url).path.split("/") if p]
+        if len(parts) >= 3 and parts[-3] in ("players", "clans"):
+            return parts[-1]
+        if len(parts) >= 2 and parts[-2] in ("players", "clans"):
+            return parts[-2]
+        return parts[-1] if parts else ""
+
+    def get(
+        self, url: str, params: Optional[Dict] = None, refresh: bool = False
+    ) -> Tuple[Optional[Dict], Dict]:
+        """Get a cached response.
+
+        Args:
+            url (str): URL of the request.
+            params (Dict): Optional parameters of the request.
+            refresh (bool): Whether to treat a fresh response as expired, to
+                revalidate it before its time to live ends. Defaults to False.
+
+        Returns:
+            Tuple[Optional[Dict], Dict]: Response if it is fresh, None otherwise,
+                and the conditional headers to revalidate an expired response.
+        """
+        key = self.key(url, params)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, {}
+            self.entries.move_to_end(key)
+            if refresh:
+                self.refreshes += 1
+            elif entry["expires"] > time.time():
+                self.hits += 1
+                return entry["data"], {}
+            else:
+                self.misses += 1
+            headers = {}
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+            return None, headers
+
+    def ttl(self, url: str, ttl: Optional[float] = None) -> float:
+        """Time to live of a response, the one of its endpoint if not given."""
+        return ttl if ttl is not None else self.ttls.get(self.endpoint(url), 0.0)
+
+    def put(
+        self,
+        url: str,
+        params: Optional[Dict],
+        data: Dict,
+        headers: Any,
+        ttl: Optional[float] = None,
+    ):
+        """Store a response.
+
+        Args:
+            url (str): URL of the request.
+            params (Dict): Optional parameters of the request.
+            data (Dict): JSON response.
+            headers (Mapping): Response headers.
+            ttl (float): Time to live in seconds. Defaults to None (the one of
+                the endpoint).
+        """
+        key = self.key(url, params)
+        entry = {
+            "data": data,
+            "expires": time.time() + self.ttl(url, ttl),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+        }
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def revalidate(
+        self,
+        url: str,
+        params: Optional[Dict],
+        headers: Any,
+        ttl: Optional[float] = None,
+    ) -> Optional[Dict]:
+        """Renew an expired response after a "304 Not Modified" answer.
+
+        Args:
+            url (str): URL of the request.
+            params (Dict): Optional parameters of the request.
+            headers (Mapping): Response headers.
+            ttl (float): Time to live in seconds. Defaults to None (the one of
+                the endpoint).
+
+        Returns:
+            Optional[Dict]: Cached JSON response, None if it was evicted or
+                cleared since its conditional headers were read.
+        """
+        with self.lock:
+            entry = self.entries.get(self.key(url, params))
+            if entry is None:
+                return None
+            entry["expires"] = time.time() + self.ttl(url, ttl)
+            entry["etag"] = headers.get("ETag", entry["etag"])
+            entry["last_modified"] = headers.get(
+                "Last-Modified", entry["last_modified"]
+            )
+            self.revalidations += 1
+            return entry["data"]
+
+    def stats(self) -> Dict[str, int]:
+        """Hit and miss counters."""
+        with self.lock:
+            return dict(
+                entries=len(self.entries),
+                hits=self.hits,
+                misses=self.misses,
+                revalidations=self.revalidations,
+                evictions=self.evictions,
+                refreshes=self.refreshes,
+            )
+
+    def clear(self):
+        """Remove all the cached responses."""
+        with self.lock:
+            self.entries.clear()
+
+    def load(self):
+        """Load the cached responses saved in path, if any."""
+        try:
+            with open(self.path, "r") as f:  # type: ignore
+                entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        with self.lock:
+            self.entries.update(entries)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def save(self):
+        """Save the cached responses in path."""
+        if not self.path:
+            return
+        with self.lock:
+            entries = list(self.entries.items())
+        try:
+            with open(self.path, "w") as f:
+                json.dump(OrderedDict(entries), f)
+        except OSError as e:
+            from loguru import logger
+
+            logger.warning(f"Couldn't save the response cache: {e}")
@@ -0,0 +1,383 @@
+import bisect
+import threading
+from concurrent.futures import FIRST_COMPLETED, CancelledError, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from royale_tools.api import RoyaleApi
+from royale_tools.exceptions import ApiError
+from royale_tools.models import Player
+from royale_tools.projection import WarProjection
+from royale_tools.war import WarIndex
+
+# Clan table columns: (key, header)
+COLUMNS = (
+    ("name", "Name"),
+    ("tag", "Tag"),
+    ("role", "Role"),
+    ("trophies", "Trophies"),
+    ("winrate", "Winrate"),
+    ("collected", "Cards"),
+    ("best_32", "Best 32 level"),
+    ("rem_gold", "Remaining gold"),
+    ("war_points", "Total WP"),
+    ("avg_war_points", "Average WP"),
+    ("current_war_points", "Current WP"),
+)
+# Table value formats, "{}" if not given
+FORMATS = {"winrate": "{:.2f}%", "best_32": "{:.2f}", "avg_war_points": "{:.0f}"}
+
+
+def get_member(tag: str) -> Player:
+    """Get a player as a compact model, keeping only what the clan table needs.
+
+    Args:
+        tag (str): Player tag.
+
+    Raises:
+        ApiError: If the request fails.
+
+    Returns:
+        Player: Player profile.
+    """
+    return Player.from_json(RoyaleApi.get_player_data(tag))
+
+
+def get_member_row(
+    player: Union[Player, Dict], all_cards: Dict, war_index: Optional[WarIndex]
+) -> Dict:
+    """Get the clan table row of a member.
+
+    Args:
+        player (Union[Player, Dict]): Player profile, or its data in JSON format.
+        all_cards (Dict): Cards catalogue in JSON format.
+        war_index (WarIndex): War stats of the clan, None if the player has no
+            clan.
+
+    Returns:
+        Dict: Member stats with the keys of COLUMNS.
+    """
+    if isinstance(player, dict):
+        player = Player.from_json(player)
+    cards = RoyaleApi.get_cards_stats(player.card_dicts(), all_cards)
+    war = war_index.get(player.tag) if war_index else WarIndex.empty()
+    war_points = war["war_points"]
+    return {
+        "name": player.name,
+        "tag": player.tag,
+        "role": player.role,
+        "trophies": player.trophies,
+        "winrate": RoyaleApi.get_winrate(player.losses, player.wins),
+        "collected": cards["collected"][0],
+        "best_32": sum(cards["best_32"]) / max(len(cards["best_32"]), 1),
+        "rem_gold": sum(cards[max_lvl]["rem_gold"] for max_lvl in (13, 11, 8, 5)),
+        "war_points": sum(war_points),
+        "avg_war_points": sum(war_points) / len(war_points) if war_points else 0.0,
+        "current_war_points": war.get("current_war_points", 0),
+    }
+
+
+def get_error_row(member: Dict, error: ApiError) -> Dict:
+    """Get the clan table row of a member whose stats couldn't be requested.
+
+    Args:
+        member (Dict): Member in the clan member list, in JSON format.
+        error (ApiError): Error raised by the failed request.
+
+    Returns:
+        Dict: Member row, see get_member_row, with zero stats and the error
+            message in "error".
+    """
+    row = {key: 0 for key, _ in COLUMNS}
+    row.update(name=member["name"], tag=member["tag"], role=member["role"])
+    row["error"] = str(error)
+    return row
+
+
+def get_player_row(tag: str, all_cards: Dict) -> Dict:
+    """Get the clan table row of any player.
+
+    Args:
+        tag (str): Player tag.
+        all_cards (Dict): Cards catalogue in JSON format.
+
+    Raises:
+        ApiError: If any of the requests fails.
+
+    Returns:
+        Dict: Player stats, see get_member_row.
+    """
+    player = get_member(tag)
+    war_index = None
+    if player.clan_tag is not None:
+        war_index = RoyaleApi.get_war_index(
+            RoyaleApi.get_clan_data(player.clan_tag, "riverracelog", own_only=True),
+            RoyaleApi.get_clan_data(player.clan_tag, "currentriverrace", own_only=True),
+        )
+    return get_member_row(player, all_cards, war_index)
+
+
+def scan_clan(
+    clan_tag: str,
+    all_cards: Optional[Dict] = None,
+    max_workers: int = 8,
+    on_done: Optional[Callable[[int, int], None]] = None,
+    cancel: Optional[threading.Event] = None,
+    on_row: Optional[Callable[[Dict], None]] = None,
+) -> List[Dict]:
+    """Get the stats of every member of a clan.
+
+    The cards catalogue and the river race data are requested once and shared by
+    all the members. The members are kept as Player models until the scan ends.
+    A failed member doesn't stop the scan of the others.
+
+    Args:
+        clan_tag (str): Clan tag.
+        all_cards (Dict): Cards catalogue in JSON format. It is requested if not
+            given, pass it to reuse it between clans. Defaults to None.
+        max_workers (int): Maximum concurrent requests. Defaults to 8.
+        on_done (Callable): Function called from the calling thread with the
+            number of finished and total members. Defaults to None.
+        cancel (threading.Event): Event to stop the scan. Defaults to None.
+        on_row (Callable): Function called from the calling thread with each
+            member row as soon as it's ready. Defaults to None.
+
+    Raises:
+        ApiError: If any of the requests of the clan fails.
+        CancelledError: If cancel is set before the scan finishes.
+
+    Returns:
+        List[Dict]: Member rows, see get_member_row, in clan order. A member
+            whose requests failed gets an error row, see get_error_row.
+    """
+    pool = ThreadPoolExecutor(max_workers)
+    shared = {
+        "members": pool.submit(RoyaleApi.get_clan_data, clan_tag, "members"),
+        "riverracelog": pool.submit(
+            RoyaleApi.get_clan_data, clan_tag, "riverracelog", True
+        ),
+        "currentriverrace": pool.submit(
+            RoyaleApi.get_clan_data, clan_tag, "currentriverrace", True
+        ),
+    }
+    pending = set(shared.values())
+    try:
+        if all_cards is None:
+            all_cards = RoyaleApi.get_cards()
+        data = {name: future.result() for name, future in shared.items()}
+        members = {member["tag"]: member for member in data["members"]["items"]}
+        futures = {pool.submit(get_member, tag): tag for tag in members}
+        pending = set(futures)
+        war_index = RoyaleApi.get_war_index(
+            data["riverracelog"], data["currentriverrace"]
+        )
+        rows = {}
+        while pending:
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            if cancel is not None and cancel.is_set():
+                raise CancelledError
+            for future in done:
+                tag = futures[future]
+                try:
+                    row = get_member_row(future.result(), all_cards, war_index)
+                except ApiError as e:
+                    row = get_error_row(members[tag], e)
+                rows[tag] = row
+                if on_row:
+                    on_row(row)
+                if on_done:
+                    on_done(len(rows), len(members))
+    finally:
+        # If it was cancelled or a request failed, the queued requests are
+        # cancelled and the running ones aren't waited for
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=not pending)
+    return [rows[tag] for tag in members]
+
+
+def scan_clans(clan_tags: Iterable[str], max_workers: int = 8) -> Dict[str, List[Dict]]:
+    """Get the stats of every member of several clans.
+
+    Args:
+        clan_tags (Iterable[str]): Clan tags.
+        max_workers (int): Maximum concurrent requests. Defaults to 8.
+
+    Returns:
+        Dict[str, List[Dict]]: Member rows of each clan.
+    """
+    all_cards = RoyaleApi.get_cards()
+    return {tag: scan_clan(tag, all_cards, max_workers) for tag in clan_tags}
+
+
+def project_clan(
+    clan_tag: str, all_cards: Optional[Dict] = None, max_workers: int = 8
+) -> Tuple[WarProjection, List[Dict]]:
+    """Project the war points of every member of a clan and the end of its race.
+
+    Run it after scan_clan to reuse the responses of the scan from the response
+    cache. Only the full current river race is requested, for the standings of
+    the rival clans.
+
+    Args:
+        clan_tag (str): Clan tag.
+        all_cards (Dict): Cards catalogue in JSON format. It is requested if not
+            given. Defaults to None.
+        max_workers (int): Maximum concurrent requests. Defaults to 8.
+
+    Raises:
+        ApiError: If any of the requests fails.
+
+    Returns:
+        Tuple[WarProjection, List[Dict]]: Projection of the members and the
+            projected finish of each clan, see WarProjection.finish.
+    """
+    if all_cards is None:
+        all_cards = RoyaleApi.get_cards()
+    members = RoyaleApi.get_clan_data(clan_tag, "members")["items"]
+    with ThreadPoolExecutor(max_workers) as pool:
+        players = list(
+            pool.map(RoyaleApi.get_player_data, [member["tag"] for member in members])
+        )
+    war_index = RoyaleApi.get_war_index(
+        RoyaleApi.get_clan_data(clan_tag, "riverracelog", own_only=True),
+        RoyaleApi.get_clan_data(clan_tag, "currentriverrace", own_only=True),
+    )
+    projection = WarProjection.from_members(players, all_cards, war_index)
+    return projection, projection.finish(
+        RoyaleApi.get_clan_data(clan_tag, "currentriverrace")
+    )
+
+
+def sort_rows(rows: List[Dict], key: str, reverse: bool = True) -> List[Dict]:
+    """Sort clan table rows by a column.
+
+    Args:
+        rows (List[Dict]): Member rows.
+        key (str): Column key, see COLUMNS.
+        reverse (bool): Whether to sort in descending order. Defaults to True.
+
+    Returns:
+        List[Dict]: Sorted rows.
+    """
+    return sorted(rows, key=lambda row: row[key], reverse=reverse)
+
+
+def format_row(row: Dict) -> List[str]:
+    """Format a clan member row as table values.
+
+    Args:
+        row (Dict): Member row.
+
+    Returns:
+        List[str]: Table values in COLUMNS order.
+    """
+    return [FORMATS.get(key, "{}").format(row[key]) for key, _ in COLUMNS]
+
+
+class ClanTable:
+    """Clan members table model, shown one page at a time.
+
+    The formatted values and the sort key of each column are computed once, when
+    a row is set. The model keeps the (sort key, tag) pairs of the sorted column
+    in ascending order, and reads them backwards to sort in descending order.
+    Sorting by another column only sorts those pairs, and setting a row while the
+    scan goes on inserts it with a binary search, so the view only redraws the
+    visible page, and only if it changed.
+
+    Args:
+        page_size (int): Rows of each page. Defaults to 20.
+        sort_key (str): Column key to sort by. Defaults to "trophies".
+        descending (bool): Whether to sort in descending order. Defaults to True.
+    """
+
+    def __init__(
+        self, page_size: int = 20, sort_key: str = "trophies", descending: bool = True
+    ):
+        self.page_size = page_size
+        self.sort_key = sort_key
+        self.descending = descending
+        self.page = 0
+        self.rows: Dict[str, Dict] = {}
+        self.values: Dict[str, List[str]] = {}
+        self.keys: Dict[str, Dict[str, Any]] = {key: {} for key, _ in COLUMNS}
+        self.index: List[Tuple[Any, str]] = []
+
+    @staticmethod
+    def key(value: Any) -> Any:
+        """Sort key of a value, case insensitive for text."""
+        return value.casefold() if isinstance(value, str) else value
+
+    def set_row(self, row: Dict) -> bool:
+        """Add a member row, or replace the row with the same tag.
+
+        Args:
+            row (Dict): Member row, see get_member_row.
+
+        Returns:
+            bool: Whether the visible page changed.
+        """
+        tag = row["tag"]
+        end = (self.page + 1) * self.page_size
+        visible = False
+        if tag in self.rows:
+            entry = (self.keys[self.sort_key][tag], tag)
+            index = bisect.bisect_left(self.index, entry)
+            visible = self.position(index) < end
+            del self.index[index]
+        self.rows[tag] = row
+        self.values[tag] = format_row(row)
+        for key, keys in self.keys.items():
+            keys[tag] = self.key(row[key])
+        entry = (self.keys[self.sort_key][tag], tag)
+        index = bisect.bisect_left(self.index, entry)
+        self.index.insert(index, entry)
+        return self.position(index) < end or visible
+
+    def position(self, index: int) -> int:
+        """Position in the table of the entry at an index of the sort entries."""
+        return len(self.index) - 1 - index if self.descending else index
+
+    def sort(self, sort_key: str, descending: bool = True):
+        """Sort the table by a column and go back to the first page.
+
+        Args:
+            sort_key (str): Column key, see COLUMNS.
+            descending (bool): Whether to sort in descending order. Defaults to
+                True.
+        """
+        if sort_key != self.sort_key:
+            self.sort_key = sort_key
+            self.index = sorted((key, tag) for tag, key in self.keys[sort_key].items())
+        self.descending = descending
+        self.page = 0
+
+    @property
+    def n_pages(self) -> int:
+        """Number of pages, at least one."""
+        return max(1, -(-len(self.index) // self.page_size))
+
+    def set_page(self, page: int):
+        """Go to a page, clamped to the existing ones.
+
+        Args:
+            page (int): Page index, from 0.
+        """
+        self.page = min(max(page, 0), self.n_pages - 1)
+
+    def page_rows(self) -> List[Dict]:
+        """Member rows of the visible page."""
+        n_rows = len(self.index)
+        start, stop = self.page * self.page_size, (self.page + 1) * self.page_size
+        if self.descending:
+            start, stop = max(n_rows - stop, 0), n_rows - start
+        entries = self.index[start:stop]
+        if self.descending:
+            entries.reverse()
+        return [self.rows[tag] for _, tag in entries]
+
+    def page_values(self) -> List[List[str]]:
+        """Table values of the visible page."""
+        return [self.values[row["tag"]] for row in self.page_rows()]
+
+    def __len__(self) -> int:
+        return len(self.rows)
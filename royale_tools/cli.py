@@ -0,0 +1,288 @@
+"""Headless player and clan reports.
+
+Usage:
+    python -m royale_tools.cli [--format {jsonl,csv}] players TAG [TAG ...]
+    python -m royale_tools.cli [--format {jsonl,csv}] clans TAG [TAG ...]
+    python -m royale_tools.cli [--processes N] [--rate R] leaderboard TAG [TAG ...]
+
+Several API tokens can be given separated by commas. The leaderboard mode scans
+the clans with a pool of processes, sharing the rate of each token, and ranks
+all their members together.
+
+The responses of a report can be saved with --export to a snapshot file, and
+the reports of those players and clans can then be run offline, without a
+token, with --snapshot.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, TextIO
+
+from royale_tools.api import RoyaleApi
+from royale_tools.clan import COLUMNS, get_player_row, scan_clan
+from royale_tools.exceptions import ApiError
+from royale_tools.tracing import Tracer
+
+TOKEN_VARIABLE = "ROYALE_TOOLS_TOKEN"
+
+
+def get_token(token: Optional[str]) -> Optional[str]:
+    """Get the API token from the argument, environment or app configuration.
+
+    Args:
+        token (str): Token given in the command line, if any.
+
+    Returns:
+        Optional[str]: API token, None if there is none.
+    """
+    if token:
+        return token
+    if os.environ.get(TOKEN_VARIABLE):
+        return os.environ[TOKEN_VARIABLE]
+    try:
+        with open(".royale-tools-config", "r") as f:
+            return json.load(f).get("token")
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def make_writer(fmt: str, fields: List[str], stream: TextIO) -> Callable[[Dict], None]:
+    """Get a function that writes rows to a stream as soon as they are ready.
+
+    Args:
+        fmt (str): Output format, "jsonl" or "csv".
+        fields (List[str]): Row keys, used as CSV header.
+        stream (TextIO): Output stream.
+
+    Returns:
+        Callable[[Dict], None]: Row writer.
+    """
+    if fmt == "csv":
+        writer = csv.DictWriter(stream, fields, extrasaction="ignore")
+        writer.writeheader()
+
+        def write_csv(row: Dict):
+            writer.writerow(row)
+            stream.flush()
+
+        return write_csv
+
+    def write_jsonl(row: Dict):
+        stream.write(json.dumps(row) + "\n")
+        stream.flush()
+
+    return write_jsonl
+
+
+def normalize(tag: str) -> str:
+    """Add the leading # to a tag if missing."""
+    return tag if tag.startswith("#") else f"#{tag}"
+
+
+def report_players(tags: List[str], write: Callable[[Dict], None], workers: int) -> int:
+    """Write the report of several players.
+
+    Args:
+        tags (List[str]): Player tags.
+        write (Callable): Row writer.
+        workers (int): Maximum concurrent players.
+
+    Returns:
+        int: Number of players that couldn't be reported.
+    """
+    all_cards = RoyaleApi.get_cards()
+    n_errors = 0
+    with ThreadPoolExecutor(workers) as pool:
+        futures = {pool.submit(get_player_row, tag, all_cards): tag for tag in tags}
+        for future in as_completed(futures):
+            try:
+                write(future.result())
+            except ApiError as e:
+                n_errors += 1
+                print(f"{futures[future]}: {e}", file=sys.stderr)
+    return n_errors
+
+
+def report_clans(tags: List[str], write: Callable[[Dict], None], workers: int) -> int:
+    """Write the report of every member of several clans.
+
+    Args:
+        tags (List[str]): Clan tags.
+        write (Callable): Row writer.
+        workers (int): Maximum concurrent members.
+
+    Returns:
+        int: Number of clans and members that couldn't be reported.
+    """
+    all_cards = RoyaleApi.get_cards()
+    n_errors = 0
+    for tag in tags:
+        try:
+            rows = scan_clan(tag, all_cards, workers)
+        except ApiError as e:
+            n_errors += 1
+            print(f"{tag}: {e}", file=sys.stderr)
+            continue
+        for row in rows:
+            if "error" in row:
+                n_errors += 1
+                print(f"{row['tag']}: {row['error']}", file=sys.stderr)
+            else:
+                write(dict(row, clan=tag))
+    return n_errors
+
+
+def report_leaderboard(
+    tags: List[str],
+    write: Callable[[Dict], None],
+    workers: int,
+    tokens: List[str],
+    processes: Optional[int],
+    rate: Optional[float],
+) -> int:
+    """Write the members of several clans ranked by trophies.
+
+    Args:
+        tags (List[str]): Clan tags.
+        write (Callable): Row writer.
+        workers (int): Maximum concurrent members of each process.
+        tokens (List[str]): API tokens.
+        processes (int): Number of processes, None for one per CPU.
+        rate (float): Requests per second allowed for each token, None for no
+            limit.
+
+    Returns:
+        int: Number of clans and members that couldn't be reported.
+    """
+    # Imported here, multiprocessing is only needed by this report
+    from royale_tools.scanner import scan_leaderboard
+
+    rows, errors = scan_leaderboard(tags, tokens, processes, workers, rate)
+    for tag, error in errors.items():
+        print(f"{tag}: {error}", file=sys.stderr)
+    for row in rows:
+        write(row)
+    return len(errors)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="royale-tools-cli", description="Clash Royale player and clan reports."
+    )
+    parser.add_argument(
+        "mode", choices=("players", "clans", "leaderboard"), help="Report type."
+    )
+    parser.add_argument("tags", nargs="+", help="Player or clan tags.")
+    parser.add_argument(
+        "--format", choices=("jsonl", "csv"), default="jsonl", help="Output format."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=8, help="Maximum concurrent requests."
+    )
+    parser.add_argument(
+        "--token",
+        help=f"API tokens, separated by commas. Defaults to ${TOKEN_VARIABLE} or "
+        "the app one.",
+    )
+    parser.add_argument("--base-url", help="API URL, e.g. of a local stand-in.")
+    parser.add_argument(
+        "--metrics", help="File to write request metrics to, in Prometheus format."
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        help="Leaderboard worker processes. Defaults to the number of CPUs.",
+    )
+    parser.add_argument(
+        "--rate", type=float, help="Requests per second allowed for each token."
+    )
+    parser.add_argument("--output", help="File to write to. Defaults to stdout.")
+    parser.add_argument(
+        "--export", help="Snapshot file to save the responses to, to run offline."
+    )
+    parser.add_argument(
+        "--snapshot", help="Snapshot file to read the responses from, not the API."
+    )
+    args = parser.parse_args(argv)
+    if args.export and args.mode == "leaderboard":
+        parser.error("--export isn't supported by the leaderboard mode")
+    if args.mode != "leaderboard":
+        for option in ("processes", "rate"):
+            if getattr(args, option) is not None:
+                parser.error(f"--{option} is only supported by the leaderboard mode")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the command line interface.
+
+    Args:
+        argv (List[str]): Command line arguments. Defaults to sys.argv.
+
+    Returns:
+        int: Exit code.
+    """
+    args = parse_args(argv)
+    token = get_token(args.token)
+    if args.snapshot:
+        from royale_tools.snapshot import Snapshot
+
+        RoyaleApi.source = Snapshot(args.snapshot)
+        token = token or "offline"
+    if token is None:
+        print(
+            f"An API token is required, use --token or ${TOKEN_VARIABLE}",
+            file=sys.stderr,
+        )
+        return 2
+    tokens = token.split(",")
+    RoyaleApi.token = tokens[0]
+    if args.base_url:
+        RoyaleApi.configure(base_url=args.base_url)
+    if args.metrics:
+        RoyaleApi.tracer = Tracer(log=False)
+    if args.export:
+        from royale_tools.snapshot import SnapshotRecorder
+
+        RoyaleApi.recorder = SnapshotRecorder()
+    fields = [key for key, _ in COLUMNS]
+    if args.mode == "leaderboard":
+        fields = ["rank", "clan"] + fields
+    elif args.mode == "clans":
+        fields.append("clan")
+    stream = open(args.output, "w", newline="") if args.output else sys.stdout
+    write = make_writer(args.format, fields, stream)
+    tags = [normalize(tag) for tag in args.tags]
+    try:
+        if args.mode == "leaderboard":
+            n_errors = report_leaderboard(
+                tags, write, args.workers, tokens, args.processes, args.rate
+            )
+        else:
+            report = report_players if args.mode == "players" else report_clans
+            n_errors = report(tags, write, args.workers)
+    except ApiError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        if args.output:
+            stream.close()
+        if args.metrics:
+            RoyaleApi.tracer.write(args.metrics)
+            RoyaleApi.tracer = None
+        if RoyaleApi.recorder is not None:
+            RoyaleApi.recorder.write(args.export)
+            RoyaleApi.recorder = None
+        if RoyaleApi.source is not None:
+            RoyaleApi.source.close()
+            RoyaleApi.source = None
+    return 1 if n_errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,387 @@
+import math
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# Cards of a deck and decks of a river race day
+DECK_SIZE = 8
+N_WAR_DECKS = 4
+# Level bonus of the required cards in the elixir dynamic program, more than the
+# levels of all the other cards of the decks together
+REQUIRED_BONUS = 1000
+
+
+class DeckOptimizer:
+    """Choose disjoint decks that maximize the total normalized card level.
+
+    The levels are normalized like best_32 of RoyaleApi.get_cards_stats, i.e.
+    13 is always the maximum. Cards with the same level and elixir cost are
+    interchangeable, so they are searched as one card type with a count.
+
+    The decks are found with a depth-first branch and bound: cards are tried
+    from the best level down, decks are filled one at a time, and a branch is
+    cut as soon as the best remaining levels can't beat the best decks found so
+    far, the elixir range can't be met, or the required cards don't fit anymore.
+
+    With an average elixir range per deck, the best cards whose total cost fits
+    the range of all the decks together are first chosen with a dynamic program
+    over card counts and costs, if NumPy is installed. That is an upper bound,
+    and it is usually reached by splitting those cards into decks that each fit
+    the range. Otherwise, the search stops as soon as it reaches the bound.
+
+    The search stops after time_limit seconds and keeps the best decks found,
+    so the result may not be optimal, or even missing, for heavily constrained
+    collections.
+
+    Args:
+        player_cards (List[Dict]): Player cards in JSON format.
+        required (Iterable[str]): Names of cards that must be in a deck.
+            Defaults to none.
+        min_elixir (float): Minimum average elixir cost of each deck. Defaults
+            to None (no minimum).
+        max_elixir (float): Maximum average elixir cost of each deck. Defaults
+            to None (no maximum).
+        n_decks (int): Number of decks. Defaults to 4, the decks of a war day.
+        time_limit (float): Maximum search time in seconds. Defaults to 0.1.
+
+    Raises:
+        ValueError: If a required card isn't in the collection.
+    """
+
+    def __init__(
+        self,
+        player_cards: List[Dict],
+        required: Iterable[str] = (),
+        min_elixir: Optional[float] = None,
+        max_elixir: Optional[float] = None,
+        n_decks: int = N_WAR_DECKS,
+        time_limit: float = 0.1,
+    ):
+        required = set(required)
+        self.n_decks = n_decks
+        self.time_limit = time_limit
+        self.elixir = min_elixir is not None or max_elixir is not None
+        # Cards without elixir cost (e.g. Mirror) can't be used with an elixir range
+        cards = [c for c in player_cards if not self.elixir or "elixirCost" in c]
+        missing = required - {c["name"] for c in cards}
+        if missing:
+            raise ValueError(f"Required cards not available: {sorted(missing)}")
+        # Best level first, then required cards, then the cheapest cards, or the
+        # most expensive ones if the decks only have a minimum cost
+        sign = -1 if min_elixir is not None and max_elixir is None else 1
+        types: Dict[Tuple, List[str]] = {}
+        for card in cards:
+            name = card["name"]
+            level = card["level"] + 13 - card["maxLevel"]
+            cost = card.get("elixirCost", 0)
+            key = (-level, name not in required, sign * cost, name * (name in required))
+            types.setdefault(key, []).append(name)
+        keys = sorted(types)
+        self.names = [types[key] for key in keys]
+        self.levels = [-key[0] for key in keys]
+        self.costs = [sign * key[2] for key in keys]
+        self.is_required = [not key[1] for key in keys]
+        self.counts = [len(names) for names in self.names]
+        self.min_total = DECK_SIZE * min_elixir if min_elixir is not None else 0.0
+        self.max_total = DECK_SIZE * max_elixir if max_elixir is not None else math.inf
+        # Sorted costs of every card, to prune the elixir range
+        self.all_costs = sorted(c.get("elixirCost", 0) for c in cards)
+        costs = self.all_costs
+        self.min_costs = [sum(costs[:k]) for k in range(DECK_SIZE + 1)]
+        self.max_costs = [sum(costs[::-1][:k]) for k in range(DECK_SIZE + 1)]
+
+        # Count of each card type in each deck
+        self.decks: List[List[int]] = [[0] * len(keys) for _ in range(n_decks)]
+        self.sizes = [0] * n_decks
+        self.firsts = [0] * n_decks
+        self.n_required = sum(self.is_required)
+        self.required_types = [i for i, req in enumerate(self.is_required) if req]
+        self.upper = math.inf
+        self.best_total = -1
+        self.best_decks: Optional[List[List[int]]] = None
+        self.optimal = True
+        self.n_nodes = 0
+        self.deadline = 0.0
+
+    def timed_out(self) -> bool:
+        """Count a search node and check the deadline every few nodes."""
+        self.n_nodes += 1
+        if self.n_nodes % 32 == 0 and time.perf_counter() > self.deadline:
+            self.optimal = False
+        return not self.optimal
+
+    def top_levels(self, n_slots: int) -> int:
+        """Sum of the best levels of n_slots unused cards, required ones first."""
+        total = 0
+        for index in self.required_types:
+            if self.counts[index]:
+                total += self.levels[index]
+                n_slots -= 1
+        for level, count, required in zip(self.levels, self.counts, self.is_required):
+            if required:
+                continue
+            if n_slots <= count:
+                return total + n_slots * level
+            total += count * level
+            n_slots -= count
+        return total
+
+    def elixir_fits(self, cost: int, n_left: int) -> bool:
+        """Whether a deck elixir cost can still end up in the range."""
+        if cost + self.min_costs[n_left] > self.max_total:
+            return False
+        return cost + self.max_costs[n_left] >= self.min_total
+
+    def search(self, deck: int, start: int, total: int, cost: int):
+        """Fill the decks from the given deck and card type onwards."""
+        if self.timed_out() or self.best_total >= self.upper:
+            return
+        n_left = DECK_SIZE - self.sizes[deck]
+        if n_left == 0:
+            if not self.elixir_fits(cost, 0):
+                return
+            if deck + 1 == self.n_decks:
+                if total > self.best_total and self.n_required == 0:
+                    self.best_total = total
+                    self.best_decks = [list(d) for d in self.decks]
+                return
+            # Decks are interchangeable: each one starts at or after the first
+            # card type of the previous one
+            self.search(deck + 1, self.firsts[deck], total, 0)
+            return
+
+        n_later = DECK_SIZE * (self.n_decks - deck - 1)
+        if self.n_required > n_left + n_later:
+            return
+        if total + self.top_levels(n_left + n_later) <= self.best_total:
+            return
+        later = self.top_levels(n_later)
+        counts, current = self.counts, self.decks[deck]
+        for index in range(start, len(counts)):
+            if not counts[index]:
+                continue
+            level = self.levels[index]
+            # Levels are sorted, no later card can do better than this one
+            if total + level * n_left + later <= self.best_total:
+                break
+            if self.sizes[deck] == 0:
+                self.firsts[deck] = index
+            # Try as many cards of the type as possible first
+            for take in range(min(counts[index], n_left), 0, -1):
+                new_cost = cost + take * self.costs[index]
+                if not self.elixir_fits(new_cost, n_left - take):
+                    continue
+                counts[index] -= take
+                current[index] += take
+                self.sizes[deck] += take
+                self.n_required -= take * self.is_required[index]
+                self.search(deck, index + 1, total + take * level, new_cost)
+                self.n_required += take * self.is_required[index]
+                self.sizes[deck] -= take
+                current[index] -= take
+                counts[index] += take
+                if not self.optimal:
+                    return
+
+    def aggregate(self) -> Optional[Tuple[int, List[int]]]:
+        """Best cards of all the decks together, with their total cost in range.
+
+        Raises:
+            ImportError: If NumPy isn't installed.
+
+        Returns:
+            Optional[Tuple[int, List[int]]]: Levels sum, an upper bound of the
+                decks levels, and count of each card type. None if no cards fit.
+        """
+        import numpy as np
+
+        n_cards = DECK_SIZE * self.n_decks
+        max_cost = sum(self.all_costs[-n_cards:])
+        max_cost = int(min(max_cost, self.n_decks * self.max_total))
+        min_cost = math.ceil(self.n_decks * self.min_total)
+        if min_cost > max_cost or len(self.all_costs) < n_cards:
+            return None
+        levels = [
+            level + REQUIRED_BONUS * req
+            for level, req in zip(self.levels, self.is_required)
+        ]
+        empty = np.iinfo(np.int64).min // 2
+        # Best levels sum of k cards costing c, adding one card type at a time
+        values = np.full((n_cards + 1, max_cost + 1), empty, dtype=np.int64)
+        values[0, 0] = 0
+        steps = []
+        for level, cost, count in zip(levels, self.costs, self.counts):
+            steps.append(values)
+            values = values.copy()
+            for take in range(1, min(count, n_cards) + 1):
+                if take * cost > max_cost:
+                    break
+                shifted = steps[-1][: n_cards + 1 - take, : max_cost + 1 - take * cost]
+                shift = take * cost
+                target = values[take:, shift:]
+                np.maximum(target, shifted + take * level, out=target)
+
+        row = values[n_cards, min_cost:]
+        cost = min_cost + int(row.argmax())
+        best = int(row.max())
+        if best < REQUIRED_BONUS * self.n_required:
+            return None
+        # Walk the card types back to find the count of each one
+        takes = [0] * len(self.counts)
+        k = n_cards
+        for index in range(len(self.counts) - 1, -1, -1):
+            previous = steps[index]
+            for take in range(min(self.counts[index], k) + 1):
+                c = cost - take * self.costs[index]
+                if c >= 0 and previous[k - take, c] + take * levels[index] == best:
+                    takes[index] = take
+                    k, cost, best = k - take, c, best - take * levels[index]
+                    break
+        return sum(t * level for t, level in zip(takes, self.levels)), takes
+
+    def partition(self, takes: List[int]) -> Optional[List[List[int]]]:
+        """Split cards into decks that each fit the elixir range.
+
+        Only the costs matter, so the decks are searched as counts of each cost,
+        one deck at a time, and the remaining counts that can't be split are
+        remembered.
+
+        Args:
+            takes (List[int]): Count of each card type.
+
+        Returns:
+            Optional[List[List[int]]]: Count of each card type in each deck,
+                None if the cards can't be split or the time is up.
+        """
+        values = sorted({self.costs[i] for i, n in enumerate(takes) if n}, reverse=True)
+        by_cost: Dict[int, List[int]] = {value: [] for value in values}
+        for index, take in enumerate(takes):
+            if take:
+                by_cost[self.costs[index]].extend([index] * take)
+        counts = tuple(len(by_cost[value]) for value in values)
+        decks = self.split_costs(values, counts, self.n_decks, None, set())
+        if decks is None:
+            return None
+        # Give each deck card types of the chosen costs
+        result = []
+        for deck in decks:
+            types = [0] * len(takes)
+            for value, n in zip(values, deck):
+                for _ in range(n):
+                    types[by_cost[value].pop()] += 1
+            result.append(types)
+        return result
+
+    def split_costs(
+        self,
+        values: List[int],
+        remaining: Tuple[int, ...],
+        n_decks: int,
+        previous: Optional[Tuple[int, ...]],
+        failed: Set[Tuple],
+    ) -> Optional[List[Tuple[int, ...]]]:
+        """Split card counts of each cost into decks, in decreasing order."""
+        if n_decks == 0:
+            return []
+        if (remaining, previous) in failed or self.timed_out():
+            return None
+        # The other decks must still fit the range with the cards left
+        total = sum(n * value for n, value in zip(remaining, values))
+        low = max(self.min_total, total - (n_decks - 1) * self.max_total)
+        high = min(self.max_total, total - (n_decks - 1) * self.min_total)
+        for deck in self.deck_costs(
+            values, remaining, previous, 0, DECK_SIZE, 0, (low, high)
+        ):
+            rest = tuple(r - n for r, n in zip(remaining, deck))
+            decks = self.split_costs(values, rest, n_decks - 1, deck, failed)
+            if decks is not None:
+                return [deck] + decks
+        failed.add((remaining, previous))
+        return None
+
+    def deck_costs(
+        self,
+        values: List[int],
+        remaining: Tuple[int, ...],
+        previous: Optional[Tuple[int, ...]],
+        value: int,
+        n_left: int,
+        cost: int,
+        cost_range: Tuple[float, float],
+    ) -> Iterator[Tuple[int, ...]]:
+        """Card counts of each cost of a deck, up to the previous deck counts."""
+        if value == len(values):
+            if n_left == 0:
+                yield ()
+            return
+        low, high = cost_range
+        cheaper = values[value + 1] if value + 1 < len(values) else 0
+        highest = min(remaining[value], n_left)
+        if previous is not None:
+            highest = min(highest, previous[value])
+        for n in range(highest, -1, -1):
+            new_cost = cost + n * values[value]
+            # The other cards cost between the cheapest and the next cost
+            if new_cost + (n_left - n) * values[-1] > high:
+                continue
+            if new_cost + (n_left - n) * cheaper < low:
+                break
+            same = previous if previous is not None and n == previous[value] else None
+            for rest in self.deck_costs(
+                values, remaining, same, value + 1, n_left - n, new_cost, cost_range
+            ):
+                yield (n,) + rest
+
+    def solve(self) -> Optional[Dict]:
+        """Search the best decks.
+
+        Returns:
+            Optional[Dict]: Card names and normalized levels sum of each deck,
+                the total levels sum, whether the decks are proven optimal and
+                the number of explored search nodes. None if no decks fit the
+                constraints, or none were found in time.
+        """
+        self.deadline = time.perf_counter() + self.time_limit
+        if self.elixir:
+            try:
+                best = self.aggregate()
+            except ImportError:
+                pass
+            else:
+                if best is None:
+                    return None
+                self.upper, takes = best
+                self.best_decks = self.partition(takes)
+                if self.best_decks is not None:
+                    self.best_total = self.upper
+        if self.best_decks is None:
+            self.search(0, 0, 0, 0)
+        if self.best_decks is None:
+            return None
+        names = [list(names) for names in self.names]
+        decks = [
+            [names[index].pop() for index, n in enumerate(deck) for _ in range(n)]
+            for deck in self.best_decks
+        ]
+        return {
+            "decks": decks,
+            "levels": [
+                sum(self.levels[i] * n for i, n in enumerate(deck))
+                for deck in self.best_decks
+            ],
+            "total": self.best_total,
+            "optimal": self.optimal,
+            "nodes": self.n_nodes,
+        }
+
+
+def best_war_decks(player_cards: List[Dict], **constraints) -> Optional[Dict]:
+    """Best disjoint war decks of a player, see DeckOptimizer.
+
+    Args:
+        player_cards (List[Dict]): Player cards in JSON format.
+        **constraints: Constraints and settings of DeckOptimizer.
+
+    Returns:
+        Optional[Dict]: Best decks, None if no decks fit the constraints.
+    """
+    return DeckOptimizer(player_cards, **constraints).solve()
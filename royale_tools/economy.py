@@ -0,0 +1,226 @@
+from typing import Dict, List, Sequence
+
+# Maximum level of each rarity: common, rare, epic and legendary
+MAX_LEVELS = (13, 11, 8, 5)
+# Cards needed to upgrade from each level to the next one
+N_CARDS = (1, 2, 4, 10, 20, 50, 100, 200, 400, 800, 1000, 2000, 5000)
+# Gold needed for the upgrades, from the last one to the first one
+N_GOLD = (100000, 50000, 20000, 8000, 4000, 2000, 1000, 400, 150, 50, 20, 5)
+
+
+def gold_costs(max_level: int) -> List[int]:
+    """Gold needed for the upgrades of a rarity, from the last one to the first one.
+
+    Args:
+        max_level (int): Maximum level of the rarity.
+
+    Returns:
+        List[int]: Gold costs.
+    """
+    n_gold = list(N_GOLD)
+    if max_level == 5:
+        n_gold.append(0)
+        n_gold[3] = 5000
+    if max_level == 8:
+        n_gold[6] = 400
+    return n_gold
+
+
+def build_tables():
+    """Remaining cards and gold to max a card from each level, for each rarity."""
+    cards, gold = {}, {}
+    for max_lvl in MAX_LEVELS:
+        n_gold = gold_costs(max_lvl)
+        cards[max_lvl] = [sum(N_CARDS[lvl:max_lvl]) for lvl in range(max_lvl + 1)]
+        gold[max_lvl] = [sum(n_gold[: max_lvl - lvl]) for lvl in range(max_lvl + 1)]
+    return cards, gold
+
+
+REM_CARDS, REM_GOLD = build_tables()
+
+
+def get_remaining_cards(level: int, max_level: int, count: int) -> int:
+    """Cards needed to max a card.
+
+    Args:
+        level (int): Current level, 0 if it isn't collected.
+        max_level (int): Maximum level of the card.
+        count (int): Cards already collected for the next upgrade.
+
+    Returns:
+        int: Remaining cards.
+    """
+    if level == max_level:
+        return 0
+    return REM_CARDS[max_level][level] - count
+
+
+def get_remaining_gold(level: int, max_level: int) -> int:
+    """Gold needed to max a card.
+
+    Args:
+        level (int): Current level, 0 if it isn't collected.
+        max_level (int): Maximum level of the card.
+
+    Returns:
+        int: Remaining gold.
+    """
+    return REM_GOLD[max_level][level]
+
+
+def cards_stats(player_cards: List[Dict], all_cards: Dict) -> Dict:
+    """Get cards stats.
+
+    Args:
+        player_cards (List[Dict]): Player cards in JSON format.
+        all_cards (Dict): Cards catalogue in JSON format.
+
+    Returns:
+        Dict: Cards stats, see RoyaleApi.get_cards_stats.
+    """
+    stats: Dict = {
+        max_lvl: {"rem_cards": 0, "rem_gold": 0, "levels": []} for max_lvl in MAX_LEVELS
+    }
+    collected = set()
+    levels = []
+    for card in player_cards:
+        collected.add(card["name"])
+        lvl, max_lvl = card["level"], card["maxLevel"]
+        lvl_stats = stats[max_lvl]
+        if lvl != max_lvl:
+            lvl_stats["rem_cards"] += REM_CARDS[max_lvl][lvl] - card["count"]
+            lvl_stats["rem_gold"] += REM_GOLD[max_lvl][lvl]
+        lvl_stats["levels"].append(lvl)
+        levels.append(lvl + (13 - max_lvl))
+
+    stats["best_32"] = sorted(levels, reverse=True)[:32]
+    for card in all_cards["items"]:
+        if card["name"] not in collected:
+            lvl_stats = stats[card["maxLevel"]]
+            lvl_stats["rem_cards"] += REM_CARDS[card["maxLevel"]][0]
+            lvl_stats["rem_gold"] += REM_GOLD[card["maxLevel"]][0]
+            lvl_stats["levels"].append(0)
+
+    stats["collected"] = (len(collected), len(all_cards["items"]))
+    for max_lvl in MAX_LEVELS:
+        lvl_stats = stats[max_lvl]
+        mean = sum(lvl_stats["levels"]) / len(lvl_stats["levels"])
+        lvl_stats["progress"] = mean * (100.0 / max_lvl)
+        lvl_stats["avg_level"] = mean + (13 - max_lvl)
+    return stats
+
+
+def batch_cards_stats(
+    players_cards: Sequence[List[Dict]], all_cards: Dict, levels: bool = False
+) -> List[Dict]:
+    """Get the cards stats of many players at once.
+
+    The collections are turned into level and count matrices, so the remaining
+    cards and gold are computed with table lookups over all the players together.
+    Without NumPy, every player is computed with cards_stats.
+
+    Args:
+        players_cards (Sequence[List[Dict]]): Cards of each player in JSON format.
+        all_cards (Dict): Cards catalogue in JSON format.
+        levels (bool): Whether to include the levels lists of each rarity like
+            cards_stats does. Defaults to False.
+
+    Returns:
+        List[Dict]: Cards stats of each player.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        return [cards_stats(cards, all_cards) for cards in players_cards]
+
+    # Columns: catalogue cards first, then unknown cards owned by some player
+    columns = {card["name"]: i for i, card in enumerate(all_cards["items"])}
+    max_levels = [card["maxLevel"] for card in all_cards["items"]]
+    n_catalogue = len(columns)
+    rows, cols, card_levels, counts = [], [], [], []
+    for row, cards in enumerate(players_cards):
+        for card in cards:
+            col = columns.get(card["name"])
+            if col is None:
+                col = columns[card["name"]] = len(columns)
+                max_levels.append(card["maxLevel"])
+            rows.append(row)
+            cols.append(col)
+            card_levels.append(card["level"])
+            counts.append(card["count"])
+    shape = (len(players_cards), len(columns))
+    level = np.zeros(shape, dtype=np.int64)
+    count = np.zeros(shape, dtype=np.int64)
+    owned = np.zeros(shape, dtype=bool)
+    level[rows, cols] = card_levels
+    count[rows, cols] = counts
+    owned[rows, cols] = True
+    # Cards that count in the stats: owned or available in the catalogue
+    present = owned.copy()
+    present[:, :n_catalogue] = True
+
+    max_level = np.array(max_levels, dtype=np.int64)
+    rarity = np.array([MAX_LEVELS.index(m) for m in max_levels], dtype=np.int64)
+    width = max(MAX_LEVELS) + 1
+    cards_table = np.zeros((len(MAX_LEVELS), width), dtype=np.int64)
+    gold_table = np.zeros((len(MAX_LEVELS), width), dtype=np.int64)
+    for i, max_lvl in enumerate(MAX_LEVELS):
+        cards_table[i, : max_lvl + 1] = REM_CARDS[max_lvl]
+        gold_table[i, : max_lvl + 1] = REM_GOLD[max_lvl]
+    rem_cards = (
+        np.where(level == max_level, 0, cards_table[rarity, level] - count) * present
+    )
+    rem_gold = gold_table[rarity, level] * present
+    norm_level = np.where(owned, level + (13 - max_level), -1)
+    best = -np.sort(-norm_level, axis=1)[:, :32]
+
+    per_rarity = {}
+    for i, max_lvl in enumerate(MAX_LEVELS):
+        mask = rarity == i
+        per_rarity[max_lvl] = (
+            rem_cards[:, mask].sum(axis=1).tolist(),
+            rem_gold[:, mask].sum(axis=1).tolist(),
+            (level[:, mask] * present[:, mask]).sum(axis=1).tolist(),
+            present[:, mask].sum(axis=1).tolist(),
+        )
+    best_32 = best.tolist()
+    n_collected = owned.sum(axis=1).tolist()
+
+    results = []
+    for row, cards in enumerate(players_cards):
+        stats: Dict = {}
+        for max_lvl, (r_cards, r_gold, levels_sum, n_levels) in per_rarity.items():
+            mean = levels_sum[row] / n_levels[row]
+            stats[max_lvl] = {
+                "rem_cards": r_cards[row],
+                "rem_gold": r_gold[row],
+                "progress": mean * (100.0 / max_lvl),
+                "avg_level": mean + (13 - max_lvl),
+            }
+            if levels:
+                stats[max_lvl]["levels"] = player_levels(cards, all_cards, max_lvl)
+        stats["best_32"] = best_32[row][: min(n_collected[row], 32)]
+        stats["collected"] = (n_collected[row], n_catalogue)
+        results.append(stats)
+    return results
+
+
+def player_levels(
+    player_cards: List[Dict], all_cards: Dict, max_level: int
+) -> List[int]:
+    """Levels of a rarity in cards_stats order: player cards, then missing ones.
+
+    Args:
+        player_cards (List[Dict]): Player cards in JSON format.
+        all_cards (Dict): Cards catalogue in JSON format.
+        max_level (int): Maximum level of the rarity.
+
+    Returns:
+        List[int]: Card levels, 0 for the missing cards.
+    """
+    collected = {card["name"] for card in player_cards}
+    levels = [card["level"] for card in player_cards if card["maxLevel"] == max_level]
+    for card in all_cards["items"]:
+        if card["name"] not in collected and card["maxLevel"] == max_level:
+            levels.append(0)
+    return levels
@@ -0,0 +1,66 @@
+from typing import Optional
+
+
+class ApiError(Exception):
+    """Clash Royale API request error.
+
+    Args:
+        message (str): Error description.
+        status_code (int): HTTP status code, None if there was no response.
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class AuthError(ApiError):
+    """Invalid API token or IP address not allowed for the token."""
+
+
+class NotFoundError(ApiError):
+    """Invalid player or clan tag."""
+
+
+class RateLimitError(ApiError):
+    """Request throttled by the API.
+
+    Args:
+        message (str): Error description.
+        status_code (int): HTTP status code.
+        retry_after (float): Seconds to wait before retrying, if known.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = 429,
+        retry_after: Optional[float] = None,
+    ):
+        super().__init__(message, status_code)
+        self.retry_after = retry_after
+
+
+class ServerError(ApiError):
+    """API server error or maintenance."""
+
+
+def status_error(message: str, status_code: int) -> ApiError:
+    """Get the error matching an unsuccessful HTTP status code.
+
+    Args:
+        message (str): Error description.
+        status_code (int): HTTP status code.
+
+    Returns:
+        ApiError: Typed error.
+    """
+    if status_code in (401, 403):
+        return AuthError(message, status_code)
+    if status_code == 404:
+        return NotFoundError(message, status_code)
+    if status_code == 429:
+        return RateLimitError(message, status_code)
+    if status_code >= 500:
+        return ServerError(message, status_code)
+    return ApiError(message, status_code)
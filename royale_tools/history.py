@@ -0,0 +1,260 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS player_snapshots (
+    tag TEXT NOT NULL,
+    taken_at REAL NOT NULL,
+    digest INTEGER NOT NULL,
+    trophies INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS player_snapshots_tag
+    ON player_snapshots (tag, taken_at);
+CREATE TABLE IF NOT EXISTS race_participants (
+    clan_tag TEXT NOT NULL,
+    season_id INTEGER NOT NULL,
+    section_index INTEGER NOT NULL,
+    created_date TEXT NOT NULL,
+    player_tag TEXT NOT NULL,
+    fame INTEGER NOT NULL,
+    repair_points INTEGER NOT NULL,
+    PRIMARY KEY (clan_tag, season_id, section_index, player_tag)
+);
+CREATE INDEX IF NOT EXISTS race_participants_player
+    ON race_participants (player_tag, created_date);
+CREATE TABLE IF NOT EXISTS current_participants (
+    clan_tag TEXT NOT NULL,
+    player_tag TEXT NOT NULL,
+    section_index INTEGER NOT NULL,
+    fame INTEGER NOT NULL,
+    repair_points INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (clan_tag, player_tag)
+);
+CREATE INDEX IF NOT EXISTS current_participants_player
+    ON current_participants (player_tag);
+"""
+
+Since = Optional[Union[datetime, str]]
+
+
+class HistoryStore:
+    """Append-only SQLite store of player and river race snapshots.
+
+    Races of the river race log are stored once per clan, season and section, so
+    the same race can be added from many responses. Player snapshots are only
+    stored when they change. Everything is indexed by player tag and date, so
+    the war history isn't limited to the races still returned by the API.
+
+    Args:
+        path (str): Database file. Defaults to ":memory:".
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.executescript(SCHEMA)
+
+    @staticmethod
+    def api_date(date: Since) -> Optional[str]:
+        """Date in the API format, e.g. "20201201T100000.000Z"."""
+        if isinstance(date, datetime):
+            return date.strftime("%Y%m%dT%H%M%S.000Z")
+        return date
+
+    def add_player(self, player_data: Dict, taken_at: Optional[float] = None) -> bool:
+        """Store a player snapshot if it changed since the last one.
+
+        Args:
+            player_data (Dict): Player data in JSON format.
+            taken_at (float): Snapshot timestamp. Defaults to now.
+
+        Returns:
+            bool: Whether the snapshot was stored.
+        """
+        data = json.dumps(player_data, sort_keys=True)
+        digest = zlib.crc32(data.encode())
+        with self.lock, self.conn:
+            last = self.conn.execute(
+                "SELECT digest FROM player_snapshots WHERE tag = ? "
+                "ORDER BY taken_at DESC LIMIT 1",
+                (player_data["tag"],),
+            ).fetchone()
+            if last is not None and last[0] == digest:
+                return False
+            self.conn.execute(
+                "INSERT INTO player_snapshots VALUES (?, ?, ?, ?, ?)",
+                (
+                    player_data["tag"],
+                    time.time() if taken_at is None else taken_at,
+                    digest,
+                    player_data.get("trophies"),
+                    data,
+                ),
+            )
+        return True
+
+    def add_river_race_log(self, clan_tag: str, river_race_log: Dict) -> int:
+        """Store the clan's participants of every race not stored yet.
+
+        Args:
+            clan_tag (str): Clan tag.
+            river_race_log (Dict): Clan river race log data in JSON format.
+
+        Returns:
+            int: Number of new participations.
+        """
+        rows = [
+            (
+                clan_tag,
+                race["seasonId"],
+                race["sectionIndex"],
+                race["createdDate"],
+                player["tag"],
+                player["fame"],
+                player["repairPoints"],
+            )
+            for race in river_race_log["items"]
+            for clan in race["standings"]
+            if clan["clan"]["tag"] == clan_tag
+            for player in clan["clan"]["participants"]
+        ]
+        with self.lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO race_participants VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            return self.conn.total_changes - before
+
+    def add_current_river_race(
+        self, curr_river_race: Dict, taken_at: Optional[float] = None
+    ):
+        """Replace the stored current race of a clan.
+
+        Args:
+            curr_river_race (Dict): Clan current river race data in JSON format.
+            taken_at (float): Snapshot timestamp. Defaults to now.
+        """
+        clan = curr_river_race["clan"]
+        taken_at = time.time() if taken_at is None else taken_at
+        rows = [
+            (
+                clan["tag"],
+                player["tag"],
+                curr_river_race["sectionIndex"],
+                player["fame"],
+                player["repairPoints"],
+                taken_at,
+            )
+            for player in clan["participants"]
+        ]
+        with self.lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM current_participants WHERE clan_tag = ?", (clan["tag"],)
+            )
+            self.conn.executemany(
+                "INSERT INTO current_participants VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def war_stats(
+        self, player_tag: str, since: Since = None, clan_tag: Optional[str] = None
+    ) -> Dict:
+        """Get the war stats of a player from every stored race.
+
+        Args:
+            player_tag (str): Player tag.
+            since (Union[datetime, str]): Only races created since this date,
+                a datetime or a date in the API format. Defaults to None (all).
+            clan_tag (str): Only races of this clan, like a WarIndex of its
+                river race data. Defaults to None (every clan of the player).
+
+        Returns:
+            Dict: War stats like RoyaleApi.get_war_stats, newest race first.
+        """
+        clan_filter = " AND clan_tag = ?" if clan_tag else ""
+        clan_param = (clan_tag,) if clan_tag else ()
+        with self.lock:
+            races = self.conn.execute(
+                "SELECT fame, repair_points FROM race_participants "
+                f"WHERE player_tag = ? AND created_date >= ?{clan_filter} "
+                "ORDER BY season_id DESC, section_index DESC",
+                (player_tag, self.api_date(since) or "", *clan_param),
+            ).fetchall()
+            current = self.conn.execute(
+                "SELECT fame, repair_points FROM current_participants "
+                f"WHERE player_tag = ?{clan_filter} ORDER BY updated_at DESC LIMIT 1",
+                (player_tag, *clan_param),
+            ).fetchone()
+        stats: Dict = {
+            "fame_points": [float(fame) for fame, _ in races],
+            "repair_points": [float(repair) for _, repair in races],
+            "war_points": [float(fame + repair) for fame, repair in races],
+        }
+        if current is not None:
+            stats["current_fame_points"] = current[0]
+            stats["current_repair_points"] = current[1]
+            stats["current_war_points"] = current[0] + current[1]
+        return stats
+
+    def war_averages(self, player_tag: str, since: Since = None) -> Dict[str, float]:
+        """Get the war averages of a player, computed by the database.
+
+        Args:
+            player_tag (str): Player tag.
+            since (Union[datetime, str]): Only races created since this date.
+                Defaults to None (all).
+
+        Returns:
+            Dict[str, float]: Number of races and average fame, repair and war
+                points, 0 without races.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT COUNT(*), AVG(fame), AVG(repair_points), "
+                "AVG(fame + repair_points) FROM race_participants "
+                "WHERE player_tag = ? AND created_date >= ?",
+                (player_tag, self.api_date(since) or ""),
+            ).fetchone()
+        n_races, fame, repair, war = row
+        return {
+            "races": n_races,
+            "avg_fame_points": fame or 0.0,
+            "avg_repair_points": repair or 0.0,
+            "avg_war_points": war or 0.0,
+        }
+
+    def player_history(
+        self, tag: str, since: Optional[float] = None
+    ) -> List[Tuple[float, Dict]]:
+        """Get the stored snapshots of a player.
+
+        Args:
+            tag (str): Player tag.
+            since (float): Only snapshots taken since this timestamp. Defaults to
+                None (all).
+
+        Returns:
+            List[Tuple[float, Dict]]: Timestamp and player data of each snapshot,
+                oldest first.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT taken_at, data FROM player_snapshots "
+                "WHERE tag = ? AND taken_at >= ? ORDER BY taken_at",
+                (tag, since or 0.0),
+            ).fetchall()
+        return [(taken_at, json.loads(data)) for taken_at, data in rows]
+
+    def close(self):
+        """Close the database."""
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,139 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+
+def cards_fingerprint(player_cards: List[Dict], all_cards: Dict) -> Tuple:
+    """Fingerprint of the fields read by economy.cards_stats.
+
+    Args:
+        player_cards (List[Dict]): Player cards in JSON format.
+        all_cards (Dict): Cards catalogue in JSON format.
+
+    Returns:
+        Tuple: Hashable key, equal for payloads giving the same stats.
+    """
+    return (
+        tuple(
+            [(c["name"], c["level"], c["maxLevel"], c["count"]) for c in player_cards]
+        ),
+        tuple([(c["name"], c["maxLevel"]) for c in all_cards["items"]]),
+    )
+
+
+def decks_fingerprint(player_cards: List[Dict]) -> Tuple:
+    """Fingerprint of the fields read by decks.DeckOptimizer.
+
+    Args:
+        player_cards (List[Dict]): Player cards in JSON format.
+
+    Returns:
+        Tuple: Hashable key, equal for collections giving the same decks.
+    """
+    return tuple(
+        [
+            (c["name"], c["level"], c["maxLevel"], c.get("elixirCost"))
+            for c in player_cards
+        ]
+    )
+
+
+def war_fingerprint(river_race_log: Dict, curr_river_race: Dict) -> Tuple:
+    """Fingerprint of the fields read by WarIndex.
+
+    Finished races don't change, so they are identified by their season, section
+    and creation date instead of their standings.
+
+    Args:
+        river_race_log (Dict): Clan river race log data in JSON format.
+        curr_river_race (Dict): Clan current river race data in JSON format.
+
+    Returns:
+        Tuple: Hashable key, equal for payloads giving the same index.
+    """
+    clan = curr_river_race["clan"]
+    return (
+        clan["tag"],
+        tuple(
+            [
+                (
+                    race.get("seasonId"),
+                    race.get("sectionIndex"),
+                    race.get("createdDate"),
+                )
+                for race in river_race_log["items"]
+            ]
+        ),
+        tuple([(p["tag"], p["fame"], p["repairPoints"]) for p in clan["participants"]]),
+    )
+
+
+class StatsMemo:
+    """LRU cache of derived stats, keyed by a fingerprint of their input payloads.
+
+    Recomputing the stats of an unchanged response, e.g. when a player window is
+    reopened or the clan is refreshed, returns the stats computed the first time.
+    The cached values are shared between callers, so they must not be modified.
+
+    Args:
+        max_entries (int): Maximum number of cached values. Defaults to 256.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple[str, Hashable], Any]" = OrderedDict()
+        self.lock = threading.Lock()
+        # Hits and misses of each kind of stats
+        self.counters: Dict[str, Dict[str, int]] = {}
+        self.evictions = 0
+
+    def get(
+        self, name: str, fingerprint: Hashable, compute: Callable[[], Any]
+    ) -> Tuple[Any, bool]:
+        """Get cached stats, computing and storing them if needed.
+
+        Args:
+            name (str): Kind of stats, e.g. "cards_stats".
+            fingerprint (Hashable): Key of the input payloads, see
+                cards_fingerprint and war_fingerprint.
+            compute (Callable): Function computing the stats.
+
+        Returns:
+            Tuple[Any, bool]: Stats, and whether they were cached.
+        """
+        key = (name, fingerprint)
+        with self.lock:
+            counters = self.counters.setdefault(name, {"hits": 0, "misses": 0})
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                counters["hits"] += 1
+                return self.entries[key], True
+            counters["misses"] += 1
+        # Computed without the lock, two threads may compute the same stats
+        value = compute()
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return value, False
+
+    def clear(self):
+        """Remove every cached value."""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Entries, evictions, and hits, misses and hit rate of each kind of stats."""
+        with self.lock:
+            stats: Dict[str, Any] = {
+                "entries": len(self.entries),
+                "evictions": self.evictions,
+            }
+            for name, counters in self.counters.items():
+                total = counters["hits"] + counters["misses"]
+                stats[name] = dict(
+                    counters, hit_rate=counters["hits"] / total if total else 0.0
+                )
+        return stats
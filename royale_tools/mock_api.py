@@ -0,0 +1,457 @@
+import json
+import math
+import os
+import random
+import re
+import ssl
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import quote, unquote, urlparse
+
+from royale_tools.cache import ResponseCache
+
+RARITIES = ((13, "Common", 30), (11, "Rare", 28), (8, "Epic", 24), (5, "Legendary", 18))
+CHESTS = ("Silver Chest", "Golden Chest", "Giant Chest", "Magical Chest", "Epic Chest")
+
+
+class SyntheticData:
+    """Deterministic synthetic Clash Royale API payloads.
+
+    Every payload only depends on the requested tag and the generator settings,
+    so repeated requests return the same data.
+
+    Args:
+        n_members (int): Members per clan. Defaults to 50.
+        n_races (int): River races in each clan log. Defaults to 10.
+        n_clans (int): Clans competing in each river race. Defaults to 5.
+    """
+
+    def __init__(self, n_members: int = 50, n_races: int = 10, n_clans: int = 5):
+        self.n_members = n_members
+        self.n_races = n_races
+        self.n_clans = n_clans
+        self.catalogue = [
+            {
+                "name": f"{name} {i}",
+                "id": 26000000 + 100 * max_lvl + i,
+                "maxLevel": max_lvl,
+                "elixirCost": 1 + 3 * i % 7,
+            }
+            for max_lvl, name, n_cards in RARITIES
+            for i in range(n_cards)
+        ]
+
+    @staticmethod
+    def rng(*keys: Any) -> random.Random:
+        """Random generator seeded with the given keys."""
+        return random.Random(zlib.crc32("|".join(map(str, keys)).encode()))
+
+    def member_tags(self, clan_tag: str) -> List[str]:
+        """Member tags of a clan."""
+        return [f"{clan_tag}P{i:02d}" for i in range(self.n_members)]
+
+    @staticmethod
+    def clan_of(player_tag: str) -> Optional[str]:
+        """Clan tag of a player, None if the player has no clan."""
+        match = re.fullmatch(r"(#.+)P\d{2}", player_tag)
+        return match.group(1) if match else None
+
+    def cards(self) -> Dict:
+        """Cards catalogue."""
+        return {"items": self.catalogue, "paging": {"cursors": {}}}
+
+    def player(self, tag: str) -> Dict:
+        """Player profile."""
+        rng = self.rng("player", tag)
+        owned = [c for c in self.catalogue if rng.random() < 0.9]
+        cards = []
+        for card in owned:
+            level = rng.randint(1, card["maxLevel"])
+            cards.append(dict(card, level=level, count=rng.randint(0, 500)))
+        wins, losses = rng.randint(0, 5000), rng.randint(0, 5000)
+        season = {"trophies": rng.randint(4000, 7000)}
+        data = {
+            "tag": tag,
+            "name": f"Player {tag}",
+            "expLevel": rng.randint(1, 14),
+            "trophies": season["trophies"],
+            "wins": wins,
+            "losses": losses,
+            "warDayWins": rng.randint(0, 300),
+            "challengeMaxWins": rng.randint(0, 20),
+            "role": rng.choice(("member", "elder", "coLeader")),
+            "donations": rng.randint(0, 500),
+            "donationsReceived": rng.randint(0, 500),
+            "arena": {"id": 54000012, "name": "Legendary Arena"},
+            "leagueStatistics": {
+                "currentSeason": dict(season, bestTrophies=season["trophies"] + 50),
+                "previousSeason": dict(season, bestTrophies=season["trophies"] + 80),
+                "bestSeason": {"trophies": season["trophies"] + 100},
+            },
+            "cards": cards,
+            "currentFavouriteCard": owned[0] if owned else self.catalogue[0],
+        }
+        clan_tag = self.clan_of(tag)
+        if clan_tag:
+            data["clan"] = {"tag": clan_tag, "name": f"Clan {clan_tag}"}
+        return data
+
+    def upcoming_chests(self, tag: str) -> Dict:
+        """Upcoming chests of a player."""
+        rng = self.rng("chests", tag)
+        return {"items": [{"index": i, "name": rng.choice(CHESTS)} for i in range(9)]}
+
+    def clan(self, tag: str) -> Dict:
+        """Clan profile including its member list."""
+        members = self.members(tag)["items"]
+        return {
+            "tag": tag,
+            "name": f"Clan {tag}",
+            "members": len(members),
+            "memberList": members,
+        }
+
+    def members(self, tag: str) -> Dict:
+        """Clan member list."""
+        items = []
+        for i, member_tag in enumerate(self.member_tags(tag)):
+            items.append(
+                {
+                    "tag": member_tag,
+                    "name": f"Player {member_tag}",
+                    "role": "member",
+                    "clanRank": i + 1,
+                }
+            )
+        return {"items": items, "paging": {"cursors": {}}}
+
+    def standing(self, clan_tag: str, *keys: Any) -> Dict:
+        """River race results of a clan."""
+        participants = []
+        for player_tag in self.member_tags(clan_tag):
+            rng = self.rng("race", player_tag, *keys)
+            participants.append(
+                {
+                    "tag": player_tag,
+                    "name": f"Player {player_tag}",
+                    "fame": rng.randint(0, 40) * 100,
+                    "repairPoints": rng.randint(0, 10) * 100,
+                    "boatAttacks": rng.randint(0, 4),
+                    "decksUsed": rng.randint(0, 16),
+                }
+            )
+        return {
+            "tag": clan_tag,
+            "name": f"Clan {clan_tag}",
+            "fame": sum(p["fame"] for p in participants),
+            "repairPoints": sum(p["repairPoints"] for p in participants),
+            "participants": participants,
+        }
+
+    def rivals(self, tag: str) -> List[str]:
+        """Clans competing against a clan, the clan itself included."""
+        return [tag] + [f"{tag}R{i}" for i in range(1, self.n_clans)]
+
+    def river_race_log(self, tag: str) -> Dict:
+        """River race log of a clan, newest race first."""
+        items = []
+        for i in range(self.n_races):
+            season, section = 100 - i // 4, 3 - i % 4
+            created = datetime(2021, 1, 4, 10) - timedelta(weeks=i)
+            standings = [
+                {
+                    "rank": rank + 1,
+                    "trophyChange": 20 - 10 * rank,
+                    "clan": self.standing(clan, season, section),
+                }
+                for rank, clan in enumerate(self.rivals(tag))
+            ]
+            items.append(
+                {
+                    "seasonId": season,
+                    "sectionIndex": section,
+                    "createdDate": created.strftime("%Y%m%dT%H%M%S.000Z"),
+                    "standings": standings,
+                }
+            )
+        return {"items": items, "paging": {"cursors": {}}}
+
+    def current_river_race(self, tag: str) -> Dict:
+        """Current river race of a clan."""
+        clans = [self.standing(clan, "current") for clan in self.rivals(tag)]
+        return {
+            "state": "full",
+            "clan": clans[0],
+            "clans": clans,
+            "sectionIndex": 0,
+            "periodIndex": 3,
+            "periodType": "training",
+        }
+
+    def route(self, path: str) -> Tuple[int, Dict]:
+        """Resolve an API path into a status code and a payload."""
+        parts = [unquote(p) for p in urlparse(path).path.split("/") if p]
+        if parts and parts[0] == "v1":
+            parts = parts[1:]
+        if parts == ["cards"]:
+            return 200, self.cards()
+        if len(parts) in (2, 3) and parts[0] == "players":
+            query = parts[2] if len(parts) == 3 else ""
+            if query == "":
+                return 200, self.player(parts[1])
+            if query == "upcomingchests":
+                return 200, self.upcoming_chests(parts[1])
+        if len(parts) in (2, 3) and parts[0] == "clans":
+            query = parts[2] if len(parts) == 3 else ""
+            handlers = {
+                "": self.clan,
+                "members": self.members,
+                "riverracelog": self.river_race_log,
+                "currentriverrace": self.current_river_race,
+            }
+            if query in handlers:
+                return 200, handlers[query](parts[1])
+        return 404, {"reason": "notFound"}
+
+
+class RecordedData:
+    """Clash Royale API payloads recorded from real responses.
+
+    Each response is a JSON file in a directory, named after its quoted path.
+    It has the same route method as SyntheticData, so it can be served by
+    MockApi.
+
+    Args:
+        directory (str): Directory with the recorded responses.
+        fallback (SyntheticData): Generator for the paths that weren't recorded.
+            Defaults to None (404 responses).
+    """
+
+    def __init__(self, directory: str, fallback: Optional[SyntheticData] = None):
+        self.directory = directory
+        self.fallback = fallback
+
+    @staticmethod
+    def file_name(path: str) -> str:
+        """File name of a recorded path, e.g. "clans%2F%23ABC%2Fmembers.json"."""
+        path = urlparse(path.replace("#", "%23")).path
+        parts = [unquote(p) for p in path.split("/") if p]
+        if parts and parts[0] == "v1":
+            parts = parts[1:]
+        return quote("/".join(parts), safe="") + ".json"
+
+    def route(self, path: str) -> Tuple[int, Dict]:
+        """Resolve an API path into a status code and a payload."""
+        try:
+            with open(os.path.join(self.directory, self.file_name(path)), "r") as f:
+                return 200, json.load(f)
+        except FileNotFoundError:
+            if self.fallback is not None:
+                return self.fallback.route(path)
+            return 404, {"reason": "notFound"}
+
+    @staticmethod
+    def record(directory: str, paths: Iterable[str]):
+        """Record responses of the API set in RoyaleApi.
+
+        Args:
+            directory (str): Directory to save the responses to.
+            paths (Iterable[str]): API paths, e.g. "/players/#ABC" or "/cards".
+
+        Raises:
+            ApiError: If any of the requests fails.
+        """
+        from royale_tools.api import RoyaleApi
+
+        os.makedirs(directory, exist_ok=True)
+        for path in paths:
+            url = f"{RoyaleApi.base_url}/{quote(path.strip('/'), safe='/')}"
+            data = RoyaleApi.get_request(url)
+            with open(os.path.join(directory, RecordedData.file_name(path)), "w") as f:
+                json.dump(data, f)
+
+
+Latency = Union[float, Dict[str, float]]
+
+
+def endpoint_latency(latency: Latency, path: str) -> float:
+    """Seconds to wait before answering a path.
+
+    Args:
+        latency (Union[float, Dict[str, float]]): Latency of every endpoint, or
+            of each endpoint name, e.g. "riverracelog", see ResponseCache.endpoint.
+        path (str): API path.
+
+    Returns:
+        float: Latency in seconds.
+    """
+    if isinstance(latency, dict):
+        return latency.get(ResponseCache.endpoint(path), 0.0)
+    return latency
+
+
+class MockApi:
+    """Local stand-in server for api.clashroyale.com.
+
+    Use it as a context manager and point RoyaleApi.base_url to base_url.
+
+    Args:
+        data (Union[SyntheticData, RecordedData]): Payloads to serve. Defaults
+            to SyntheticData().
+        port (int): Port to listen on, 0 picks a free one. Defaults to 0.
+        certfile (str): PEM file with certificate and key to serve HTTPS.
+            Defaults to None (plain HTTP).
+        latency (Union[float, Dict[str, float]]): Seconds waited before each
+            response, for every endpoint or by endpoint name, e.g.
+            {"players": 0.1, "riverracelog": 0.3}. Defaults to 0.
+        rate_limit (float): Requests per second allowed for each API token,
+            with bursts of the same size. Throttled requests get a 429 response
+            with Retry-After. Defaults to None (unlimited).
+    """
+
+    def __init__(
+        self,
+        data: Optional[Union[SyntheticData, RecordedData]] = None,
+        port: int = 0,
+        certfile: Optional[str] = None,
+        latency: Latency = 0.0,
+        rate_limit: Optional[float] = None,
+    ):
+        self.data = data or SyntheticData()
+        self.latency = latency
+        self.rate_limit = rate_limit
+        # Available requests and last refill time of each API token
+        self.buckets: Dict[str, Tuple[float, float]] = {}
+        self.n_requests = 0
+        self.n_connections = 0
+        self.n_throttled = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self.handler())
+        self.server.daemon_threads = True
+        self.scheme = "http"
+        if certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile)
+            self.server.socket = context.wrap_socket(
+                self.server.socket, server_side=True
+            )
+            self.scheme = "https"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to use instead of the official API."""
+        host, port = self.server.server_address[:2]
+        return f"{self.scheme}://{host}:{port}/v1"
+
+    def throttle(self, token: str = "") -> float:
+        """Take a request from the rate limit of an API token.
+
+        Args:
+            token (str): API token, e.g. the Authorization header. Defaults to "".
+
+        Returns:
+            float: 0 if the request is allowed, otherwise seconds to wait.
+        """
+        if not self.rate_limit:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            level, updated = self.buckets.get(token, (self.rate_limit, now))
+            level = min(self.rate_limit, level + (now - updated) * self.rate_limit)
+            if level >= 1:
+                self.buckets[token] = (level - 1, now)
+                return 0.0
+            self.buckets[token] = (level, now)
+            self.n_throttled += 1
+            return (1 - level) / self.rate_limit
+
+    def handler(self) -> type:
+        """Request handler class bound to this server."""
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with api.lock:
+                    api.n_connections += 1
+
+            def do_GET(self):
+                with api.lock:
+                    api.n_requests += 1
+                time.sleep(endpoint_latency(api.latency, self.path))
+                retry_after = api.throttle(self.headers.get("Authorization", ""))
+                if retry_after:
+                    status, payload = 429, {"reason": "requestThrottled"}
+                else:
+                    status, payload = api.data.route(self.path)
+                body = json.dumps(payload).encode()
+                etag = f'"{zlib.crc32(body):08x}"'
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    status, body = 304, b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                if retry_after:
+                    self.send_header("Retry-After", str(math.ceil(retry_after)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: Any):
+                pass
+
+        return Handler
+
+    def start(self) -> "MockApi":
+        """Start serving in a background thread."""
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server."""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "MockApi":
+        return self.start()
+
+    def __exit__(self, *args: Any):
+        self.stop()
+
+
+def aiohttp_app(
+    data: Optional[Union[SyntheticData, RecordedData]] = None, latency: Latency = 0.0
+):
+    """Local stand-in for api.clashroyale.com as an aiohttp application.
+
+    Args:
+        data (Union[SyntheticData, RecordedData]): Payloads to serve. Defaults
+            to SyntheticData().
+        latency (Union[float, Dict[str, float]]): Seconds waited before each
+            response, see MockApi. Defaults to 0.
+
+    Returns:
+        aiohttp.web.Application: Application to serve with aiohttp.
+    """
+    import asyncio
+
+    from aiohttp import web
+
+    data = data or SyntheticData()
+
+    async def handler(request: web.Request) -> web.Response:
+        await asyncio.sleep(endpoint_latency(latency, request.raw_path))
+        status, payload = data.route(request.raw_path)  # type: ignore
+        return web.json_response(payload, status=status)
+
+    app = web.Application()
+    app.router.add_get("/{path:.*}", handler)
+    return app
@@ -0,0 +1,262 @@
+import functools
+import json
+import sys
+from array import array
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+
+@functools.lru_cache(maxsize=None)
+def json_parser() -> Callable[[Union[bytes, str]], Any]:
+    """JSON parser, orjson if it is installed. It is imported when first used."""
+    try:
+        import orjson
+    except ImportError:
+        return json.loads
+    return orjson.loads
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse a JSON response, with orjson if it is installed."""
+    return json_parser()(data)
+
+
+class Card:
+    """Card of a player collection.
+
+    Args:
+        name (str): Card name.
+        level (int): Current level.
+        max_level (int): Maximum level of the card rarity.
+        count (int): Cards collected for the next upgrade.
+    """
+
+    __slots__ = ("name", "level", "max_level", "count")
+
+    def __init__(self, name: str, level: int, max_level: int, count: int):
+        self.name = name
+        self.level = level
+        self.max_level = max_level
+        self.count = count
+
+    def __repr__(self) -> str:
+        return f"Card({self.name!r}, {self.level}, {self.max_level}, {self.count})"
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Card) and all(
+            getattr(self, key) == getattr(other, key) for key in self.__slots__
+        )
+
+
+class Player:
+    """Player profile with the card collection stored in columns.
+
+    Card names are interned, so they are shared by every player, and levels and
+    counts are kept in compact arrays instead of a dict per card.
+    """
+
+    __slots__ = (
+        "tag",
+        "name",
+        "trophies",
+        "wins",
+        "losses",
+        "role",
+        "clan_tag",
+        "card_names",
+        "levels",
+        "max_levels",
+        "counts",
+    )
+
+    def __init__(
+        self,
+        tag: str,
+        name: str,
+        trophies: int,
+        wins: int,
+        losses: int,
+        role: str = "",
+        clan_tag: Optional[str] = None,
+        card_names: Tuple[str, ...] = (),
+        levels: Optional[array] = None,
+        max_levels: Optional[array] = None,
+        counts: Optional[array] = None,
+    ):
+        self.tag = tag
+        self.name = name
+        self.trophies = trophies
+        self.wins = wins
+        self.losses = losses
+        self.role = role
+        self.clan_tag = clan_tag
+        self.card_names = card_names
+        self.levels = levels if levels is not None else array("b")
+        self.max_levels = max_levels if max_levels is not None else array("b")
+        self.counts = counts if counts is not None else array("i")
+
+    @classmethod
+    def from_json(cls, player_data: Dict) -> "Player":
+        """Create a player from its data in JSON format."""
+        cards = player_data.get("cards", [])
+        return cls(
+            player_data["tag"],
+            player_data["name"],
+            player_data["trophies"],
+            player_data["wins"],
+            player_data["losses"],
+            player_data.get("role", ""),
+            player_data["clan"]["tag"] if "clan" in player_data else None,
+            tuple(sys.intern(card["name"]) for card in cards),
+            array("b", [card["level"] for card in cards]),
+            array("b", [card["maxLevel"] for card in cards]),
+            array("i", [card["count"] for card in cards]),
+        )
+
+    @classmethod
+    def from_bytes(cls, content: Union[bytes, str]) -> "Player":
+        """Create a player straight from the response body."""
+        return cls.from_json(loads(content))
+
+    def cards(self) -> Iterator[Card]:
+        """Cards of the collection."""
+        for card in zip(self.card_names, self.levels, self.max_levels, self.counts):
+            yield Card(*card)
+
+    def card_dicts(self) -> List[Dict]:
+        """Cards in JSON format, e.g. for RoyaleApi.get_cards_stats."""
+        return [
+            {"name": name, "level": level, "maxLevel": max_level, "count": count}
+            for name, level, max_level, count in zip(
+                self.card_names, self.levels, self.max_levels, self.counts
+            )
+        ]
+
+
+class Participant:
+    """Results of a player in a river race.
+
+    Args:
+        tag (str): Player tag.
+        fame (int): Fame points.
+        repair_points (int): Repair points.
+    """
+
+    __slots__ = ("tag", "fame", "repair_points")
+
+    def __init__(self, tag: str, fame: int, repair_points: int):
+        self.tag = tag
+        self.fame = fame
+        self.repair_points = repair_points
+
+    @property
+    def war_points(self) -> int:
+        """Fame and repair points."""
+        return self.fame + self.repair_points
+
+    def __repr__(self) -> str:
+        return f"Participant({self.tag!r}, {self.fame}, {self.repair_points})"
+
+
+class RiverRace:
+    """Results of the participants of a clan in a river race, stored in columns.
+
+    Args:
+        clan_tag (str): Clan tag.
+        season_id (int): Season ID, None for the current race.
+        section_index (int): Section index.
+        created_date (str): Date of the race, None for the current race.
+        tags (Tuple[str, ...]): Participant tags.
+        fame (array): Fame points of each participant.
+        repair_points (array): Repair points of each participant.
+    """
+
+    __slots__ = (
+        "clan_tag",
+        "season_id",
+        "section_index",
+        "created_date",
+        "tags",
+        "fame",
+        "repair_points",
+    )
+
+    def __init__(
+        self,
+        clan_tag: str,
+        season_id: Optional[int],
+        section_index: int,
+        created_date: Optional[str],
+        tags: Tuple[str, ...],
+        fame: array,
+        repair_points: array,
+    ):
+        self.clan_tag = clan_tag
+        self.season_id = season_id
+        self.section_index = section_index
+        self.created_date = created_date
+        self.tags = tags
+        self.fame = fame
+        self.repair_points = repair_points
+
+    @staticmethod
+    def columns(participants: List[Dict]) -> Tuple[Tuple[str, ...], array, array]:
+        """Tag, fame and repair points columns of a participants list."""
+        return (
+            tuple(sys.intern(p["tag"]) for p in participants),
+            array("i", [p["fame"] for p in participants]),
+            array("i", [p["repairPoints"] for p in participants]),
+        )
+
+    @classmethod
+    def from_log(cls, river_race_log: Dict, clan_tag: str) -> List["RiverRace"]:
+        """Races of a clan from its river race log, newest race first.
+
+        Args:
+            river_race_log (Dict): Clan river race log data in JSON format.
+            clan_tag (str): Clan tag, only its standings are kept.
+
+        Returns:
+            List[RiverRace]: Races of the log.
+        """
+        races = []
+        for race in river_race_log["items"]:
+            for standing in race["standings"]:
+                if standing["clan"]["tag"] == clan_tag:
+                    races.append(
+                        cls(
+                            clan_tag,
+                            race["seasonId"],
+                            race["sectionIndex"],
+                            race["createdDate"],
+                            *cls.columns(standing["clan"]["participants"]),
+                        )
+                    )
+                    break
+        return races
+
+    @classmethod
+    def from_current(cls, curr_river_race: Dict) -> "RiverRace":
+        """Current race of a clan.
+
+        Args:
+            curr_river_race (Dict): Clan current river race data in JSON format.
+
+        Returns:
+            RiverRace: Current race, without season ID and date.
+        """
+        clan = curr_river_race["clan"]
+        return cls(
+            clan["tag"],
+            None,
+            curr_river_race["sectionIndex"],
+            None,
+            *cls.columns(clan["participants"]),
+        )
+
+    def participants(self) -> Iterator[Participant]:
+        """Participants of the race."""
+        for participant in zip(self.tags, self.fame, self.repair_points):
+            yield Participant(*participant)
+
+    def __len__(self) -> int:
+        return len(self.tags)
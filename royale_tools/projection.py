@@ -0,0 +1,223 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from royale_tools.api import RoyaleApi
+from royale_tools.economy import batch_cards_stats
+from royale_tools.war import WarIndex
+
+# Days of a river race week
+WEEK_DAYS = 7
+
+
+class WarProjection:
+    """War points projection of every member of a clan.
+
+    The daily war points of a player go from the sum of the levels of their best
+    32 cards, when every battle is lost, to twice that sum, when every battle is
+    won, and the expected value is weighted by the winrate. The weekly values
+    are 7 times the daily ones. The forecast of a week is the average war points
+    of the finished races, or the expected value without war history.
+
+    Everything is computed with NumPy for the whole clan at once, so it can be
+    recomputed on every poll. Without NumPy, the same values are computed one
+    player at a time.
+
+    Args:
+        tags (Sequence[str]): Member tags.
+        best_32 (Sequence[Sequence[int]]): Best 32 card levels of each member,
+            see RoyaleApi.get_cards_stats.
+        winrates (Sequence[float]): Winrate of each member, from 0 to 1. Values
+            out of range, like the -1 of RoyaleApi.get_winrate without battles,
+            are clipped.
+        war_points (Sequence[Sequence[float]]): War points of each finished race
+            of each member. Defaults to None (no war history).
+    """
+
+    FIELDS = (
+        "min_daily",
+        "max_daily",
+        "expected_daily",
+        "min_weekly",
+        "max_weekly",
+        "expected_weekly",
+        "races",
+        "avg_war_points",
+        "forecast",
+    )
+
+    def __init__(
+        self,
+        tags: Sequence[str],
+        best_32: Sequence[Sequence[int]],
+        winrates: Sequence[float],
+        war_points: Optional[Sequence[Sequence[float]]] = None,
+    ):
+        self.tags = list(tags)
+        if war_points is None:
+            war_points = [()] * len(self.tags)
+        self.index = {tag: i for i, tag in enumerate(self.tags)}
+        try:
+            self.columns = self.compute_numpy(best_32, winrates, war_points)
+        except ImportError:
+            self.columns = self.compute_python(best_32, winrates, war_points)
+        self.ranks = {tag: rank for rank, (tag, _) in enumerate(self.ranking(), 1)}
+
+    @staticmethod
+    def compute_numpy(
+        best_32: Sequence[Sequence[int]],
+        winrates: Sequence[float],
+        war_points: Sequence[Sequence[float]],
+    ) -> Dict[str, List]:
+        """Projection columns computed with NumPy."""
+        import numpy as np
+
+        n = len(best_32)
+        base = np.fromiter(map(sum, best_32), dtype=np.int64, count=n)
+        winrate = np.clip(np.fromiter(winrates, dtype=np.float64, count=n), 0.0, 1.0)
+        expected = base * (1.0 + winrate)
+        races = np.fromiter(map(len, war_points), dtype=np.int64, count=n)
+        totals = np.fromiter(map(sum, war_points), dtype=np.float64, count=n)
+        avg = np.divide(totals, races, out=np.zeros(n), where=races > 0)
+        forecast = np.where(races > 0, avg, WEEK_DAYS * expected)
+        return {
+            "min_daily": base.tolist(),
+            "max_daily": (2 * base).tolist(),
+            "expected_daily": expected.tolist(),
+            "min_weekly": (WEEK_DAYS * base).tolist(),
+            "max_weekly": (2 * WEEK_DAYS * base).tolist(),
+            "expected_weekly": (WEEK_DAYS * expected).tolist(),
+            "races": races.tolist(),
+            "avg_war_points": avg.tolist(),
+            "forecast": forecast.tolist(),
+        }
+
+    @staticmethod
+    def compute_python(
+        best_32: Sequence[Sequence[int]],
+        winrates: Sequence[float],
+        war_points: Sequence[Sequence[float]],
+    ) -> Dict[str, List]:
+        """Projection columns computed one player at a time."""
+        columns: Dict[str, List] = {field: [] for field in WarProjection.FIELDS}
+        for best, winrate, points in zip(best_32, winrates, war_points):
+            base = sum(best)
+            expected = base * (1.0 + min(max(winrate, 0.0), 1.0))
+            avg = sum(points) / len(points) if points else 0.0
+            values = (
+                base,
+                2 * base,
+                expected,
+                WEEK_DAYS * base,
+                2 * WEEK_DAYS * base,
+                WEEK_DAYS * expected,
+                len(points),
+                avg,
+                avg if points else WEEK_DAYS * expected,
+            )
+            for field, value in zip(WarProjection.FIELDS, values):
+                columns[field].append(value)
+        return columns
+
+    @classmethod
+    def from_members(
+        cls,
+        players_data: Sequence[Dict],
+        all_cards: Dict,
+        war_index: Optional[WarIndex] = None,
+    ) -> "WarProjection":
+        """Create the projection of a clan from the data of its members.
+
+        Args:
+            players_data (Sequence[Dict]): Player data of each member in JSON
+                format.
+            all_cards (Dict): Cards catalogue in JSON format.
+            war_index (WarIndex): War stats of the clan. Defaults to None.
+
+        Returns:
+            WarProjection: Projection of the members.
+        """
+        cards = batch_cards_stats([p["cards"] for p in players_data], all_cards)
+        winrates = [
+            RoyaleApi.get_winrate(p["losses"], p["wins"]) / 100.0 for p in players_data
+        ]
+        war_points = [
+            war_index.get(p["tag"])["war_points"] if war_index else ()
+            for p in players_data
+        ]
+        return cls(
+            [p["tag"] for p in players_data],
+            [stats["best_32"] for stats in cards],
+            winrates,
+            war_points,
+        )
+
+    def get(self, player_tag: str) -> Dict:
+        """Get the projection of a member.
+
+        Args:
+            player_tag (str): Player tag.
+
+        Raises:
+            KeyError: If the player isn't a member.
+
+        Returns:
+            Dict: Values of FIELDS and the rank of the member.
+        """
+        row = self.index[player_tag]
+        projection = {field: self.columns[field][row] for field in self.FIELDS}
+        projection["rank"] = self.ranks[player_tag]
+        return projection
+
+    def ranking(self) -> List[Tuple[str, float]]:
+        """Member tags and forecasts, best forecast first."""
+        return sorted(
+            zip(self.tags, self.columns["forecast"]), key=lambda x: x[1], reverse=True
+        )
+
+    def daily_total(self) -> float:
+        """Expected daily war points of the whole clan."""
+        return float(sum(self.columns["expected_daily"]))
+
+    def finish(self, curr_river_race: Dict) -> List[Dict]:
+        """Project the end of the current river race.
+
+        The clan gets the expected daily war points of its members for each
+        remaining day, and the rival clans keep their current pace.
+
+        Args:
+            curr_river_race (Dict): Full clan current river race data in JSON
+                format, with the "clans" standings, not its own variant.
+
+        Raises:
+            ValueError: If the data has no "clans" standings.
+
+        Returns:
+            List[Dict]: Tag, name, current fame and projected fame of each clan,
+                with its projected rank, best first.
+        """
+        if "clans" not in curr_river_race:
+            raise ValueError("The finish needs the standings of the rival clans")
+        days = curr_river_race.get("periodIndex", 0) % WEEK_DAYS
+        days_left = WEEK_DAYS - days
+        own_tag = curr_river_race["clan"]["tag"]
+        results = []
+        for clan in curr_river_race["clans"]:
+            fame = clan["fame"]
+            if clan["tag"] == own_tag:
+                projected = fame + days_left * self.daily_total()
+            else:
+                projected = fame + days_left * (fame / days if days else 0.0)
+            results.append(
+                {
+                    "tag": clan["tag"],
+                    "name": clan.get("name", ""),
+                    "fame": fame,
+                    "projected": projected,
+                }
+            )
+        results.sort(key=lambda clan: clan["projected"], reverse=True)
+        for rank, clan in enumerate(results, 1):
+            clan["rank"] = rank
+        return results
+
+    def __len__(self) -> int:
+        return len(self.tags)
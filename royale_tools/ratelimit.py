@@ -0,0 +1,76 @@
+import multiprocessing
+import time
+from typing import Any, List, Optional, Sequence, Tuple
+
+
+class RateLimiter:
+    """Token bucket rate limiter shared by threads and processes.
+
+    Each API token has its own bucket, refilled at rate requests per second up
+    to burst requests. The buckets are kept in shared memory, so the limiter
+    can be given to worker processes when they are created, e.g. in the
+    initargs of a process pool, and every process draws from the same quotas.
+
+    Args:
+        tokens (Sequence[str]): API tokens, each one with its own quota.
+        rate (float): Requests per second allowed for each token.
+        burst (int): Maximum requests sent at once with a token. Defaults to
+            rate, rounded up.
+        context (Any): Multiprocessing context creating the shared memory.
+            Defaults to the default context.
+    """
+
+    def __init__(
+        self,
+        tokens: Sequence[str],
+        rate: float,
+        burst: Optional[int] = None,
+        context: Optional[Any] = None,
+    ):
+        if not tokens:
+            raise ValueError("At least one API token is required")
+        self.tokens: List[str] = list(tokens)
+        self.rate = rate
+        self.burst = burst or max(1, int(rate + 0.999))
+        context = context or multiprocessing.get_context()
+        now = time.monotonic()
+        # Available requests and last refill time of each token, both guarded
+        # by the lock of the first array
+        self.levels = context.Array("d", [float(self.burst)] * len(self.tokens))
+        self.updated = context.Array("d", [now] * len(self.tokens), lock=False)
+
+    def try_acquire(self) -> Tuple[Optional[str], float]:
+        """Take a request from the token with the most available requests.
+
+        Returns:
+            Tuple[Optional[str], float]: API token and 0 if the request is
+                allowed, otherwise None and the seconds to wait for the next one.
+        """
+        with self.levels.get_lock():
+            now = time.monotonic()
+            best, best_level = 0, -1.0
+            for index in range(len(self.tokens)):
+                level = min(
+                    self.burst,
+                    self.levels[index] + (now - self.updated[index]) * self.rate,
+                )
+                self.levels[index] = level
+                self.updated[index] = now
+                if level > best_level:
+                    best, best_level = index, level
+            if best_level >= 1:
+                self.levels[best] = best_level - 1
+                return self.tokens[best], 0.0
+            return None, (1 - best_level) / self.rate
+
+    def acquire(self) -> str:
+        """Wait until a request is allowed with any of the tokens.
+
+        Returns:
+            str: API token to send the request with.
+        """
+        while True:
+            token, wait = self.try_acquire()
+            if token is not None:
+                return token
+            time.sleep(wait)
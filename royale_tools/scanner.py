@@ -0,0 +1,145 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from royale_tools.api import HTTP_SETTINGS, RoyaleApi
+from royale_tools.clan import scan_clan
+from royale_tools.exceptions import ApiError
+from royale_tools.ratelimit import RateLimiter
+
+# Cards catalogue of a worker process, requested once
+worker_cards: Dict[str, Dict] = {}
+
+
+def init_worker(
+    settings: Dict,
+    token: str,
+    rate_limiter: Optional[RateLimiter],
+    source: Optional[Any] = None,
+):
+    """Set up the API client of a worker process.
+
+    Args:
+        settings (Dict): HTTP settings, see RoyaleApi.configure.
+        token (str): API token, used if there is no rate limiter.
+        rate_limiter (RateLimiter): Quota shared by every worker, if any.
+        source (Any): Offline data, see RoyaleApi.source. Defaults to None.
+    """
+    RoyaleApi.configure(**settings)
+    RoyaleApi.token = token
+    RoyaleApi.rate_limiter = rate_limiter
+    RoyaleApi.source = source
+
+
+def scan_chunk(clan_tags: Sequence[str], threads: int) -> List[Tuple]:
+    """Scan some clans in a worker process.
+
+    Args:
+        clan_tags (Sequence[str]): Clan tags.
+        threads (int): Maximum concurrent requests of the worker.
+
+    Returns:
+        List[Tuple]: Clan tag, member rows and error message of each clan. The
+            rows are None if the scan failed, the message is None otherwise.
+    """
+    results = []
+    for tag in clan_tags:
+        try:
+            # Requested again by the next clan if it failed
+            if "cards" not in worker_cards:
+                worker_cards["cards"] = RoyaleApi.get_cards()
+            results.append((tag, scan_clan(tag, worker_cards["cards"], threads), None))
+        except ApiError as e:
+            results.append((tag, None, str(e)))
+    return results
+
+
+def rank_rows(rows: List[Dict], key: str) -> List[Dict]:
+    """Sort leaderboard rows by a column, best first, and number them.
+
+    Args:
+        rows (List[Dict]): Member rows of every clan.
+        key (str): Column key, see clan.COLUMNS.
+
+    Returns:
+        List[Dict]: Rows with their "rank".
+    """
+    ranked = sorted(rows, key=lambda row: row[key], reverse=True)
+    for rank, row in enumerate(ranked, 1):
+        row["rank"] = rank
+    return ranked
+
+
+def scan_leaderboard(
+    clan_tags: Sequence[str],
+    tokens: Sequence[str],
+    processes: Optional[int] = None,
+    threads: int = 8,
+    rate: Optional[float] = None,
+    burst: Optional[int] = None,
+    chunk_size: int = 1,
+    sort_key: str = "trophies",
+    on_clan: Optional[Callable[[str, Optional[str], int, int], None]] = None,
+) -> Tuple[List[Dict], Dict[str, str]]:
+    """Scan many clans with a pool of processes and rank all their members.
+
+    The clans are spread in chunks across the worker processes, so decoding the
+    responses and computing the stats run in parallel. Each worker sends the
+    requests of a clan from several threads. With a rate, every request of
+    every worker takes a request from the shared quota of one of the tokens.
+
+    The workers are started with the "spawn" method, so they don't inherit the
+    sessions, locks and threads of the calling process. They use the offline
+    source of the calling process, if any, but not its recorder.
+
+    Args:
+        clan_tags (Sequence[str]): Clan tags.
+        tokens (Sequence[str]): API tokens, each one with its own quota.
+        processes (int): Number of worker processes. Defaults to the number of
+            CPUs.
+        threads (int): Maximum concurrent requests of each worker. Defaults to 8.
+        rate (float): Requests per second allowed for each token. Defaults to
+            None (unlimited, only the first token is used).
+        burst (int): Maximum requests sent at once with a token, see
+            RateLimiter. Defaults to None.
+        chunk_size (int): Clans sent to a worker at once. Defaults to 1.
+        sort_key (str): Column ranking the members. Defaults to "trophies".
+        on_clan (Callable): Function called with the clan tag, its error message
+            if any, and the number of finished and total clans. Defaults to None.
+
+    Returns:
+        Tuple[List[Dict], Dict[str, str]]: Ranked member rows with their "clan"
+            and "rank", and the error message of each clan or member that
+            couldn't be scanned.
+    """
+    context = multiprocessing.get_context("spawn")
+    rate_limiter = RateLimiter(tokens, rate, burst, context) if rate else None
+    settings = {key: getattr(RoyaleApi, key) for key in HTTP_SETTINGS}
+    chunks: List[Sequence[str]] = []
+    for start in range(0, len(clan_tags), chunk_size):
+        end = start + chunk_size
+        chunks.append(clan_tags[start:end])
+    rows: List[Dict] = []
+    errors: Dict[str, str] = {}
+    n_done = 0
+    with ProcessPoolExecutor(
+        processes,
+        mp_context=context,
+        initializer=init_worker,
+        initargs=(settings, tokens[0], rate_limiter, RoyaleApi.source),
+    ) as pool:
+        futures = [pool.submit(scan_chunk, chunk, threads) for chunk in chunks]
+        for future in as_completed(futures):
+            for tag, clan_rows, error in future.result():
+                n_done += 1
+                if error is not None:
+                    errors[tag] = error
+                else:
+                    for row in clan_rows:
+                        if "error" in row:
+                            errors[row["tag"]] = row["error"]
+                        else:
+                            rows.append(dict(row, clan=tag))
+                if on_clan:
+                    on_clan(tag, error, n_done, len(clan_tags))
+    return rank_rows(rows, sort_key), errors
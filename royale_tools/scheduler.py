@@ -0,0 +1,286 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from royale_tools.api import RoyaleApi
+from royale_tools.exceptions import ApiError, RateLimitError
+
+# Base seconds between refreshes of each endpoint
+DEFAULT_INTERVALS = {
+    "cards": 6 * 3600.0,
+    "players": 300.0,
+    "upcomingchests": 600.0,
+    "members": 600.0,
+    "riverracelog": 1800.0,
+    "currentriverrace": 60.0,
+}
+# Interval factors after a refresh that changed or didn't change the data
+SPEEDUP = 0.5
+SLOWDOWN = 1.5
+# Bounds of the intervals, as factors of the base interval
+MIN_FACTOR = 0.25
+MAX_FACTOR = 4.0
+# Seconds to pause the refreshes after a throttled request, if not given
+THROTTLE_PAUSE = 10.0
+# Seconds to wait without jobs, adding one wakes the scheduler up
+IDLE_WAIT = 60.0
+
+
+class RefreshJob:
+    """Periodic refresh of an API response.
+
+    Args:
+        key (Tuple[str, str]): Endpoint and tag, e.g. ("upcomingchests", "#ABC").
+        fetch (Callable): Function getting the response.
+        interval (float): Base seconds between refreshes.
+    """
+
+    __slots__ = ("key", "fetch", "base", "interval", "owners", "data", "stats")
+
+    def __init__(
+        self, key: Tuple[str, str], fetch: Callable[[], Dict], interval: float
+    ):
+        self.key = key
+        self.fetch = fetch
+        self.base = interval
+        self.interval = interval
+        # Watched tags the response is refreshed for
+        self.owners: Set[str] = set()
+        self.data: Optional[Dict] = None
+        self.stats = {"refreshes": 0, "changes": 0, "errors": 0}
+
+    def adapt(self, changed: bool):
+        """Refresh sooner after a change, and later otherwise."""
+        factor = SPEEDUP if changed else SLOWDOWN
+        self.interval = min(
+            max(self.interval * factor, MIN_FACTOR * self.base), MAX_FACTOR * self.base
+        )
+
+
+class RefreshScheduler:
+    """Keeps the responses of watched players and clans warm in the background.
+
+    Each endpoint of a watched tag is refreshed on its own cadence, from
+    DEFAULT_INTERVALS: the current river race often, the cards catalogue rarely.
+    The interval of a response halves when it changed since the previous
+    refresh, and grows by half when it didn't, within a quarter and four times
+    its base interval.
+
+    The refreshes are sent from a single thread through RoyaleApi.refreshing, so
+    they skip the fresh cached responses, revalidating them with their ETag if
+    possible, and store the new ones in the response cache until the next
+    refresh. Opening a watched player is then served from memory. The
+    refreshes are spaced by at least 1 / max_rate seconds to leave most of the
+    API quota to the user, and they pause when a request is throttled.
+
+    Args:
+        max_rate (float): Maximum background requests per second. Defaults to 1.
+        intervals (Dict[str, float]): Base interval in seconds of each endpoint,
+            it updates DEFAULT_INTERVALS. Defaults to None.
+        clock (Callable): Monotonic clock in seconds. Defaults to time.monotonic.
+    """
+
+    def __init__(
+        self,
+        max_rate: float = 1.0,
+        intervals: Optional[Dict[str, float]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_rate = max_rate
+        self.intervals = dict(DEFAULT_INTERVALS, **(intervals or {}))
+        self.clock = clock
+        self.jobs: Dict[Tuple[str, str], RefreshJob] = {}
+        # (due, sequence, job) of every job, entries of removed jobs are skipped
+        self.queue: List[Tuple[float, int, RefreshJob]] = []
+        self.sequence = itertools.count()
+        self.next_request = 0.0
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.wake = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def add(self, endpoint: str, tag: str, fetch: Callable[[], Dict], owner: str):
+        """Add a refresh job, or a watched tag to an existing one.
+
+        Args:
+            endpoint (str): Endpoint name, see DEFAULT_INTERVALS.
+            tag (str): Player or clan tag of the request, "" if none.
+            fetch (Callable): Function getting the response.
+            owner (str): Watched tag the response is refreshed for.
+        """
+        with self.lock:
+            job = self.jobs.get((endpoint, tag))
+            if job is None:
+                job = RefreshJob((endpoint, tag), fetch, self.intervals[endpoint])
+                self.jobs[job.key] = job
+                heapq.heappush(self.queue, (self.clock(), next(self.sequence), job))
+            job.owners.add(owner)
+        self.wake.set()
+
+    def watch_player(self, tag: str):
+        """Keep the data shown in the player screens warm.
+
+        The river races of the player's clan are added after the first refresh
+        of the player, if they are in a clan.
+
+        Args:
+            tag (str): Player tag.
+        """
+        tag = tag if tag.startswith("#") else f"#{tag}"
+        self.add("cards", "", RoyaleApi.get_cards, tag)
+        self.add(
+            "players",
+            tag,
+            lambda: self.player_refreshed(tag, RoyaleApi.get_player_data(tag)),
+            tag,
+        )
+        self.add(
+            "upcomingchests",
+            tag,
+            lambda: RoyaleApi.get_player_data(tag, "upcomingchests"),
+            tag,
+        )
+
+    def player_refreshed(self, tag: str, player_data: Dict) -> Dict:
+        """Watch the river races of the clan of a refreshed player."""
+        if "clan" in player_data:
+            self.watch_river_races(player_data["clan"]["tag"], tag)
+        return player_data
+
+    def watch_river_races(self, clan_tag: str, owner: str):
+        """Keep the clan's own river race standings warm."""
+        for query in ("riverracelog", "currentriverrace"):
+            self.add(
+                query,
+                clan_tag,
+                lambda query=query: RoyaleApi.get_clan_data(clan_tag, query, True),
+                owner,
+            )
+
+    def watch_clan(self, tag: str):
+        """Keep the clan data shown in the clan screen warm.
+
+        The members are refreshed when the clan screen is opened.
+
+        Args:
+            tag (str): Clan tag.
+        """
+        tag = tag if tag.startswith("#") else f"#{tag}"
+        self.add("cards", "", RoyaleApi.get_cards, tag)
+        self.add("members", tag, lambda: RoyaleApi.get_clan_data(tag, "members"), tag)
+        self.watch_river_races(tag, tag)
+
+    def unwatch(self, tag: str):
+        """Stop refreshing the responses only needed by a watched tag.
+
+        Args:
+            tag (str): Player or clan tag.
+        """
+        tag = tag if tag.startswith("#") else f"#{tag}"
+        with self.lock:
+            for key, job in list(self.jobs.items()):
+                job.owners.discard(tag)
+                if not job.owners:
+                    del self.jobs[key]
+
+    def run_pending(self) -> float:
+        """Refresh the most overdue response, if any and the rate allows it.
+
+        Returns:
+            float: Seconds to wait before the next call, 0 after a refresh.
+        """
+        now = self.clock()
+        with self.lock:
+            while self.queue:
+                job = self.queue[0][2]
+                if self.jobs.get(job.key) is job:
+                    break
+                heapq.heappop(self.queue)
+            if not self.queue:
+                return max(self.next_request - now, IDLE_WAIT)
+            due = max(self.queue[0][0], self.next_request)
+            if due > now:
+                return due - now
+            job = heapq.heappop(self.queue)[2]
+            self.next_request = now + 1.0 / self.max_rate
+        delay = self.refresh(job)
+        with self.lock:
+            if self.jobs.get(job.key) is job:
+                due = self.clock() + delay
+                heapq.heappush(self.queue, (due, next(self.sequence), job))
+        return 0.0
+
+    def refresh(self, job: RefreshJob) -> float:
+        """Refresh a response and adapt the interval of its job.
+
+        Args:
+            job (RefreshJob): Job to run.
+
+        Returns:
+            float: Seconds until the next refresh of the job.
+        """
+        try:
+            # Valid until the next refresh, with a margin for the queue delays
+            with RoyaleApi.refreshing(2 * SLOWDOWN * job.interval):
+                data = job.fetch()
+        except RateLimitError as e:
+            job.stats["errors"] += 1
+            pause = e.retry_after or THROTTLE_PAUSE
+            with self.lock:
+                self.next_request = max(self.next_request, self.clock() + pause)
+            return pause
+        except ApiError as e:
+            from loguru import logger
+
+            job.stats["errors"] += 1
+            logger.warning(f"Couldn't refresh {job.key}: {e}")
+            return job.interval
+        changed = job.data is not None and data != job.data
+        job.stats["refreshes"] += 1
+        job.stats["changes"] += changed
+        if job.data is not None:
+            job.adapt(changed)
+        job.data = data
+        return job.interval
+
+    def get(self, endpoint: str, tag: str = "") -> Optional[Dict]:
+        """Last refreshed response of a job, None if it wasn't refreshed yet.
+
+        Args:
+            endpoint (str): Endpoint name, see DEFAULT_INTERVALS.
+            tag (str): Player or clan tag of the request. Defaults to "".
+        """
+        job = self.jobs.get((endpoint, tag))
+        return job.data if job is not None else None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Interval and counters of each job, by "endpoint tag"."""
+        with self.lock:
+            jobs = list(self.jobs.values())
+        return {
+            " ".join(job.key).strip(): dict(job.stats, interval=job.interval)
+            for job in jobs
+        }
+
+    def run(self):
+        """Refresh the responses until stop is called."""
+        while not self.stop_event.is_set():
+            self.wake.clear()
+            self.wake.wait(self.run_pending())
+
+    def start(self):
+        """Start refreshing in a daemon thread."""
+        if self.thread is None or not self.thread.is_alive():
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Stop refreshing and wait for the current refresh to finish."""
+        self.stop_event.set()
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
@@ -0,0 +1,50 @@
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    import requests
+
+API_URL = "https://api.clashroyale.com/v1"
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+def create_session(
+    pool_size: int = 10,
+    retries: int = 3,
+    backoff_factor: float = 0.5,
+    retry_status: Iterable[int] = RETRY_STATUS,
+) -> "requests.Session":
+    """Create a pooled keep-alive HTTP session.
+
+    The HTTP library is imported here, so it is only loaded once a request is sent.
+
+    Args:
+        pool_size (int): Maximum number of connections kept alive per host.
+            Defaults to 10.
+        retries (int): Number of retries for failed requests. Defaults to 3.
+        backoff_factor (float): Backoff factor between retries, in seconds.
+            Defaults to 0.5.
+        retry_status (Iterable[int]): HTTP status codes that are retried.
+            Defaults to 429 and 5xx errors.
+
+    Returns:
+        requests.Session: Session sharing its connections between requests.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=tuple(retry_status),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Accept": "application/json"})
+    return session
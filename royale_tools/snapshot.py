@@ -0,0 +1,291 @@
+"""Offline snapshots of API responses.
+
+A snapshot file holds every response needed to show some players and clans, so
+they can be analyzed without a token or network access:
+
+    RoyaleApi.recorder = SnapshotRecorder()
+    scan_clan("#ABC")
+    RoyaleApi.recorder.write("abc.rts")
+
+    RoyaleApi.source = Snapshot("abc.rts")
+    scan_clan("#ABC")  # Served from the file
+
+Each response is compressed on its own as compact JSON, with zstd and a
+dictionary trained on all of them, or with zlib if zstandard isn't installed.
+The file starts with an index of the responses, so opening it only maps the
+file into memory and parses the index, and each response is decompressed
+straight from the mapped pages the first time it is requested.
+"""
+
+import functools
+import json
+import mmap
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from royale_tools.models import loads
+from royale_tools.streaming import own_standings, without_rivals
+
+MAGIC = b"RTSNAP01"
+# Magic, index length and dictionary length
+HEADER = struct.Struct("<8sII")
+# Minimum responses to train a compression dictionary, and its maximum size
+DICT_MIN_RESPONSES = 16
+DICT_SIZE = 16384
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+
+
+def snapshot_key(path: str) -> str:
+    """Snapshot key of an API path, e.g. "/clans/%23ABC/riverracelog#own".
+
+    Args:
+        path (str): API path relative to the base URL, or to the host of
+            MockApi, with the quoted tag, the query string and, for a parsed
+            part of a response, its variant as fragment.
+
+    Returns:
+        str: Path without the trailing slash, then the query and variant.
+    """
+    path, _, variant = path.partition("#")
+    parts = urlsplit(path)
+    key = parts.path.rstrip("/")
+    if key.startswith("/v1/"):
+        # Path requested to MockApi
+        key = key[3:]
+    if parts.query:
+        key += f"?{parts.query}"
+    return f"{key}#{variant}" if variant else key
+
+
+def default_compression() -> str:
+    """Best available compression: zstd if it is installed, zlib otherwise."""
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return "zlib"
+    return "zstd"
+
+
+@functools.lru_cache(maxsize=None)
+def json_encoder() -> Callable[[Any], bytes]:
+    """Compact JSON encoder, orjson if it is installed, imported when first used."""
+    try:
+        import orjson
+    except ImportError:
+        return lambda data: json.dumps(data, separators=(",", ":")).encode()
+    return orjson.dumps
+
+
+def compressor(
+    compression: str, records: List[bytes]
+) -> Tuple[Callable[[bytes], bytes], bytes]:
+    """Function compressing each record, and the dictionary it uses.
+
+    Args:
+        compression (str): "zstd" or "zlib".
+        records (List[bytes]): Encoded responses, to train the zstd dictionary.
+
+    Returns:
+        Tuple[Callable, bytes]: Compression function and dictionary, b"" if none.
+    """
+    if compression == "zlib":
+        import zlib
+
+        return functools.partial(zlib.compress, level=ZLIB_LEVEL), b""
+    import zstandard
+
+    dictionary = None
+    if len(records) >= DICT_MIN_RESPONSES:
+        try:
+            dictionary = zstandard.train_dictionary(DICT_SIZE, records)
+        except zstandard.ZstdError:
+            # Not enough data to train it
+            dictionary = None
+    cctx = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dictionary)
+    return cctx.compress, dictionary.as_bytes() if dictionary is not None else b""
+
+
+def decompressor(compression: str, dictionary: bytes) -> Callable[[Any], bytes]:
+    """Function decompressing a record from a bytes-like object."""
+    if compression == "zlib":
+        import zlib
+
+        return zlib.decompress
+    import zstandard
+
+    dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+    return zstandard.ZstdDecompressor(dict_data=dict_data).decompress
+
+
+class SnapshotRecorder:
+    """Collects API responses to write them to a snapshot file.
+
+    Set it as RoyaleApi.recorder to record every successful response, including
+    the ones served by the response cache.
+    """
+
+    def __init__(self):
+        self.responses: Dict[str, Any] = {}
+        self.lock = threading.Lock()
+
+    def add(self, path: str, data: Any):
+        """Record a response.
+
+        Args:
+            path (str): API path, see snapshot_key.
+            data (Any): JSON response.
+        """
+        with self.lock:
+            self.responses[snapshot_key(path)] = data
+
+    def __len__(self) -> int:
+        return len(self.responses)
+
+    def write(self, path: str, compression: Optional[str] = None) -> int:
+        """Write the recorded responses to a snapshot file.
+
+        Args:
+            path (str): Snapshot file.
+            compression (str): "zstd" or "zlib". Defaults to None (zstd if it is
+                installed).
+
+        Returns:
+            int: File size in bytes.
+        """
+        compression = compression or default_compression()
+        with self.lock:
+            responses = dict(self.responses)
+        encode = json_encoder()
+        records = [encode(data) for data in responses.values()]
+        compress, dictionary = compressor(compression, records)
+        entries, blobs, offset = {}, [], 0
+        for key, record in zip(responses, records):
+            blob = compress(record)
+            entries[key] = (offset, len(blob))
+            blobs.append(blob)
+            offset += len(blob)
+        index = json.dumps(
+            {
+                "compression": compression,
+                "created": time.time(),
+                "entries": entries,
+            }
+        ).encode()
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(index), len(dictionary)))
+            f.write(index)
+            f.write(dictionary)
+            f.writelines(blobs)
+            return f.tell()
+
+
+class Snapshot:
+    """Snapshot file opened as a source of API responses.
+
+    It has the same route method as mock_api.SyntheticData, so it can be set as
+    RoyaleApi.source or served by MockApi. A parsed part of a response, e.g. the
+    clan's own standings of the river race log, is served from the full
+    response if only that one was recorded.
+
+    The file is memory-mapped and the responses are decoded when first
+    requested, and then shared, so they must not be modified. A pickled
+    snapshot is opened again from its path, e.g. in worker processes.
+
+    Args:
+        path (str): Snapshot file.
+
+    Raises:
+        ValueError: If the file isn't a snapshot.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, index_size, dict_size = HEADER.unpack_from(self.map)
+        except struct.error:
+            magic = b""
+        if magic != MAGIC:
+            self.map.close()
+            raise ValueError(f"{path} isn't a snapshot file")
+        start, end = HEADER.size, HEADER.size + index_size
+        index = json.loads(self.map[start:end])
+        self.compression: str = index["compression"]
+        self.created: float = index["created"]
+        self.entries: Dict[str, List[int]] = index["entries"]
+        data_start = end + dict_size
+        dictionary = self.map[end:data_start]
+        self.data_start = data_start
+        self.decompress = decompressor(self.compression, dictionary)
+        self.decoded: Dict[str, Any] = {}
+        # zstd decompression contexts can't be shared between threads
+        self.lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, str]:
+        return {"path": self.path}
+
+    def __setstate__(self, state: Dict[str, str]):
+        self.__init__(state["path"])  # type: ignore
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: str) -> Any:
+        """Get a response.
+
+        Args:
+            key (str): Snapshot key, see snapshot_key.
+
+        Raises:
+            KeyError: If the response isn't in the snapshot.
+
+        Returns:
+            Any: JSON response.
+        """
+        with self.lock:
+            data = self.decoded.get(key)
+            if data is None:
+                offset, size = self.entries[key]
+                start = self.data_start + offset
+                end = start + size
+                with memoryview(self.map) as view:
+                    record = self.decompress(view[start:end])
+                data = self.decoded[key] = loads(record)
+            return data
+
+    def route(self, path: str) -> Tuple[int, Any]:
+        """Resolve an API path into a status code and a payload.
+
+        The own standings variant of a clan's river race data is served from the
+        full response if only that one was recorded.
+        """
+        key = snapshot_key(path)
+        if key in self.entries:
+            return 200, self.get(key)
+        key, _, variant = key.partition("#")
+        if variant != "own" or key not in self.entries:
+            return 404, {"reason": "notFound"}
+        data = self.get(key)
+        if key.endswith("/riverracelog"):
+            return 200, own_standings(data, unquote(key.split("/")[2]))
+        if key.endswith("/currentriverrace"):
+            return 200, without_rivals(data)
+        return 404, {"reason": "notFound"}
+
+    def close(self):
+        """Unmap the file."""
+        self.map.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *args: Any):
+        self.close()
@@ -0,0 +1,104 @@
+import functools
+import json
+from typing import IO, Dict, Tuple, Type
+
+
+@functools.lru_cache(maxsize=None)
+def decode_errors() -> Tuple[Type[Exception], ...]:
+    """Errors raised by the JSON parsers for an invalid body, ijson's if installed."""
+    try:
+        import ijson
+    except ImportError:
+        return (ValueError,)
+    return (ValueError, ijson.JSONError)
+
+
+def own_standings(river_race_log: Dict, clan_tag: str) -> Dict:
+    """Copy of a parsed river race log with the standings of a clan only.
+
+    Args:
+        river_race_log (Dict): River race log data in JSON format.
+        clan_tag (str): Clan tag.
+
+    Returns:
+        Dict: River race log data in JSON format, with the standings of the
+            clan only.
+    """
+    items = [
+        dict(
+            race,
+            standings=[s for s in race["standings"] if s["clan"]["tag"] == clan_tag],
+        )
+        for race in river_race_log["items"]
+    ]
+    return dict(river_race_log, items=items)
+
+
+def without_rivals(curr_river_race: Dict) -> Dict:
+    """Copy of a parsed current river race without "clans", see own_current_river_race."""
+    return {key: value for key, value in curr_river_race.items() if key != "clans"}
+
+
+def own_river_race_log(fp: IO[bytes], clan_tag: str) -> Dict:
+    """Parse a river race log keeping only the standings of a clan.
+
+    The body is parsed while it is read, one race at a time, and the standings
+    of the other clans are discarded before the next race is parsed, so the
+    whole log is never built. Without ijson, the log is fully parsed and then
+    filtered.
+
+    Args:
+        fp (IO[bytes]): Response body, e.g. the raw stream of a response.
+        clan_tag (str): Clan tag.
+
+    Returns:
+        Dict: River race log data in JSON format, with the standings of the
+            clan only.
+    """
+    try:
+        import ijson
+    except ImportError:
+        return own_standings(json.load(fp), clan_tag)
+
+    log: Dict = {"items": []}
+    for race in ijson.items(fp, "items.item", use_float=True):
+        race["standings"] = [
+            s for s in race["standings"] if s["clan"]["tag"] == clan_tag
+        ]
+        log["items"].append(race)
+    return log
+
+
+def own_current_river_race(fp: IO[bytes]) -> Dict:
+    """Parse a current river race without the standings of the rival clans.
+
+    The race is parsed event by event and only the values of the other keys are
+    built, so the "clans" list, with every participant of every clan, is read
+    but never built. Without ijson, the race is fully parsed and then filtered.
+
+    Args:
+        fp (IO[bytes]): Response body, e.g. the raw stream of a response.
+
+    Returns:
+        Dict: Current river race data in JSON format, without "clans".
+    """
+    try:
+        import ijson
+    except ImportError:
+        return without_rivals(json.load(fp))
+
+    race: Dict = {}
+    key, builder = "", ijson.ObjectBuilder()
+    for prefix, event, value in ijson.parse(fp, use_float=True):
+        if prefix == "":
+            # Start and end of the race, and its keys
+            if event == "map_key":
+                key, builder = value, ijson.ObjectBuilder()
+            continue
+        if key == "clans":
+            continue
+        builder.event(event, value)
+        if prefix == key and event not in ("start_map", "start_array", "map_key"):
+            # End of the value
+            race[key] = builder.value
+    return race
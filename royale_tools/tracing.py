@@ -0,0 +1,379 @@
+import bisect
+import contextlib
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+from royale_tools.cache import ResponseCache
+
+# Histogram buckets, like the Prometheus client defaults
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7)
+# Environment variable to profile the player loading: "cprofile" or "pyinstrument"
+PROFILE_VARIABLE = "ROYALE_TOOLS_PROFILE"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative histogram of observed values.
+
+    Args:
+        buckets (Tuple[float, ...]): Upper bounds of the buckets.
+    """
+
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """Add a value."""
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+
+class RequestTrace:
+    """Timings and results of a request, recorded by a Tracer when it ends.
+
+    Args:
+        tracer (Tracer): Tracer recording the request.
+        url (str): URL of the request.
+    """
+
+    def __init__(self, tracer: "Tracer", url: str):
+        self.tracer = tracer
+        self.url = url
+        self.endpoint = ResponseCache.endpoint(url)
+        self.phases: Dict[str, float] = {}
+        self.status: Optional[int] = None
+        self.cache = "disabled"
+        self.size = 0
+        self.new_connections = 0
+        self.start = 0.0
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a phase of the request, e.g. "response" or "decode"."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def set_phase(self, name: str, seconds: float):
+        """Record a phase timed elsewhere."""
+        self.phases[name] = seconds
+
+    @contextlib.contextmanager
+    def connections(self, session: Any, url: str) -> Iterator[None]:
+        """Count the connections opened, i.e. with DNS, TCP and TLS handshakes."""
+        pool = session.get_adapter(url).poolmanager.connection_from_url(url)
+        before = pool.num_connections
+        try:
+            yield
+        finally:
+            self.new_connections = pool.num_connections - before
+
+    def __enter__(self) -> "RequestTrace":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, *args: Any):
+        self.phases["total"] = time.perf_counter() - self.start
+        if exc_type is not None and self.status is None:
+            self.status = 0
+        self.tracer.record_request(self)
+
+
+class NullTrace:
+    """Request trace that records nothing, used when tracing is disabled."""
+
+    def __setattr__(self, name: str, value: Any):
+        pass
+
+    def phase(self, name: str) -> ContextManager:
+        """Do nothing."""
+        return contextlib.nullcontext()
+
+    def set_phase(self, name: str, seconds: float):
+        """Do nothing."""
+
+    def connections(self, session: Any, url: str) -> ContextManager:
+        """Do nothing."""
+        return contextlib.nullcontext()
+
+    def __enter__(self) -> "NullTrace":
+        return self
+
+    def __exit__(self, *args: Any):
+        pass
+
+
+NULL_TRACE = NullTrace()
+
+
+class Tracer:
+    """Metrics of API requests and stats functions.
+
+    Every request is recorded as counters and histograms, exported in the
+    Prometheus text format, and as a structured loguru record with its phase
+    timings in the "extra" dict.
+
+    Args:
+        log (bool): Whether to log every request with loguru. Defaults to True.
+    """
+
+    def __init__(self, log: bool = True):
+        self.log = log
+        self.lock = threading.Lock()
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+
+    def count(self, name: str, value: float = 1, **labels: Any):
+        """Increase a counter."""
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self.lock:
+            counter = self.counters.setdefault(name, {})
+            counter[key] = counter.get(key, 0) + value
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        buckets: Tuple[float, ...] = SECONDS_BUCKETS,
+        **labels: Any,
+    ):
+        """Add a value to a histogram."""
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self.lock:
+            histogram = self.histograms.setdefault(name, {})
+            if key not in histogram:
+                histogram[key] = Histogram(buckets)
+            histogram[key].observe(value)
+
+    def request(self, url: str) -> RequestTrace:
+        """Start the trace of a request, use it as a context manager."""
+        return RequestTrace(self, url)
+
+    def record_request(self, trace: RequestTrace):
+        """Record a finished request trace."""
+        endpoint = trace.endpoint
+        self.count(
+            "royale_tools_requests_total",
+            endpoint=endpoint,
+            status=trace.status,
+            cache=trace.cache,
+        )
+        for phase, seconds in trace.phases.items():
+            self.observe(
+                "royale_tools_request_seconds", seconds, endpoint=endpoint, phase=phase
+            )
+        if trace.size:
+            self.observe(
+                "royale_tools_response_bytes",
+                trace.size,
+                BYTES_BUCKETS,
+                endpoint=endpoint,
+            )
+        if trace.new_connections:
+            self.count(
+                "royale_tools_new_connections_total",
+                trace.new_connections,
+                endpoint=endpoint,
+            )
+        if self.log:
+            from loguru import logger
+
+            logger.bind(
+                endpoint=endpoint,
+                url=trace.url,
+                status=trace.status,
+                cache=trace.cache,
+                size=trace.size,
+                new_connections=trace.new_connections,
+                phases=trace.phases,
+            ).debug(
+                f"{endpoint} {trace.status} ({trace.cache}) "
+                f"{1000 * trace.phases['total']:.1f} ms"
+            )
+
+    @contextlib.contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time a block of code, e.g. a stats function."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(
+                "royale_tools_function_seconds",
+                time.perf_counter() - start,
+                function=name,
+            )
+
+    @staticmethod
+    def format_labels(labels: Labels, extra: str = "") -> str:
+        """Labels in the Prometheus format, e.g. '{endpoint="cards"}'."""
+        items = [f'{key}="{value}"' for key, value in labels]
+        if extra:
+            items.append(extra)
+        return "{" + ",".join(items) + "}" if items else ""
+
+    def prometheus(self) -> str:
+        """Export the metrics in the Prometheus text format."""
+        lines: List[str] = []
+        with self.lock:
+            for name, counter in sorted(self.counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(counter.items()):
+                    lines.append(f"{name}{self.format_labels(labels)} {value:g}")
+            for name, histograms in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(histograms.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        le = self.format_labels(labels, f'le="{bound:g}"')
+                        lines.append(f"{name}_bucket{le} {cumulative}")
+                    le = self.format_labels(labels, 'le="+Inf"')
+                    lines.append(f"{name}_bucket{le} {histogram.count}")
+                    label_text = self.format_labels(labels)
+                    lines.append(f"{name}_sum{label_text} {histogram.total:g}")
+                    lines.append(f"{name}_count{label_text} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """Write the metrics in the Prometheus text format to a file."""
+        with open(path, "w") as f:
+            f.write(self.prometheus())
+
+
+# Profiler and profiles of the worker thread tasks of a profiled block
+TaskProfiles = Tuple[str, List[Any]]
+_task_profiles: ContextVar[Optional[TaskProfiles]] = ContextVar(
+    "task_profiles", default=None
+)
+
+
+def task_profiles() -> Optional[TaskProfiles]:
+    """Collector of the worker tasks of the block being profiled, if any.
+
+    Get it in the calling thread and pass it to profiled_task, the worker threads
+    don't see the block being profiled.
+    """
+    return _task_profiles.get()
+
+
+def profiled_task(
+    task_profiles: Optional[TaskProfiles], function: Callable, *args: Any
+) -> Any:
+    """Run a task of a thread pool, profiling it if a block is being profiled.
+
+    The profilers only see the thread they were started in, so the tasks a
+    profiled block submits to worker threads are profiled on their own and
+    merged into the report of the block. A task isn't profiled if another
+    profiler is active, Python 3.12+ only allows one cProfile at once.
+
+    Args:
+        task_profiles (Optional[TaskProfiles]): Collector of the block, see
+            task_profiles. The task isn't profiled if None.
+        function (Callable): Task function.
+        *args (Any): Arguments of the function.
+
+    Returns:
+        Any: Result of the function.
+    """
+    if task_profiles is None:
+        return function(*args)
+    profiler, profiles = task_profiles
+    if profiler == "cprofile":
+        import cProfile
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return function(*args)
+        try:
+            return function(*args)
+        finally:
+            profile.disable()
+            profiles.append(profile)
+    from pyinstrument import Profiler
+
+    instrument = Profiler()
+    instrument.start()
+    try:
+        return function(*args)
+    finally:
+        profiles.append(instrument.stop())
+
+
+@contextlib.contextmanager
+def profiled(name: str) -> Iterator[None]:
+    """Profile a block of code if ROYALE_TOOLS_PROFILE is set.
+
+    With "cprofile", the stats are saved to "<name>.prof" and the slowest
+    functions are logged. With "pyinstrument", the report is saved to
+    "<name>.html". The calling thread and the tasks it runs with profiled_task
+    in worker threads are profiled. A block started while another one is being
+    profiled in the same context, or while another cProfile is active, isn't
+    profiled.
+
+    Args:
+        name (str): Name of the profiled block, used for the report file.
+    """
+    profiler = os.environ.get(PROFILE_VARIABLE, "").lower()
+    if profiler not in ("cprofile", "pyinstrument") or task_profiles() is not None:
+        yield
+        return
+    profiles: List[Any] = []
+    if profiler == "cprofile":
+        import cProfile
+        import io
+        import pstats
+
+        from loguru import logger
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            yield
+            return
+        token = _task_profiles.set((profiler, profiles))
+        try:
+            yield
+        finally:
+            profile.disable()
+            _task_profiles.reset(token)
+            out = io.StringIO()
+            stats = pstats.Stats(profile, *profiles, stream=out)
+            stats.dump_stats(f"{name}.prof")
+            stats.sort_stats("cumulative").print_stats(20)
+            logger.info(f"Profile of {name}:\n{out.getvalue()}")
+    else:
+        from pyinstrument import Profiler
+        from pyinstrument.renderers import HTMLRenderer
+        from pyinstrument.session import Session
+
+        instrument = Profiler()
+        instrument.start()
+        token = _task_profiles.set((profiler, profiles))
+        try:
+            yield
+        finally:
+            session = instrument.stop()
+            _task_profiles.reset(token)
+            for task_session in profiles:
+                session = Session.combine(session, task_session)
+            with open(f"{name}.html", "w") as f:
+                f.write(HTMLRenderer().render(session))
@@ -0,0 +1,196 @@
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from royale_tools.api import RoyaleApi
+from royale_tools.exceptions import ApiError
+
+
+class RunningStats:
+    """Count, sum and mean of a series updated one value at a time."""
+
+    __slots__ = ("count", "total")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float):
+        """Add a value to the series."""
+        self.count += 1
+        self.total += value
+
+    @property
+    def mean(self) -> float:
+        """Mean of the series, 0 if it is empty."""
+        return self.total / self.count if self.count else 0.0
+
+
+class RaceTracker:
+    """War stats of a clan kept up to date from small incremental polls.
+
+    Each poll only requests the current river race. The river race log is only
+    requested when the section changes, and only the races newer than the last
+    processed one are read. The running aggregates of every player are updated
+    with those races, and the current race values are only touched for the
+    participants whose fame or repair points changed.
+
+    Args:
+        clan_tag (str): Clan tag.
+    """
+
+    def __init__(self, clan_tag: str):
+        self.clan_tag = clan_tag if clan_tag.startswith("#") else f"#{clan_tag}"
+        # (seasonId, sectionIndex) of the newest processed race of the log
+        self.last_race: Optional[Tuple[int, int]] = None
+        self.section_index: Optional[int] = None
+        self.log_pending = True
+        # Last (fame, repair points) of each participant of the current race
+        self.current: Dict[str, Tuple[int, int]] = {}
+        self.fame: Dict[str, RunningStats] = {}
+        self.repair: Dict[str, RunningStats] = {}
+        self.war: Dict[str, RunningStats] = {}
+
+    def update_log(self, river_race_log: Dict) -> int:
+        """Add the races of the log that weren't processed yet.
+
+        Args:
+            river_race_log (Dict): Clan river race log data in JSON format.
+
+        Returns:
+            int: Number of new races.
+        """
+        new_races = []
+        for race in river_race_log["items"]:
+            key = (race["seasonId"], race["sectionIndex"])
+            if self.last_race is not None and key <= self.last_race:
+                break
+            new_races.append(race)
+        for race in reversed(new_races):
+            for clan in race["standings"]:
+                if clan["clan"]["tag"] != self.clan_tag:
+                    continue
+                for player in clan["clan"]["participants"]:
+                    self.add_race(player["tag"], player["fame"], player["repairPoints"])
+        if new_races:
+            first = new_races[0]
+            self.last_race = (first["seasonId"], first["sectionIndex"])
+        self.log_pending = False
+        return len(new_races)
+
+    def add_race(self, tag: str, fame: float, repair: float):
+        """Add the results of a finished race to the aggregates of a player."""
+        if tag not in self.war:
+            self.fame[tag], self.repair[tag] = RunningStats(), RunningStats()
+            self.war[tag] = RunningStats()
+        self.fame[tag].add(float(fame))
+        self.repair[tag].add(float(repair))
+        self.war[tag].add(float(fame + repair))
+
+    def update_current(self, curr_river_race: Dict) -> List[str]:
+        """Update the current race values.
+
+        Args:
+            curr_river_race (Dict): Clan current river race data in JSON format.
+
+        Returns:
+            List[str]: Tags of the participants whose values changed.
+        """
+        if curr_river_race["sectionIndex"] != self.section_index:
+            if self.section_index is not None:
+                # The previous race is finished, it will appear in the log
+                self.log_pending = True
+            self.section_index = curr_river_race["sectionIndex"]
+            self.current = {}
+        changed = []
+        for player in curr_river_race["clan"]["participants"]:
+            values = (player["fame"], player["repairPoints"])
+            if self.current.get(player["tag"]) != values:
+                self.current[player["tag"]] = values
+                changed.append(player["tag"])
+        return changed
+
+    def poll(self) -> List[str]:
+        """Request the new river race data and process it.
+
+        Raises:
+            ApiError: If any of the requests fails.
+
+        Returns:
+            List[str]: Tags of the players whose stats changed.
+        """
+        curr_river_race = RoyaleApi.get_clan_data(
+            self.clan_tag, "currentriverrace", own_only=True
+        )
+        changed = self.update_current(curr_river_race)
+        if self.log_pending:
+            before = {tag: stats.count for tag, stats in self.war.items()}
+            log = RoyaleApi.get_clan_data(self.clan_tag, "riverracelog", own_only=True)
+            if self.update_log(log):
+                changed.extend(
+                    tag
+                    for tag, stats in self.war.items()
+                    if before.get(tag) != stats.count and tag not in changed
+                )
+        return changed
+
+    def get(self, player_tag: str) -> Dict:
+        """Get the aggregated war stats of a player.
+
+        Args:
+            player_tag (str): Player tag.
+
+        Returns:
+            Dict: Number of races, sums and means of the fame, repair and war
+                points of the finished races, and the current race values.
+        """
+        war = self.war.get(player_tag, RunningStats())
+        fame = self.fame.get(player_tag, RunningStats())
+        repair = self.repair.get(player_tag, RunningStats())
+        stats = {
+            "races": war.count,
+            "fame_points": fame.total,
+            "repair_points": repair.total,
+            "war_points": war.total,
+            "avg_fame_points": fame.mean,
+            "avg_repair_points": repair.mean,
+            "avg_war_points": war.mean,
+        }
+        if player_tag in self.current:
+            curr_fame, curr_repair = self.current[player_tag]
+            stats["current_fame_points"] = curr_fame
+            stats["current_repair_points"] = curr_repair
+            stats["current_war_points"] = curr_fame + curr_repair
+        return stats
+
+
+def follow(
+    trackers: Iterable[RaceTracker],
+    interval: float = 300.0,
+    stop: Optional[threading.Event] = None,
+    on_update: Optional[Callable[[RaceTracker, List[str]], None]] = None,
+):
+    """Poll several clans until stopped, e.g. from a background thread.
+
+    Failed polls are logged and retried in the next round.
+
+    Args:
+        trackers (Iterable[RaceTracker]): Trackers of the followed clans.
+        interval (float): Seconds between polls. Defaults to 300.
+        stop (threading.Event): Event to stop following. Defaults to None.
+        on_update (Callable): Function called with a tracker and the changed
+            player tags when a poll changes something. Defaults to None.
+    """
+    trackers = list(trackers)
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        for tracker in trackers:
+            try:
+                changed = tracker.poll()
+            except ApiError as e:
+                logger.warning(f"Couldn't poll {tracker.clan_tag}: {e}")
+                continue
+            if changed and on_update:
+                on_update(tracker, changed)
+        stop.wait(interval)
@@ -1,21 +1,95 @@
-import locale
 import statistics as st
-import sys
-from copy import deepcopy as dc
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
 
-import pkg_resources
 import PySimpleGUI as sg
-import requests
 
-VERSION = pkg_resources.require("royale-tools")[0].version
-locale.setlocale(locale.LC_ALL, "")
+from royale_tools.api import RoyaleApi
+from royale_tools.clan import COLUMNS, ClanTable
+from royale_tools.decks import N_WAR_DECKS
+from royale_tools.exceptions import ApiError
+from royale_tools.projection import WEEK_DAYS, WarProjection
+from royale_tools.version import VERSION
 
 TITLE = "Royale Tools"
 THEMES = (
     "BlueMono|Dark|DarkAmber|DarkTeal2|GreenMono|LightYellow|Reddit|"
     "Reds|SandyBeach|SystemDefault|TealMono|Topanga"
 )
+CARD_RARITIES = {13: "Common", 11: "Rare", 8: "Epic", 5: "Legendary"}
+
+
+class WindowManager:
+    """Windows of the application views, built once and reused.
+
+    The first time a view is shown its window is built and finalized. Then it's
+    only hidden, and showing it again updates its elements in place, which is
+    much faster than building a new window and doesn't flicker. A window is
+    rebuilt when the theme or its layout key changes, e.g. the number of rows
+    of a table. A window closed by the user must be closed in the manager too,
+    so it's rebuilt the next time.
+    """
+
+    def __init__(self):
+        self.windows: Dict[str, sg.Window] = {}
+        self.layouts: Dict[str, Hashable] = {}
+
+    def show(
+        self,
+        name: str,
+        build: Callable[[], sg.Window],
+        values: Optional[Dict[str, Any]] = None,
+        layout: Hashable = None,
+    ) -> sg.Window:
+        """Show a view, building its window only if needed.
+
+        Args:
+            name (str): View name.
+            build (Callable): Function building the window of the view.
+            values (Dict[str, Any]): Value of each element key, updated in place
+                if the window is reused. Defaults to None.
+            layout (Hashable): Anything the layout depends on, besides the
+                theme. Defaults to None.
+
+        Returns:
+            sg.Window: Visible window of the view.
+        """
+        layout = (sg.theme(), layout)
+        window = self.windows.get(name)
+        if window is not None and self.layouts[name] != layout:
+            self.close(name)
+            window = None
+        if window is None:
+            window = build()
+            window.finalize()
+            self.windows[name] = window
+            self.layouts[name] = layout
+        else:
+            if values:
+                cw.update(window, values)
+            window.un_hide()
+        return window
+
+    def hide(self, name: str):
+        """Hide the window of a view, if it was built.
+
+        Args:
+            name (str): View name.
+        """
+        if name in self.windows:
+            self.windows[name].hide()
+
+    def close(self, name: Optional[str] = None):
+        """Close the window of a view, or every window.
+
+        Args:
+            name (str): View name. Defaults to None (every view).
+        """
+        names = [name] if name is not None else list(self.windows)
+        for view in names:
+            window = self.windows.pop(view, None)
+            self.layouts.pop(view, None)
+            if window is not None:
+                window.close()
 
 
 class CustomWindows:
@@ -24,6 +98,46 @@ class CustomWindows:
         """Custom sg.Frame implementation."""
         return sg.Frame(*args, **kwargs, font="Any 14 bold")
 
+    @staticmethod
+    def texts(values: Dict[str, str], keys: Iterable[str]) -> List[List[sg.Text]]:
+        """Rows with a text element for each key.
+
+        Args:
+            values (Dict[str, str]): Text of each element key.
+            keys (Iterable[str]): Element keys, in order.
+        """
+        return [[sg.T(values[key], key=key)] for key in keys]
+
+    @staticmethod
+    def update(window: sg.Window, values: Dict[str, Any]):
+        """Update the elements of a window in place.
+
+        Args:
+            window (sg.Window): Finalized window.
+            values (Dict[str, Any]): Value of each element key.
+        """
+        for key, value in values.items():
+            window[key].update(value)
+
+    @staticmethod
+    def api_error_popup(error: ApiError):
+        """API error popup.
+
+        Args:
+            error (ApiError): Error raised by the failed request.
+        """
+        code_info = "" if not error.status_code else f"(code: {error.status_code})"
+        sg.popup_error(
+            f"Couldn't get API data! {code_info}",
+            "This application can't work without API data.",
+            "Common errors:",
+            " - Internet connection error",
+            " - Invalid API token",
+            " - Invalid player/clan tag",
+            "Please, check these issues and try again.",
+            title="API error",
+        )
+
     @staticmethod
     def main_window() -> sg.Window:
         """Main window."""
@@ -34,6 +148,18 @@ class CustomWindows:
         ]
         return sg.Window(TITLE, layout, element_justification="c", font="Any 15")
 
+    @staticmethod
+    def settings_values(config: Dict[str, str]) -> Dict[str, str]:
+        """Input values of the settings window, by element key.
+
+        Args:
+            config: Default input text fields.
+        """
+        keys = ("token", "player_tag", "clan_tag")
+        values = {f"in.{key}": config[key] or "" for key in keys}
+        values["cmb.theme"] = config["theme"]
+        return values
+
     @staticmethod
     def settings_window(mandatory: bool, config: Dict[str, str]) -> sg.Window:
         """Settings configuration window.
@@ -43,18 +169,19 @@ class CustomWindows:
                 If True, Exit button is showed instead of Cancel.
             config: Default input text fields.
         """
+        values = cw.settings_values(config)
         layout = [
             [sg.T("Token*", tooltip="Clash Royale API token (mandatory)")],
-            [sg.In(config["token"] or "", key="in.token")],
+            [sg.In(values["in.token"], key="in.token")],
             [sg.T("Player tag", tooltip="Your personal player tag (optional)")],
-            [sg.In(config["player_tag"] or "", key="in.player_tag")],
+            [sg.In(values["in.player_tag"], key="in.player_tag")],
             [sg.T("Clan tag", tooltip="Your clan tag (optional)")],
-            [sg.In(config["clan_tag"] or "", key="in.clan_tag")],
+            [sg.In(values["in.clan_tag"], key="in.clan_tag")],
             [sg.T("Theme")],
             [
                 sg.Combo(
                     THEMES.split("|"),
-                    default_value=config["theme"],
+                    default_value=values["cmb.theme"],
                     key="cmb.theme",
                     enable_events=True,
                 )
@@ -113,53 +240,82 @@ class CustomWindows:
         return sg.Window(TITLE, layout)
 
     @staticmethod
-    def progress_window(max_prog: Optional[int] = 100) -> sg.Window:
+    def clan_tag_window(default_tag: str) -> sg.Window:
+        """Clan tag selection window.
+
+        Args:
+            default_tag (str): Default clan tag.
+        """
+        layout = [
+            [sg.T("Enter a clan tag")],
+            [sg.In(default_tag, key="in.clan_tag", size=(20, 1)), sg.B("OK")],
+        ]
+        return sg.Window(TITLE, layout)
+
+    @staticmethod
+    def progress_window(
+        max_prog: Optional[int] = 100, steps: Iterable[str] = (), cancel: bool = False
+    ) -> sg.Window:
         """Progress window.
 
         Args:
             max_prog (int): Maximum progress. Defaults to 100.
+            steps (Iterable[str]): Steps whose duration is shown once finished,
+                with the keys "t.<step>". Defaults to ().
+            cancel (bool): Whether to show a Cancel button. Defaults to False.
         """
         layout = [[sg.ProgressBar(max_prog, orientation="h", size=(20, 20), k="pbar")]]
-        return sg.Window(TITLE, layout, no_titlebar=True)
+        for step in steps:
+            layout.append([sg.T(f"{step}: ...", size=(30, 1), key=f"t.{step}")])
+        if cancel:
+            layout.append([sg.Cancel()])
+        return sg.Window(TITLE, layout, no_titlebar=True, finalize=True)
 
     @staticmethod
-    def player_main_window(data: Dict) -> sg.Window:
-        """Player main window.
+    def player_main_values(data: Dict) -> Dict[str, str]:
+        """Texts of the player main window, by element key.
 
         Args:
             data (Dict): Dictionary with player information.
         """
         winrate = RoyaleApi.get_winrate(data["losses"], data["wins"])
         winrate_text = f"{winrate:.2f}%" if winrate > 0 else "Not available"
-        generic = [
-            [sg.T(f"Name: {data['name']}")],
-            [sg.T(f"Tag: {data['tag']}")],
-            [sg.T(f"Arena: {data['arena']['name']}")],
-            [sg.T(f"Winrate: {winrate_text}")],
-            [sg.T(f"War day wins: {data['warDayWins']}")],
-            [sg.T(f"Challenge max wins: {data['challengeMaxWins']}")],
-            [sg.T(f"{data['role'].capitalize()} in {data['clan']['name']}")],
-            [sg.T(f"Donations sent: {data['donations']}")],
-            [sg.T(f"Donations received: {data['donationsReceived']}")],
-        ]
-
         stats = data["leagueStatistics"]
+        previous = stats.get("previousSeason", {})
+        best = stats.get("bestSeason", {})
+        return {
+            "t.name": f"Name: {data['name']}",
+            "t.tag": f"Tag: {data['tag']}",
+            "t.arena": f"Arena: {data['arena']['name']}",
+            "t.winrate": f"Winrate: {winrate_text}",
+            "t.war_day_wins": f"War day wins: {data['warDayWins']}",
+            "t.challenge_wins": f"Challenge max wins: {data['challengeMaxWins']}",
+            "t.role": f"{data['role'].capitalize()} in {data['clan']['name']}",
+            "t.donations": f"Donations sent: {data['donations']}",
+            "t.received": f"Donations received: {data['donationsReceived']}",
+            "t.trophies": f" + Trophies: {stats['currentSeason']['trophies']}",
+            "t.best": f" + Best: {stats['currentSeason']['bestTrophies']}",
+            "t.prev_trophies": f" + Trophies: {previous.get('trophies', 'Not found')}",
+            "t.prev_best": f" + Best: {previous.get('bestTrophies', 'Not found')}",
+            "t.best_season": f" + Best: {best.get('trophies', 'Not found')}",
+        }
 
-        if "previousSeason" not in stats:
-            stats["previousSeason"]["trophies"] = "Not found"
-            stats["previousSeason"]["bestTrophies"] = "Not found"
-        if "bestSeason" not in stats:
-            stats["bestSeason"]["trophies"] = "Not found"
+    @staticmethod
+    def player_main_window(data: Dict) -> sg.Window:
+        """Player main window.
 
+        Args:
+            data (Dict): Dictionary with player information.
+        """
+        values = cw.player_main_values(data)
+        generic = cw.texts(values, list(values)[:9])
         trophies = [
             [sg.T("Current season:")],
-            [sg.T(f" + Trophies: {stats['currentSeason']['trophies']}")],
-            [sg.T(f" + Best: {stats['currentSeason']['bestTrophies']}")],
+            *cw.texts(values, ("t.trophies", "t.best")),
             [sg.T("Previous season:")],
-            [sg.T(f" + Trophies: {stats['previousSeason']['trophies']}")],
-            [sg.T(f" + Best: {stats['previousSeason']['bestTrophies']}")],
+            *cw.texts(values, ("t.prev_trophies", "t.prev_best")),
             [sg.T("Best season:")],
-            [sg.T(f" + Best: {stats['bestSeason']['trophies']}")],
+            *cw.texts(values, ("t.best_season",)),
         ]
         layout = [
             [
@@ -171,6 +327,18 @@ class CustomWindows:
         ]
         return sg.Window(TITLE, layout)
 
+    @staticmethod
+    def player_chests_values(data: Dict) -> Dict[str, str]:
+        """Texts of the player chests window, by element key.
+
+        Args:
+            data (Dict): Dictionary with chests information.
+        """
+        return {
+            f"t.chest{i}": f"+{chest['index']+1}:\t{chest['name']}"
+            for i, chest in enumerate(data["items"])
+        }
+
     @staticmethod
     def player_chests_window(data: Dict) -> sg.Window:
         """Player chests window.
@@ -178,15 +346,38 @@ class CustomWindows:
         Args:
             data (Dict): Dictionary with chests information.
         """
-        upcoming = []
-        for chest in data["items"]:
-            upcoming.append([sg.T(f"+{chest['index']+1}:\t{chest['name']}")])
+        values = cw.player_chests_values(data)
         layout = [
-            [cw.F("Upcoming chests", upcoming)],
+            [cw.F("Upcoming chests", cw.texts(values, values))],
             [sg.B("\u2190")],
         ]
         return sg.Window(TITLE, layout)
 
+    @staticmethod
+    def player_cards_values(data: Dict, stats: Dict) -> Dict[str, str]:
+        """Texts of the player cards window, by element key.
+
+        Args:
+            data (Dict): Dictionary with player information.
+            stats (Dict): Dictionary with cards stats.
+        """
+        n_collected, n_all = stats["collected"]
+        values = {
+            "t.collected": f"Obtained cards: {n_collected}/{n_all}",
+            "t.favourite": f"Favorite card: {data['currentFavouriteCard']['name']}",
+        }
+        for max_lvl in CARD_RARITIES:
+            lvl_stats = stats[max_lvl]
+            values[f"t.{max_lvl}.rem_cards"] = (
+                f"Remaining cards: {lvl_stats['rem_cards']}"
+            )
+            values[f"t.{max_lvl}.rem_gold"] = f"Remaining gold: {lvl_stats['rem_gold']}"
+            values[f"t.{max_lvl}.progress"] = f"Progress: {lvl_stats['progress']:.2f}%"
+            values[f"t.{max_lvl}.avg_level"] = (
+                f"Average level: {lvl_stats['avg_level']:.2f}"
+            )
+        return values
+
     @staticmethod
     def player_cards_window(data: Dict, stats: Dict) -> sg.Window:
         """Player cards window.
@@ -195,23 +386,12 @@ class CustomWindows:
             data (Dict): Dictionary with player information.
             stats (Dict): Dictionary with cards stats.
         """
-        fav_card = data["currentFavouriteCard"]["name"]
-        n_collected, n_all = stats["collected"]
-        layout = [
-            [sg.T(f"Obtained cards: {n_collected}/{n_all}")],
-            [sg.T(f"Favorite card: {fav_card}")],
-        ]
-        max_level_names = {13: "Common", 11: "Rare", 8: "Epic", 5: "Legendary"}
+        values = cw.player_cards_values(data, stats)
+        layout = cw.texts(values, ("t.collected", "t.favourite"))
         frames = []
-        for max_lvl, name in max_level_names.items():
-            lvl_stats = stats[max_lvl]
-            frame = [
-                [sg.T(f"Remaining cards: {lvl_stats['rem_cards']}")],
-                [sg.T(f"Remaining gold: {lvl_stats['rem_gold']}")],
-                [sg.T(f"Progress: {lvl_stats['progress']:.2f}%")],
-                [sg.T(f"Average level: {lvl_stats['avg_level']:.2f}")],
-            ]
-            frames.append(cw.F(name, frame))
+        for max_lvl, name in CARD_RARITIES.items():
+            keys = [key for key in values if key.startswith(f"t.{max_lvl}.")]
+            frames.append(cw.F(name, cw.texts(values, keys)))
 
         layout.append([frames[0], frames[1]])
         layout.append([frames[2], frames[3]])
@@ -219,6 +399,52 @@ class CustomWindows:
 
         return sg.Window(TITLE, layout)
 
+    @staticmethod
+    def player_war_values(
+        data: Dict, best_32: List[int], stats: Dict
+    ) -> Dict[str, str]:
+        """Texts of the player war window, by element key.
+
+        Args:
+            data (Dict): Dictionary with player information.
+            best_32 (List): List with best 32 stats levels.
+            stats (Dict): Dictionary with war stats.
+        """
+        best_decks = RoyaleApi.get_war_decks(data["cards"])
+        decks = {}
+        for i in range(N_WAR_DECKS):
+            if best_decks is None or i >= len(best_decks["decks"]):
+                decks[f"t.deck.{i}"] = f"Deck {i + 1}: -"
+                continue
+            level = best_decks["levels"][i] / len(best_decks["decks"][i])
+            names = ", ".join(best_decks["decks"][i])
+            decks[f"t.deck.{i}"] = f"Deck {i + 1}: {level:.2f}\n{names}"
+        winrate = RoyaleApi.get_winrate(data["losses"], data["wins"]) / 100.0
+        projection = WarProjection(
+            [data["tag"]], [best_32], [winrate], [stats["war_points"]]
+        ).get(data["tag"])
+        return {
+            "t.avg_level": f"Average level: {st.mean(best_32):.2f}",
+            "t.min_daily": f"Minimum daily WP: {projection['min_daily']}",
+            "t.max_daily": f"Maximum daily WP: {projection['max_daily']}",
+            "t.daily": f"Estimated daily WP: {int(projection['expected_daily'])}",
+            "t.min_weekly": f"Minimum war WP: {projection['min_weekly']}",
+            "t.max_weekly": f"Maximum war WP: {projection['max_weekly']}",
+            "t.weekly": (
+                f"Estimated war WP: {WEEK_DAYS * int(projection['expected_daily'])}"
+            ),
+            "t.total_wp": f"Total WP: {sum(stats['war_points']):.0f}",
+            "t.total_fp": f" \u21B3 FP: {sum(stats['fame_points']):.0f}",
+            "t.total_rp": f" \u21B3 RP: {sum(stats['repair_points']):.0f}",
+            "t.avg_wp": (
+                f"Average WP: {sum(stats['war_points']) / len(stats['war_points'])}"
+            ),
+            "t.current_wp": f"Current WP: {stats['current_war_points']}",
+            "t.current_fp": f" \u21B3 FP: {stats['current_fame_points']}",
+            "t.current_rp": f" \u21B3 RP: {stats['current_repair_points']}",
+            **decks,
+        }
+
     @staticmethod
     def player_war_window(data: Dict, best_32: List[int], stats: Dict) -> sg.Window:
         """Player war window.
@@ -228,33 +454,16 @@ class CustomWindows:
             best_32 (List): List with best 32 stats levels.
             stats (Dict): Dictionary with war stats.
         """
-        winrate = RoyaleApi.get_winrate(data["losses"], data["wins"]) / 100.0
-        base_fp = sum(best_32)
-        est_fp = int(winrate * (2 * base_fp) + (1 - winrate) * base_fp)
-        decks = [
-            [sg.T(f"Average level: {st.mean(best_32):.2f}")],
-            [sg.T(f"Minimum daily WP: {base_fp}")],
-            [sg.T(f"Maximum daily WP: {2 * base_fp}")],
-            [sg.T(f"Estimated daily WP: {est_fp}")],
-            [sg.HSep()],
-            [sg.T(f"Minimum war WP: {7 * base_fp}")],
-            [sg.T(f"Maximum war WP: {14 * base_fp}")],
-            [sg.T(f"Estimated war WP: {7 * est_fp}")],
-        ]
-        war_stats = [
-            [sg.T(f"Total WP: {sum(stats['war_points']):.0f}")],
-            [sg.T(f" \u21B3 FP: {sum(stats['fame_points']):.0f}")],
-            [sg.T(f" \u21B3 RP: {sum(stats['repair_points']):.0f}")],
-            [
-                sg.T(
-                    f"Average WP: {sum(stats['war_points']) / len(stats['war_points'])}"
-                )
-            ],
-        ]
-        current_war = [
-            [sg.T(f"Current WP: {stats['current_war_points']}")],
-            [sg.T(f" \u21B3 FP: {stats['current_fame_points']}")],
-            [sg.T(f" \u21B3 RP: {stats['current_repair_points']}")],
+        values = cw.player_war_values(data, best_32, stats)
+        keys = list(values)
+        decks = [*cw.texts(values, keys[:4]), [sg.HSep()], *cw.texts(values, keys[4:7])]
+        war_stats = cw.texts(values, keys[7:11])
+        current_war = cw.texts(values, keys[11:14])
+        # Room for the card names of the decks, they change with the player
+        war_decks = [
+            [sg.T(values[key], key=key, size=(48, 3))]
+            for key in keys
+            if key.startswith("t.deck.")
         ]
         h = "WP: War Points\nFP: Fame Points\nRP: Repair Points"
         layout = [
@@ -270,6 +479,7 @@ class CustomWindows:
                                 ]
                             ),
                         ],
+                        [cw.F("Best war decks", war_decks)],
                     ]
                 )
             ],
@@ -278,198 +488,86 @@ class CustomWindows:
 
         return sg.Window(TITLE, layout)
 
-
-class RoyaleApi:
-
-    token = None
-
     @staticmethod
-    def get_request(url: str, params: Optional[Any] = None) -> Dict:
-        """Get request.
+    def clan_values(
+        clan_tag: str,
+        table: ClanTable,
+        loading: bool = False,
+        finish: Optional[List[Dict]] = None,
+    ) -> Dict[str, Any]:
+        """Values of the clan members table window, by element key.
 
         Args:
-            url: URL of the request.
-            params: Optional parameters of the request.
-
-        Returns:
-            Dict: JSON response.
+            clan_tag (str): Clan tag.
+            table (ClanTable): Members table.
+            loading (bool): Whether members are still being loaded. Defaults to
+                False.
+            finish (List[Dict]): Projected finish of the current river race, see
+                clan.project_clan. Defaults to None (not projected yet).
         """
-        headers = {
-            "Accept": "application/json",
-            "authorization": f"Bearer {RoyaleApi.token}",
-        }
-        req = None
-        try:
-            req = requests.get(url, headers=headers, params=params)
-
-            if req.status_code != 200:
-                raise ConnectionError
-
-        except Exception:
-            code_info = "" if not req else f"(code: {req.status_code})"
-            sg.popup_error(
-                f"Couldn't get API data! {code_info}",
-                "This application can't work without API data.",
-                "Common errors:",
-                " - Internet connection error",
-                " - Invalid API token",
-                " - Invalid player/clan tag",
-                "Please, check these issues and try again.",
-                title="API error",
+        status = " (loading...)" if loading else ""
+        own = [clan for clan in finish or () if clan["tag"] == clan_tag]
+        projected = "-"
+        if own:
+            projected = (
+                f"#{own[0]['rank']}/{len(finish)} with {own[0]['projected']:.0f} "
+                f"fame ({own[0]['fame']} now)"
             )
-            sys.exit()
-
-        return req.json()
-
-    @staticmethod
-    def get_player_data(tag: str, query: str = "") -> Dict:
-        """Get player data.
-
-        Args:
-            tag (str): Player tag.
-            query (str): Query type. Defaults to "".
-
-        Returns:
-            Dict: Player data in JSON format.
-        """
-        if not tag.startswith("#"):
-            tag = "#" + tag
-        tag = tag.replace("#", "%23")
-        url = f"https://api.clashroyale.com/v1/players/{tag}/{query}"
-        return RoyaleApi.get_request(url)
-
-    @staticmethod
-    def get_clan_data(tag: str, query: str = "") -> Dict:
-        """Get clan data.
-
-        Args:
-            tag (str): Clan tag.
-            query (str): Query type. Defaults to "".
-
-        Returns:
-            Dict: Clan data in JSON format.
-        """
-        if not tag.startswith("#"):
-            tag = "#" + tag
-        tag = tag.replace("#", "%23")
-        url = f"https://api.clashroyale.com/v1/clans/{tag}/{query}"
-        return RoyaleApi.get_request(url)
+        return {
+            "t.clan": f"Clan {clan_tag}: {len(table)} members{status}",
+            "t.finish": f"Projected race finish: {projected}",
+            "tbl.members": table.page_values(),
+            "t.page": f"Page {table.page + 1}/{table.n_pages}",
+            "cmb.sort": dict(COLUMNS)[table.sort_key],
+            "chk.descending": table.descending,
+        }
 
     @staticmethod
-    def get_winrate(n_losses: int, n_wins: int) -> float:
-        """Compute winrate.
+    def clan_window(
+        clan_tag: str, table: ClanTable, loading: bool = False
+    ) -> sg.Window:
+        """Clan members table window.
 
-        Args:
-            n_losses (int): Number of losses.
-            n_wins (int): Number of wins.
-
-        Returns:
-            float: Winrate.
-        """
-        try:
-            return 100.0 * n_wins / (n_wins + n_losses)
-        except Exception:
-            return -1.0
-
-    @staticmethod
-    def get_cards_stats(player_cards: Dict) -> Dict:
-        """Get cards stats.
+        The table shows a page of members, sorted with the Sort button.
 
         Args:
-            player_cards (Dict): Player cards in JSON format.
-
-        Returns:
-            Dict: Cards stats.
+            clan_tag (str): Clan tag.
+            table (ClanTable): Members table.
+            loading (bool): Whether members are still being loaded. Defaults to
+                False.
         """
-
-        def get_remaining_cards(level: int, max_level: int, count: int):
-            # Return 0 if maxed
-            if level == max_level:
-                return 0
-            n_cards = [1, 2, 4, 10, 20, 50, 100, 200, 400, 800, 1000, 2000, 5000]
-            return sum(n_cards[level:max_level]) - count
-
-        def get_remaining_gold(level: int, max_level: int):
-            # Return 0 if maxed
-            if level == max_level:
-                return 0
-            n_gold = [100000, 50000, 20000, 8000, 4000, 2000, 1000, 400, 150, 50, 20, 5]
-            if max_level == 5:
-                n_gold.append(0)
-                n_gold[3] = 5000
-            if max_level == 8:
-                n_gold[6] = 400
-            return sum(n_gold[: max_level - level])
-
-        empty = {"rem_cards": 0, "rem_gold": 0, "levels": []}
-        stats = {13: dc(empty), 11: dc(empty), 8: dc(empty), 5: dc(empty)}
-        collected = set()
-
-        levels = []
-        for card in player_cards:
-            collected.add(card["name"])
-            lvl, max_lvl, cnt = card["level"], card["maxLevel"], card["count"]
-            stats[max_lvl]["rem_cards"] += get_remaining_cards(lvl, max_lvl, cnt)
-            stats[max_lvl]["rem_gold"] += get_remaining_gold(lvl, max_lvl)
-            stats[max_lvl]["levels"].append(lvl)  # type: ignore
-            levels.append(lvl + (13 - max_lvl))
-
-        stats["best_32"] = sorted(levels, reverse=True)[:32]  # type: ignore
-        all_cards = RoyaleApi.get_request("https://api.clashroyale.com/v1/cards")
-        for card in all_cards["items"]:
-            if card["name"] not in collected:
-                lvl, max_lvl, cnt = 0, card["maxLevel"], 0
-                stats[max_lvl]["rem_cards"] += get_remaining_cards(lvl, max_lvl, cnt)
-                stats[max_lvl]["rem_gold"] += get_remaining_gold(lvl, max_lvl)
-                stats[max_lvl]["levels"].append(lvl)  # type: ignore
-
-        stats["collected"] = (len(collected), len(all_cards["items"]))  # type: ignore
-        for max_lvl in (13, 11, 8, 5):
-            levels: Iterable[float] = stats[max_lvl]["levels"]  # type: ignore
-            stats[max_lvl]["progress"] = st.mean(levels) * (100.0 / max_lvl)
-            stats[max_lvl]["avg_level"] = st.mean(levels) + (13 - max_lvl)
-
-        return stats
-
-    @staticmethod
-    def get_war_stats(player_tag: str, river_race_log: Dict, curr_river_race) -> Dict:
-        """Get war stats.
-
-        Args:
-            player_tag (str): Player tag.
-            river_race_log (Dict): Clan river race log data in JSON format.
-            curr_river_race (Dict): Clan current river race data in JSON format.
-
-        Returns:
-            Dict: War stats.
-        """
-        clan_tag = curr_river_race["clan"]["tag"]
-        stats: Dict[str, List] = {
-            "fame_points": [],
-            "repair_points": [],
-            "war_points": [],
-        }
-        for race in river_race_log["items"]:
-            for clan in race["standings"]:
-                if clan["clan"]["tag"] != clan_tag:
-                    continue
-                for player in clan["clan"]["participants"]:
-                    if player["tag"] != player_tag:
-                        continue
-                    stats["fame_points"].append(float(player["fame"]))
-                    stats["repair_points"].append(float(player["repairPoints"]))
-                    stats["war_points"].append(
-                        float(player["fame"]) + float(player["repairPoints"])
-                    )
-
-        for player in curr_river_race["clan"]["participants"]:
-            if player["tag"] != player_tag:
-                continue
-            stats["current_fame_points"] = player["fame"]
-            stats["current_repair_points"] = player["repairPoints"]
-            stats["current_war_points"] = player["fame"] + player["repairPoints"]
-
-        return stats
+        values = cw.clan_values(clan_tag, table, loading)
+        headings = [heading for _, heading in COLUMNS]
+        layout = [
+            [sg.T(values["t.clan"], key="t.clan", size=(30, 1))],
+            [sg.T(values["t.finish"], key="t.finish", size=(55, 1))],
+            [
+                sg.Table(
+                    values["tbl.members"],
+                    headings,
+                    auto_size_columns=False,
+                    col_widths=[max(len(heading), 10) for heading in headings],
+                    num_rows=table.page_size,
+                    justification="l",
+                    key="tbl.members",
+                )
+            ],
+            [
+                sg.B("Previous", key="b.prev"),
+                sg.T(values["t.page"], key="t.page", size=(12, 1)),
+                sg.B("Next", key="b.next"),
+            ],
+            [
+                sg.T("Sort by"),
+                sg.Combo(headings, values["cmb.sort"], key="cmb.sort", readonly=True),
+                sg.Checkbox(
+                    "Descending", values["chk.descending"], key="chk.descending"
+                ),
+                sg.B("Sort"),
+            ],
+            [sg.B("\u2190")],
+        ]
+        return sg.Window(TITLE, layout)
 
 
 cw = CustomWindows
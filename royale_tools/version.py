@@ -0,0 +1,2 @@
+# Package version, also read by setup.py so it is never looked up at runtime
+VERSION = "0.1"
@@ -0,0 +1,63 @@
+from typing import Dict, List
+
+
+class WarIndex:
+    """War stats of every clan member, indexed by player tag.
+
+    The river race data is scanned once, only looking at the clan's own standings,
+    so the stats of any player are then available in constant time.
+
+    Args:
+        river_race_log (Dict): Clan river race log data in JSON format.
+        curr_river_race (Dict): Clan current river race data in JSON format.
+    """
+
+    def __init__(self, river_race_log: Dict, curr_river_race: Dict):
+        self.clan_tag = curr_river_race["clan"]["tag"]
+        self.stats: Dict[str, Dict] = {}
+        for race in river_race_log["items"]:
+            for clan in race["standings"]:
+                if clan["clan"]["tag"] != self.clan_tag:
+                    continue
+                for player in clan["clan"]["participants"]:
+                    stats = self.stats.get(player["tag"])
+                    if stats is None:
+                        stats = self.stats[player["tag"]] = self.empty()
+                    fame, repair = float(player["fame"]), float(player["repairPoints"])
+                    stats["fame_points"].append(fame)
+                    stats["repair_points"].append(repair)
+                    stats["war_points"].append(fame + repair)
+
+        for player in curr_river_race["clan"]["participants"]:
+            stats = self.stats.get(player["tag"])
+            if stats is None:
+                stats = self.stats[player["tag"]] = self.empty()
+            stats["current_fame_points"] = player["fame"]
+            stats["current_repair_points"] = player["repairPoints"]
+            stats["current_war_points"] = player["fame"] + player["repairPoints"]
+
+    @staticmethod
+    def empty() -> Dict[str, List]:
+        """War stats of a player without river race participations."""
+        return {"fame_points": [], "repair_points": [], "war_points": []}
+
+    def get(self, player_tag: str) -> Dict:
+        """Get the war stats of a player.
+
+        Args:
+            player_tag (str): Player tag.
+
+        Returns:
+            Dict: War stats, shared with the index so it must not be modified.
+        """
+        return self.stats.get(player_tag) or self.empty()
+
+    def __contains__(self, player_tag: str) -> bool:
+        return player_tag in self.stats
+
+    def __len__(self) -> int:
+        return len(self.stats)
+
+    def items(self):
+        """Pairs of player tag and war stats of every indexed player."""
+        return self.stats.items()
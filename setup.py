@@ -1,9 +1,14 @@
 """Setup configuration file."""
+
+import re
+
 from setuptools import find_packages, setup
 
 MODULE_NAME = "royale-tools"
 PACKAGE_NAME = "royale-tools"
-VERSION = "0.1"
+
+with open("royale_tools/version.py", "r") as f:
+    VERSION = re.search(r'VERSION = "(.+)"', f.read()).group(1)  # type: ignore
 
 with open("README.md", "r") as f:
     long_description = f.read()
@@ -20,4 +25,14 @@ setup(
     packages=find_packages(),
     platforms="any",
     python_requires=">=3.7",
+    extras_require={
+        # Streamed parsing of the clan's own river race standings
+        "streaming": ["ijson>=3.1"],
+    },
+    entry_points={
+        "console_scripts": [
+            "royale-tools=royale_tools.app:main",
+            "royale-tools-cli=royale_tools.cli:main",
+        ],
+    },
 )
@@ -0,0 +1,29 @@
+import pytest
+
+from royale_tools.api import HTTP_SETTINGS, RoyaleApi
+from royale_tools.mock_api import MockApi
+
+
+@pytest.fixture
+def http_settings():
+    """Restore the HTTP settings of RoyaleApi after the test."""
+    previous = {key: getattr(RoyaleApi, key) for key in HTTP_SETTINGS}
+    yield
+    RoyaleApi.configure(**previous)
+
+
+@pytest.fixture
+def mock_api_options():
+    """Arguments of the MockApi of the api fixture.
+
+    Override or parametrize it, e.g. with {"data": SyntheticData(n_members=10)}.
+    """
+    return {}
+
+
+@pytest.fixture
+def api(http_settings, mock_api_options):
+    """Local MockApi server, with RoyaleApi pointed to it."""
+    with MockApi(**mock_api_options) as api:
+        RoyaleApi.configure(base_url=api.base_url)
+        yield api
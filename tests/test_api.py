@@ -0,0 +1,93 @@
+import threading
+from concurrent.futures import CancelledError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from royale_tools.api import RoyaleApi
+from royale_tools.exceptions import ApiError, NotFoundError
+
+
+def test_session_keep_alive(api):
+    n_connections = api.n_connections
+    for _ in range(5):
+        data = RoyaleApi.get_player_data("#ABCP01")
+    assert data["tag"] == "#ABCP01"
+    assert data["clan"]["tag"] == "#ABC"
+    assert api.n_connections - n_connections <= 1
+
+
+def test_configure_unknown_setting():
+    with pytest.raises(ValueError):
+        RoyaleApi.configure(pool=3)
+
+
+def test_prefetch_player(api, monkeypatch):
+    # The first requests only return once all of them were sent
+    barrier = threading.Barrier(3, timeout=5)
+
+    def concurrent(function):
+        def wait_others(*args):
+            barrier.wait()
+            return function(*args)
+
+        return staticmethod(wait_others)
+
+    for name in ("get_player_data", "get_cards"):
+        monkeypatch.setattr(RoyaleApi, name, concurrent(getattr(RoyaleApi, name)))
+    done = []
+    data = RoyaleApi.prefetch_player("#ABCP01", lambda name, _: done.append(name))
+    assert done[0] != "riverracelog"
+    assert sorted(done) == sorted(data)
+    assert data["currentriverrace"]["clan"]["tag"] == "#ABC"
+
+
+def test_prefetch_player_cancel(api, monkeypatch):
+    cancel, release, finished = threading.Event(), threading.Event(), threading.Event()
+
+    def get_cards():
+        release.wait(5)
+        finished.set()
+        return {}
+
+    # The cards request is still running when the prefetch is cancelled
+    monkeypatch.setattr(RoyaleApi, "get_cards", staticmethod(get_cards))
+    cancel.set()
+    with pytest.raises(CancelledError):
+        RoyaleApi.prefetch_player("#ABCP02", cancel=cancel)
+    assert not finished.is_set()
+    release.set()
+
+
+def test_api_error(api):
+    with pytest.raises(NotFoundError) as info:
+        RoyaleApi.get_clan_data("#ABC", "unknown")
+    assert info.value.status_code == 404
+
+
+@pytest.mark.parametrize("own_only", [False, True])
+def test_invalid_json(own_only, http_settings):
+    class Maintenance(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = b"<html>maintenance</html>"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Maintenance)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    RoyaleApi.configure(base_url=f"http://127.0.0.1:{server.server_port}/v1")
+    try:
+        with pytest.raises(ApiError):
+            if own_only:
+                RoyaleApi.get_clan_data("#ABC", "currentriverrace", own_only=True)
+            else:
+                RoyaleApi.get_player_data("#ABCP01")
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,106 @@
+import json
+import threading
+
+import PySimpleGUI as sg
+
+from royale_tools.app import CONFIG_ATTRS, App
+from royale_tools.utils import WindowManager
+
+
+class Window:
+    """Window stand-in, PySimpleGUI windows need a display."""
+
+    def finalize(self):
+        pass
+
+
+class EventWindow:
+    """Window stand-in with scripted events, recording the events sent to it."""
+
+    def __init__(self, events=()):
+        self.events = list(events)
+        self.sent = []
+        self.done = threading.Event()
+
+    def read(self):
+        return self.events.pop(0)
+
+    def write_event_value(self, key, value):
+        self.sent.append((key, value))
+        if key == "-DONE-":
+            self.done.set()
+
+    def finalize(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_config_saved_with_open_windows(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("PySimpleGUI.theme", lambda *args: "Reddit")
+    # The app without its event loop
+    app = App.__new__(App)
+    app.token, app.player_tag, app.clan_tag, app.theme = "x", "#ABCP01", None, "Dark"
+    app.windows = WindowManager()
+    app.windows.show("main", Window)
+    app.save_config()
+    with open(".royale-tools-config") as f:
+        assert json.load(f) == {"token": "x", "player_tag": "#ABCP01", "theme": "Dark"}
+    loaded = App.__new__(App)
+    loaded.clan_tag = None
+    loaded.load_config()
+    assert {attr: getattr(loaded, attr) for attr in CONFIG_ATTRS} == {
+        "token": "x",
+        "player_tag": "#ABCP01",
+        "clan_tag": None,
+        "theme": "Dark",
+    }
+
+
+def test_task_events_tagged():
+    app = App.__new__(App)
+    window = EventWindow()
+
+    def task(report, cancel):
+        report(1)
+        return 2
+
+    task_id = app.run_task(window, task, threading.Event())
+    assert window.done.wait(5)
+    assert window.sent == [("-PROGRESS-", (task_id, 1)), ("-DONE-", (task_id, 2))]
+    assert app.run_task(window, task, threading.Event()) != task_id
+
+
+def test_events_of_earlier_tasks_ignored(monkeypatch):
+    app = App.__new__(App)
+    monkeypatch.setattr(app, "run_task", lambda *args: 2)
+    # A cancelled task sent its events to the same window
+    window = EventWindow(
+        [
+            ("-PROGRESS-", {"-PROGRESS-": (1, "old")}),
+            ("-PROGRESS-", {"-PROGRESS-": (2, "new")}),
+            ("-DONE-", {"-DONE-": (1, "old result")}),
+            ("-DONE-", {"-DONE-": (2, "result")}),
+        ]
+    )
+    progress = []
+    assert app.load(window, None, progress.append) == "result"
+    assert progress == ["new"]
+
+
+def test_closed_window_rebuilt(monkeypatch):
+    monkeypatch.setattr("PySimpleGUI.theme", lambda *args: "Reddit")
+    app = App.__new__(App)
+    app.player_tag = "#ABCP01"
+    app.windows = WindowManager()
+    built = []
+
+    def build(default_tag):
+        built.append(EventWindow([(sg.WIN_CLOSED, None)]))
+        return built[-1]
+
+    assert app.select_tag("player_tag", build) is None
+    assert app.select_tag("player_tag", build) is None
+    assert len(built) == 2
@@ -0,0 +1,129 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+import aiohttp.web  # noqa: E402
+from aiohttp.test_utils import TestServer  # noqa: E402
+
+from royale_tools import async_api  # noqa: E402
+from royale_tools.exceptions import ApiError, NotFoundError  # noqa: E402
+from royale_tools.mock_api import SyntheticData, aiohttp_app  # noqa: E402
+
+
+def run(test, latency: float = 0.0, **kwargs):
+    async def main():
+        async with TestServer(
+            aiohttp_app(SyntheticData(n_members=5), latency)
+        ) as server:
+            base_url = str(server.make_url("/v1"))
+            async with async_api.AsyncRoyaleApi("token", base_url, **kwargs) as api:
+                return await test(api)
+
+    return asyncio.run(main())
+
+
+def test_endpoints():
+    async def test(api):
+        return await asyncio.gather(
+            api.get_player_data("#ABCP01"),
+            api.get_clan_data("ABC", "currentriverrace"),
+            api.get_cards(),
+        )
+
+    player, race, cards = run(test)
+    assert player["clan"]["tag"] == "#ABC"
+    assert race["clan"]["tag"] == "#ABC"
+    assert len(cards["items"]) == 100
+
+
+def test_typed_errors():
+    async def test(api):
+        await api.get_clan_data("#ABC", "unknown")
+
+    with pytest.raises(NotFoundError):
+        run(test)
+
+
+def test_interactive_requests_first():
+    async def test(api):
+        order = []
+
+        async def get(tag, priority):
+            await api.get_player_data(tag, priority=priority)
+            order.append(tag)
+
+        background = [get(f"#ABCP0{i}", async_api.BACKGROUND) for i in range(4)]
+        tasks = [asyncio.ensure_future(task) for task in background]
+        await asyncio.sleep(0)
+        await get("#ME", async_api.INTERACTIVE)
+        await asyncio.gather(*tasks)
+        return order
+
+    order = run(test, latency=0.05, max_concurrency=1)
+    # Only the request already in flight is served before the interactive one
+    assert order.index("#ME") <= 1
+
+
+def test_rate_limit():
+    async def test(api):
+        start = time.monotonic()
+        await asyncio.gather(*(api.get_cards() for _ in range(6)))
+        return time.monotonic() - start
+
+    assert run(test, rate=20.0, burst=1.0) >= 5 / 20.0
+
+
+def test_retry_after():
+    responses = [
+        aiohttp.web.json_response(
+            {"reason": "requestThrottled"}, status=429, headers={"Retry-After": "1"}
+        ),
+        aiohttp.web.json_response({"items": []}),
+    ]
+
+    async def cards(request):
+        return responses.pop(0)
+
+    async def main():
+        app = aiohttp.web.Application()
+        app.router.add_get("/v1/cards", cards)
+        async with TestServer(app) as server:
+            base_url = str(server.make_url("/v1"))
+            async with async_api.AsyncRoyaleApi("token", base_url) as api:
+                start = time.monotonic()
+                await api.get_cards()
+                return time.monotonic() - start
+
+    # Retried once after Retry-After, not twice as late
+    assert 1.0 <= asyncio.run(main()) < 1.5
+
+
+@pytest.mark.parametrize("content_type", ["application/json", "text/html"])
+def test_invalid_json(content_type):
+    async def cards(request):
+        return aiohttp.web.Response(text="<html>", content_type=content_type)
+
+    async def main():
+        app = aiohttp.web.Application()
+        app.router.add_get("/v1/cards", cards)
+        async with TestServer(app) as server:
+            base_url = str(server.make_url("/v1"))
+            async with async_api.AsyncRoyaleApi("token", base_url) as api:
+                await api.get_cards()
+
+    with pytest.raises(ApiError):
+        asyncio.run(main())
+
+
+def test_retry_after_seconds():
+    assert async_api.retry_after_seconds("3") == 3.0
+    assert async_api.retry_after_seconds(None) is None
+    assert async_api.retry_after_seconds("soon") is None
+    later = datetime.now(timezone.utc) + timedelta(seconds=30)
+    seconds = async_api.retry_after_seconds(format_datetime(later, usegmt=True))
+    assert 28 <= seconds <= 30
+    assert async_api.retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
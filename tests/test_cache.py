@@ -0,0 +1,75 @@
+import pytest
+
+from royale_tools.api import RoyaleApi
+from royale_tools.cache import ResponseCache
+
+
+@pytest.fixture
+def api(api):
+    RoyaleApi.cache = ResponseCache(max_entries=2)
+    yield api
+    RoyaleApi.cache = None
+
+
+def test_endpoint():
+    url = "https://api.clashroyale.com/v1"
+    assert ResponseCache.endpoint(f"{url}/cards") == "cards"
+    assert ResponseCache.endpoint(f"{url}/players/%23ABC/") == "players"
+    assert ResponseCache.endpoint(f"{url}/clans/%23ABC/riverracelog") == "riverracelog"
+
+
+def test_hits_and_eviction(api):
+    for _ in range(3):
+        RoyaleApi.get_cards()
+    assert api.n_requests == 1
+    RoyaleApi.get_player_data("#ABCP01")
+    RoyaleApi.get_player_data("#ABCP02")
+    RoyaleApi.get_cards()
+    stats = RoyaleApi.cache.stats()
+    assert api.n_requests == 4
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 4, 2)
+
+
+def test_revalidation(api):
+    RoyaleApi.cache.ttls["currentriverrace"] = 0.0
+    first = RoyaleApi.get_clan_data("#ABC", "currentriverrace")
+    second = RoyaleApi.get_clan_data("#ABC", "currentriverrace")
+    assert first is second
+    assert api.n_requests == 2
+    assert RoyaleApi.cache.revalidations == 1
+
+
+def test_revalidation_of_evicted_response(api, monkeypatch):
+    cache = RoyaleApi.cache
+    cache.ttls["currentriverrace"] = 0.0
+    first = RoyaleApi.get_clan_data("#ABC", "currentriverrace")
+    revalidate = cache.revalidate
+
+    def evicted(*args):
+        cache.clear()
+        return revalidate(*args)
+
+    monkeypatch.setattr(cache, "revalidate", evicted)
+    second = RoyaleApi.get_clan_data("#ABC", "currentriverrace")
+    # The 304 answer is followed by a full request
+    assert second == first and second is not first
+    assert api.n_requests == 3
+    assert cache.revalidations == 0
+
+
+def test_revalidation_validators():
+    cache = ResponseCache()
+    url = "https://x/v1/cards"
+    cache.put(url, None, {"items": []}, {"ETag": '"1"', "Last-Modified": "a"}, 0.0)
+    cache.revalidate(url, None, {"ETag": '"2"', "Last-Modified": "b"})
+    cache.entries[cache.key(url)]["expires"] = 0.0
+    assert cache.get(url)[1] == {"If-None-Match": '"2"', "If-Modified-Since": "b"}
+
+
+def test_persistence(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = ResponseCache(path=path)
+    cache.put("https://x/v1/cards", None, {"items": []}, {"ETag": '"1"'})
+    cache.save()
+    data, _ = ResponseCache(path=path).get("https://x/v1/cards")
+    assert data == {"items": []}
@@ -0,0 +1,142 @@
+import threading
+from concurrent.futures import CancelledError
+
+import pytest
+
+from royale_tools import clan
+from royale_tools.api import RoyaleApi
+from royale_tools.cache import ResponseCache
+from royale_tools.exceptions import ApiError
+from royale_tools.mock_api import SyntheticData
+from royale_tools.models import Player
+
+
+@pytest.fixture
+def mock_api_options():
+    return {"data": SyntheticData(n_members=10, n_races=3)}
+
+
+def test_scan_clan(api):
+    done, streamed = [], []
+    rows = clan.scan_clan(
+        "#ABC", on_done=lambda *args: done.append(args), on_row=streamed.append
+    )
+    assert [row["tag"] for row in rows] == api.data.member_tags("#ABC")
+    assert sorted(streamed, key=lambda row: row["tag"]) == rows
+    assert set(rows[0]) == {key for key, _ in clan.COLUMNS}
+    assert done[-1] == (10, 10)
+    # Members, river race log, current river race, cards and 10 members
+    assert api.n_requests == 14
+
+
+def test_scan_clan_member_error(api, monkeypatch):
+    get_member, failed = clan.get_member, api.data.member_tags("#ABC")[3]
+
+    def get_failing_member(tag):
+        if tag == failed:
+            raise ApiError("Player not found", 404)
+        return get_member(tag)
+
+    monkeypatch.setattr(clan, "get_member", get_failing_member)
+    rows = clan.scan_clan("#ABC")
+    assert len(rows) == 10
+    assert rows[3]["tag"] == failed and rows[3]["error"] == "Player not found"
+    assert rows[3]["trophies"] == 0
+    assert all("error" not in row for row in rows[:3] + rows[4:])
+
+
+def test_scan_clan_cancel(api, monkeypatch):
+    cancel, release, finished = threading.Event(), threading.Event(), threading.Event()
+
+    def get_member(tag):
+        release.wait(5)
+        finished.set()
+
+    # The member requests are still running when the scan is cancelled
+    monkeypatch.setattr(clan, "get_member", get_member)
+    cancel.set()
+    with pytest.raises(CancelledError):
+        clan.scan_clan("#ABC", all_cards={}, cancel=cancel)
+    assert not finished.is_set()
+    release.set()
+
+
+def test_project_clan(api):
+    RoyaleApi.cache = ResponseCache()
+    try:
+        clan.scan_clan("#ABC")
+        n_requests = api.n_requests
+        projection, finish = clan.project_clan("#ABC")
+    finally:
+        RoyaleApi.cache = None
+    # Only the full current river race isn't cached
+    assert api.n_requests == n_requests + 1
+    assert len(projection) == 10
+    assert len(finish) == len(api.data.current_river_race("#ABC")["clans"])
+    assert "#ABC" in {standing["tag"] for standing in finish}
+
+
+def test_member_row_of_model():
+    data = SyntheticData(n_members=5, n_races=3)
+    player = data.player("#ABCP01")
+    war_index = RoyaleApi.get_war_index(
+        data.river_race_log("#ABC"), data.current_river_race("#ABC")
+    )
+    row = clan.get_member_row(Player.from_json(player), data.cards(), war_index)
+    assert row == clan.get_member_row(player, data.cards(), war_index)
+    assert row["war_points"] == sum(war_index.get("#ABCP01")["war_points"])
+
+
+def test_scan_clans_share_cards(api):
+    result = clan.scan_clans(["#ABC", "#DEF"])
+    assert list(result) == ["#ABC", "#DEF"]
+    assert api.n_requests == 1 + 2 * 13
+
+
+def test_sort_rows():
+    rows = [{"war_points": 2}, {"war_points": 3}, {"war_points": 1}]
+    assert clan.sort_rows(rows, "war_points") == [rows[1], rows[0], rows[2]]
+
+
+def table_row(tag, trophies, name=""):
+    row = {key: 0 for key, _ in clan.COLUMNS}
+    row.update(tag=tag, trophies=trophies, name=name or tag)
+    return row
+
+
+def test_clan_table_pages():
+    table = clan.ClanTable(page_size=2)
+    for i, trophies in enumerate([300, 100, 500, 200, 400]):
+        table.set_row(table_row(f"#P{i}", trophies))
+    assert table.n_pages == 3
+    assert [row["trophies"] for row in table.page_rows()] == [500, 400]
+    table.set_page(10)
+    assert [row["trophies"] for row in table.page_rows()] == [100]
+    table.sort("trophies", descending=False)
+    assert table.page == 0
+    assert [row["trophies"] for row in table.page_rows()] == [100, 200]
+    assert table.page_values()[0] == clan.format_row(table.rows["#P1"])
+
+
+def test_clan_table_sort_keys():
+    table = clan.ClanTable()
+    for name in ["bob", "Alice", "carol"]:
+        table.set_row(table_row(f"#{name}", 0, name))
+    table.sort("name", descending=False)
+    assert [row["name"] for row in table.page_rows()] == ["Alice", "bob", "carol"]
+
+
+def test_clan_table_incremental():
+    table = clan.ClanTable(page_size=2)
+    assert table.set_row(table_row("#A", 300))
+    assert table.set_row(table_row("#B", 200))
+    # Below the visible page
+    assert not table.set_row(table_row("#C", 100))
+    assert table.set_row(table_row("#D", 400))
+    # An update moves the row, a row leaving the page also changes it
+    assert not table.set_row(table_row("#C", 150))
+    assert table.set_row(table_row("#A", 50))
+    assert len(table) == 4
+    assert [row["tag"] for row in table.page_rows()] == ["#D", "#B"]
+    table.set_page(1)
+    assert [row["tag"] for row in table.page_rows()] == ["#C", "#A"]
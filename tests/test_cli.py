@@ -0,0 +1,67 @@
+import csv
+import io
+import json
+
+import pytest
+
+from royale_tools import cli
+from royale_tools.api import RoyaleApi
+from royale_tools.mock_api import SyntheticData
+
+
+@pytest.fixture
+def mock_api_options():
+    return {"data": SyntheticData(n_members=5, n_races=3)}
+
+
+def test_players_jsonl(api, capsys):
+    args = ["--token", "x", "--base-url", api.base_url, "players", "ABCP01", "#DEFP02"]
+    assert cli.main(args) == 0
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert {row["tag"] for row in rows} == {"#ABCP01", "#DEFP02"}
+    assert set(rows[0]) == {key for key, _ in cli.COLUMNS}
+
+
+def test_clans_csv(api, capsys):
+    args = ["--token", "x", "--base-url", api.base_url, "--format", "csv"]
+    assert cli.main(args + ["clans", "#ABC", "#DEF"]) == 0
+    rows = list(csv.DictReader(io.StringIO(capsys.readouterr().out)))
+    assert len(rows) == 10
+    assert [row["clan"] for row in rows[::5]] == ["#ABC", "#DEF"]
+
+
+def test_missing_token(monkeypatch, tmp_path, capsys):
+    monkeypatch.delenv(cli.TOKEN_VARIABLE, raising=False)
+    monkeypatch.chdir(tmp_path)
+    assert cli.main(["players", "#ABC"]) == 2
+
+
+def test_export_and_snapshot(api, tmp_path, monkeypatch, capsys):
+    snapshot = str(tmp_path / "abc.rts")
+    args = ["--base-url", api.base_url, "clans", "#ABC"]
+    assert cli.main(["--token", "x", "--export", snapshot] + args) == 0
+    online = capsys.readouterr().out
+    n_requests = api.n_requests
+    monkeypatch.delenv(cli.TOKEN_VARIABLE, raising=False)
+    monkeypatch.chdir(tmp_path)
+    assert cli.main(["--snapshot", snapshot] + args) == 0
+    assert capsys.readouterr().out == online
+    assert api.n_requests == n_requests
+    assert cli.main(["--snapshot", snapshot, "clans", "#DEF"]) == 1
+    assert RoyaleApi.source is None and RoyaleApi.recorder is None
+
+
+def test_metrics(api, tmp_path, capsys):
+    metrics = str(tmp_path / "metrics.prom")
+    args = ["--token", "x", "--base-url", api.base_url, "--metrics", metrics]
+    assert cli.main(args + ["players", "#ABCP01"]) == 0
+    with open(metrics) as f:
+        assert "royale_tools_requests_total" in f.read()
+    assert RoyaleApi.tracer is None
+
+
+@pytest.mark.parametrize("option", [["--rate", "5"], ["--processes", "2"]])
+def test_leaderboard_options(option, capsys):
+    with pytest.raises(SystemExit):
+        cli.main(["--token", "x"] + option + ["players", "#ABCP01"])
+    assert "only supported by the leaderboard mode" in capsys.readouterr().err
@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from royale_tools.api import RoyaleApi
+from royale_tools.exceptions import NotFoundError
+
+
+@pytest.fixture
+def mock_api_options():
+    return {"latency": 0.2}
+    RoyaleApi.coalesce = True
+
+
+def call_concurrently(function, *args, n=5):
+    with ThreadPoolExecutor(n) as executor:
+        futures = [executor.submit(function, *args) for _ in range(n)]
+    return [future.exception() or future.result() for future in futures]
+
+
+def test_concurrent_calls_share_one_request(api):
+    n_coalesced = RoyaleApi.n_coalesced
+    results = call_concurrently(RoyaleApi.get_player_data, "#ABCP01")
+    assert api.n_requests == 1
+    assert RoyaleApi.n_coalesced - n_coalesced == 4
+    assert all(result is results[0] for result in results)
+    assert not RoyaleApi.in_flight
+
+
+def test_different_params_are_not_coalesced(api):
+    with ThreadPoolExecutor(2) as executor:
+        executor.submit(RoyaleApi.get_player_data, "#ABCP01")
+        executor.submit(RoyaleApi.get_player_data, "#ABCP02")
+    assert api.n_requests == 2
+
+
+def test_errors_are_shared(api):
+    results = call_concurrently(RoyaleApi.get_clan_data, "#ABC", "unknown")
+    assert api.n_requests == 1
+    assert all(isinstance(result, NotFoundError) for result in results)
+    assert not RoyaleApi.in_flight
+
+
+def test_coalescing_disabled(api):
+    RoyaleApi.coalesce = False
+    call_concurrently(RoyaleApi.get_player_data, "#ABCP01", n=3)
+    assert api.n_requests == 3
@@ -0,0 +1,83 @@
+import builtins
+
+import pytest
+
+from royale_tools.decks import DeckOptimizer, best_war_decks
+from royale_tools.economy import cards_stats
+from royale_tools.mock_api import SyntheticData
+
+
+@pytest.fixture(scope="module")
+def player_cards():
+    return SyntheticData().player("#ABCP00")["cards"]
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "python"])
+def numpy(request, monkeypatch):
+    if request.param:
+        pytest.importorskip("numpy")
+    else:
+        real_import = builtins.__import__
+
+        def no_numpy(name, *args, **kwargs):
+            if name == "numpy":
+                raise ImportError(name)
+            return real_import(name, *args, **kwargs)
+
+        monkeypatch.setattr(builtins, "__import__", no_numpy)
+
+
+def check_decks(result, player_cards, min_elixir=0, max_elixir=99):
+    cards = {card["name"]: card for card in player_cards}
+    names = [name for deck in result["decks"] for name in deck]
+    assert len(names) == len(set(names)) == 32
+    for deck, levels in zip(result["decks"], result["levels"]):
+        assert len(deck) == 8
+        cost = sum(cards[name]["elixirCost"] for name in deck)
+        assert 8 * min_elixir <= cost <= 8 * max_elixir
+        assert levels == sum(
+            cards[name]["level"] + 13 - cards[name]["maxLevel"] for name in deck
+        )
+    assert result["total"] == sum(result["levels"])
+    return names
+
+
+def test_unconstrained_matches_best_32(player_cards, numpy):
+    result = best_war_decks(player_cards)
+    check_decks(result, player_cards)
+    assert result["optimal"]
+    assert result["total"] == sum(cards_stats(player_cards, {"items": []})["best_32"])
+
+
+def test_required_cards(player_cards, numpy):
+    worst = sorted(player_cards, key=lambda c: c["level"] - c["maxLevel"])[:2]
+    required = [card["name"] for card in worst]
+    result = best_war_decks(player_cards, required=required)
+    names = check_decks(result, player_cards)
+    assert set(required) <= set(names)
+    assert result["optimal"]
+    assert result["total"] < best_war_decks(player_cards)["total"]
+
+
+@pytest.mark.parametrize(
+    "min_elixir, max_elixir", [(3.0, 3.5), (None, 2.5), (5.0, None), (3.5, 3.5)]
+)
+def test_elixir_range(player_cards, min_elixir, max_elixir):
+    result = best_war_decks(player_cards, min_elixir=min_elixir, max_elixir=max_elixir)
+    check_decks(result, player_cards, min_elixir or 0, max_elixir or 99)
+    assert result["optimal"]
+
+
+def test_elixir_range_without_numpy(player_cards, numpy):
+    result = best_war_decks(
+        player_cards, required=[player_cards[0]["name"]], max_elixir=4.0
+    )
+    check_decks(result, player_cards, max_elixir=4.0)
+    assert any(player_cards[0]["name"] in deck for deck in result["decks"])
+
+
+def test_infeasible(player_cards):
+    assert best_war_decks(player_cards, min_elixir=4.0, max_elixir=3.0) is None
+    assert best_war_decks(player_cards[:20]) is None
+    with pytest.raises(ValueError):
+        DeckOptimizer(player_cards, required=["Unknown card"])
@@ -0,0 +1,82 @@
+import statistics as st
+from copy import deepcopy as dc
+from typing import Dict
+
+from royale_tools import economy
+from royale_tools.mock_api import SyntheticData
+
+
+def reference_cards_stats(player_cards: Dict, all_cards: Dict) -> Dict:
+    """Previous RoyaleApi.get_cards_stats implementation."""
+
+    def get_remaining_cards(level: int, max_level: int, count: int):
+        if level == max_level:
+            return 0
+        n_cards = [1, 2, 4, 10, 20, 50, 100, 200, 400, 800, 1000, 2000, 5000]
+        return sum(n_cards[level:max_level]) - count
+
+    def get_remaining_gold(level: int, max_level: int):
+        if level == max_level:
+            return 0
+        n_gold = [100000, 50000, 20000, 8000, 4000, 2000, 1000, 400, 150, 50, 20, 5]
+        if max_level == 5:
+            n_gold.append(0)
+            n_gold[3] = 5000
+        if max_level == 8:
+            n_gold[6] = 400
+        return sum(n_gold[: max_level - level])
+
+    empty = {"rem_cards": 0, "rem_gold": 0, "levels": []}
+    stats = {13: dc(empty), 11: dc(empty), 8: dc(empty), 5: dc(empty)}
+    collected = set()
+    levels = []
+    for card in player_cards:
+        collected.add(card["name"])
+        lvl, max_lvl, cnt = card["level"], card["maxLevel"], card["count"]
+        stats[max_lvl]["rem_cards"] += get_remaining_cards(lvl, max_lvl, cnt)
+        stats[max_lvl]["rem_gold"] += get_remaining_gold(lvl, max_lvl)
+        stats[max_lvl]["levels"].append(lvl)
+        levels.append(lvl + (13 - max_lvl))
+    stats["best_32"] = sorted(levels, reverse=True)[:32]
+    for card in all_cards["items"]:
+        if card["name"] not in collected:
+            lvl, max_lvl, cnt = 0, card["maxLevel"], 0
+            stats[max_lvl]["rem_cards"] += get_remaining_cards(lvl, max_lvl, cnt)
+            stats[max_lvl]["rem_gold"] += get_remaining_gold(lvl, max_lvl)
+            stats[max_lvl]["levels"].append(lvl)
+    stats["collected"] = (len(collected), len(all_cards["items"]))
+    for max_lvl in (13, 11, 8, 5):
+        stats[max_lvl]["progress"] = st.mean(stats[max_lvl]["levels"]) * (
+            100.0 / max_lvl
+        )
+        stats[max_lvl]["avg_level"] = st.mean(stats[max_lvl]["levels"]) + (13 - max_lvl)
+    return stats
+
+
+def players(n: int):
+    data = SyntheticData()
+    cards = [data.player(f"#ABCP{i:02d}")["cards"] for i in range(n)]
+    # A card missing in the catalogue
+    cards[0].append({"name": "New", "level": 3, "maxLevel": 8, "count": 7})
+    return cards, data.cards()
+
+
+def test_remaining_tables():
+    assert economy.get_remaining_cards(1, 13, 1) == sum(economy.N_CARDS) - 2
+    assert economy.get_remaining_cards(13, 13, 10) == 0
+    assert economy.get_remaining_gold(0, 5) == 100000 + 50000 + 20000 + 5000 + 4000
+    assert economy.get_remaining_gold(7, 8) == 100000
+
+
+def test_cards_stats_matches_reference():
+    players_cards, all_cards = players(20)
+    for cards in players_cards:
+        assert economy.cards_stats(cards, all_cards) == reference_cards_stats(
+            cards, all_cards
+        )
+
+
+def test_batch_cards_stats_matches_scalar():
+    players_cards, all_cards = players(20)
+    expected = [economy.cards_stats(cards, all_cards) for cards in players_cards]
+    assert economy.batch_cards_stats(players_cards, all_cards, levels=True) == expected
@@ -0,0 +1,99 @@
+from datetime import datetime
+
+import pytest
+
+from royale_tools.api import RoyaleApi
+from royale_tools.cache import ResponseCache
+from royale_tools.history import HistoryStore
+from royale_tools.memo import StatsMemo
+from royale_tools.mock_api import MockApi, SyntheticData
+from royale_tools.war import WarIndex
+
+
+@pytest.fixture
+def data():
+    return SyntheticData(n_members=10, n_races=8)
+
+
+def test_war_stats_match_war_index(data):
+    store = HistoryStore()
+    log, current = data.river_race_log("#ABC"), data.current_river_race("#ABC")
+    assert store.add_river_race_log("#ABC", log) > 0
+    assert store.add_river_race_log("#ABC", log) == 0
+    store.add_current_river_race(current)
+    index = WarIndex(log, current)
+    for tag in data.member_tags("#ABC"):
+        assert store.war_stats(tag) == index.get(tag)
+
+
+def test_war_history_outlives_log(data):
+    store = HistoryStore()
+    log = data.river_race_log("#ABC")
+    store.add_river_race_log("#ABC", {"items": log["items"][4:]})
+    store.add_river_race_log("#ABC", {"items": log["items"][:6]})
+    tag = data.member_tags("#ABC")[0]
+    stats = store.war_stats(tag)
+    assert len(stats["war_points"]) == 8
+    averages = store.war_averages(tag)
+    assert averages["races"] == 8
+    assert averages["avg_war_points"] == pytest.approx(sum(stats["war_points"]) / 8)
+    recent = store.war_averages(tag, since=datetime(2020, 12, 20))
+    assert recent["races"] == 3
+
+
+def test_player_snapshots_deduplicated(data):
+    store = HistoryStore()
+    player = data.player("#ABCP01")
+    assert store.add_player(player, taken_at=1.0)
+    assert not store.add_player(player, taken_at=2.0)
+    assert store.add_player(dict(player, trophies=1), taken_at=3.0)
+    history = store.player_history("#ABCP01")
+    assert [taken_at for taken_at, _ in history] == [1.0, 3.0]
+    assert store.player_history("#ABCP01", since=2.0)[0][1]["trophies"] == 1
+
+
+def test_api_records_history(data, http_settings):
+    RoyaleApi.history = HistoryStore()
+    try:
+        with MockApi(data) as api:
+            RoyaleApi.configure(base_url=api.base_url)
+            RoyaleApi.get_player_data("#ABCP01")
+            log = RoyaleApi.get_clan_data("#ABC", "riverracelog")
+            current = RoyaleApi.get_clan_data("#ABC", "currentriverrace")
+        stats = RoyaleApi.get_war_stats("#ABCP01", log, current)
+        assert stats == WarIndex(log, current).get("#ABCP01")
+        assert len(RoyaleApi.history.player_history("#ABCP01")) == 1
+    finally:
+        RoyaleApi.history = None
+
+
+def test_history_stores_downloaded_responses(monkeypatch, data, http_settings):
+    store = HistoryStore()
+    added = []
+    monkeypatch.setattr(store, "add_player", added.append)
+    monkeypatch.setattr(RoyaleApi, "history", store)
+    monkeypatch.setattr(RoyaleApi, "cache", ResponseCache())
+    with MockApi(data) as api:
+        RoyaleApi.configure(base_url=api.base_url)
+        for _ in range(3):
+            RoyaleApi.get_player_data("#ABCP01")
+        RoyaleApi.get_player_data("#ABCP01", "upcomingchests")
+    # The cache hits and the upcoming chests aren't stored
+    assert [player["tag"] for player in added] == ["#ABCP01"]
+
+
+def test_war_stats_of_the_clan(monkeypatch, data):
+    monkeypatch.setattr(RoyaleApi, "history", HistoryStore())
+    monkeypatch.setattr(RoyaleApi, "memo", StatsMemo())
+    tag = data.member_tags("#ABC")[0]
+    log, current = data.river_race_log("#ABC"), data.current_river_race("#ABC")
+    # Races of the player's previous clan
+    other = data.river_race_log("#ABC")
+    for race in other["items"]:
+        race["seasonId"] -= 10
+        for standing in race["standings"]:
+            standing["clan"]["tag"] = "#XYZ"
+    RoyaleApi.history.add_river_race_log("#XYZ", other)
+    stats = RoyaleApi.get_war_stats(tag, log, current)
+    assert stats == WarIndex(log, current).get(tag)
+    assert len(RoyaleApi.history.war_stats(tag)["war_points"]) == 2 * len(log["items"])
@@ -0,0 +1,113 @@
+import copy
+
+import pytest
+
+from royale_tools.api import RoyaleApi
+from royale_tools.decks import best_war_decks
+from royale_tools.economy import cards_stats
+from royale_tools.history import HistoryStore
+from royale_tools.memo import StatsMemo, cards_fingerprint, war_fingerprint
+from royale_tools.mock_api import SyntheticData
+from royale_tools.tracing import Tracer
+from royale_tools.war import WarIndex
+
+
+@pytest.fixture
+def data():
+    return SyntheticData(n_members=5, n_races=3)
+
+
+@pytest.fixture
+def memo(monkeypatch):
+    monkeypatch.setattr(RoyaleApi, "memo", StatsMemo())
+    return RoyaleApi.memo
+
+
+def test_cards_stats_memoized(memo, data):
+    player_cards, all_cards = data.player("#ABCP01")["cards"], data.cards()
+    stats = RoyaleApi.get_cards_stats(player_cards, all_cards)
+    assert stats == cards_stats(player_cards, all_cards)
+    # A new response with the same cards
+    same = copy.deepcopy(player_cards)
+    assert RoyaleApi.get_cards_stats(same, copy.deepcopy(all_cards)) is stats
+    same[0]["count"] += 1
+    changed = RoyaleApi.get_cards_stats(same, all_cards)
+    assert changed == cards_stats(same, all_cards) != stats
+    assert memo.stats()["cards_stats"] == {"hits": 1, "misses": 2, "hit_rate": 1 / 3}
+
+
+def test_war_index_memoized(memo, data):
+    log, current = data.river_race_log("#ABC"), data.current_river_race("#ABC")
+    index = RoyaleApi.get_war_index(log, current)
+    assert index.stats == WarIndex(log, current).stats
+    assert RoyaleApi.get_war_index(copy.deepcopy(log), current) is index
+    assert RoyaleApi.get_war_stats("#ABCP01", log, current) == index.get("#ABCP01")
+    current = copy.deepcopy(current)
+    current["clan"]["participants"][0]["fame"] += 100
+    assert war_fingerprint(log, current) != war_fingerprint(
+        log, data.current_river_race("#ABC")
+    )
+    assert RoyaleApi.get_war_index(log, current) is not index
+    assert memo.stats()["war_index"]["hits"] == 2
+
+
+def test_war_history_memoized(monkeypatch, memo, data):
+    monkeypatch.setattr(RoyaleApi, "history", HistoryStore())
+    queries = []
+    war_stats = RoyaleApi.history.war_stats
+    monkeypatch.setattr(
+        RoyaleApi.history,
+        "war_stats",
+        lambda *args, **kwargs: queries.append(args) or war_stats(*args, **kwargs),
+    )
+    log, current = data.river_race_log("#ABC"), data.current_river_race("#ABC")
+    stats = RoyaleApi.get_war_stats("#ABCP01", log, current)
+    assert stats == WarIndex(log, current).get("#ABCP01")
+    assert RoyaleApi.get_war_stats("#ABCP01", copy.deepcopy(log), current) == stats
+    assert len(queries) == 1
+    current = copy.deepcopy(current)
+    current["clan"]["participants"][0]["fame"] += 100
+    RoyaleApi.get_war_stats("#ABCP01", log, current)
+    assert len(queries) == 2
+    assert memo.stats()["war_history"] == {
+        "hits": 1,
+        "misses": 2,
+        "hit_rate": 1 / 3,
+    }
+
+
+def test_war_decks_memoized(memo, data):
+    player_cards = data.player("#ABCP01")["cards"]
+    decks = RoyaleApi.get_war_decks(player_cards)
+    assert decks["decks"] == best_war_decks(player_cards)["decks"]
+    assert RoyaleApi.get_war_decks(copy.deepcopy(player_cards)) is decks
+    assert memo.stats()["war_decks"]["hits"] == 1
+
+
+def test_lru_eviction():
+    memo = StatsMemo(max_entries=2)
+    for key in ("a", "b", "a", "c"):
+        memo.get("stats", key, lambda: key.upper())
+    # "b" was the least recently used
+    assert memo.get("stats", "a", lambda: None) == ("A", True)
+    assert memo.get("stats", "b", lambda: "B") == ("B", False)
+    stats = memo.stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 2
+    assert stats["stats"]["hit_rate"] == pytest.approx(2 / 6)
+
+
+def test_disabled_and_traced(monkeypatch, data):
+    player_cards, all_cards = data.player("#ABCP01")["cards"], data.cards()
+    monkeypatch.setattr(RoyaleApi, "memo", None)
+    first = RoyaleApi.get_cards_stats(player_cards, all_cards)
+    assert RoyaleApi.get_cards_stats(player_cards, all_cards) is not first
+    monkeypatch.setattr(RoyaleApi, "memo", StatsMemo())
+    monkeypatch.setattr(RoyaleApi, "tracer", Tracer(log=False))
+    for _ in range(3):
+        RoyaleApi.get_cards_stats(player_cards, all_cards)
+    counter = RoyaleApi.tracer.counters["royale_tools_memo_total"]
+    assert counter[(("result", "hit"), ("stats", "cards_stats"))] == 2
+    assert counter[(("result", "miss"), ("stats", "cards_stats"))] == 1
+    assert cards_fingerprint(player_cards, all_cards) == cards_fingerprint(
+        copy.deepcopy(player_cards), all_cards
+    )
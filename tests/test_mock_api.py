@@ -0,0 +1,37 @@
+import requests
+
+from royale_tools.api import RoyaleApi
+from royale_tools.mock_api import MockApi, RecordedData, SyntheticData, endpoint_latency
+
+
+def test_endpoint_latency():
+    latency = {"players": 0.1, "riverracelog": 0.3}
+    assert endpoint_latency(latency, "/v1/players/%23ABC") == 0.1
+    assert endpoint_latency(latency, "/v1/clans/%23ABC/riverracelog") == 0.3
+    assert endpoint_latency(latency, "/v1/cards") == 0.0
+    assert endpoint_latency(0.2, "/v1/cards") == 0.2
+
+
+def test_rate_limit():
+    with MockApi(rate_limit=2) as api:
+        statuses = [requests.get(f"{api.base_url}/cards").status_code for _ in range(3)]
+        resp = requests.get(f"{api.base_url}/cards")
+    assert statuses[:2] == [200, 200]
+    assert 429 in statuses[2:] + [resp.status_code]
+    assert resp.headers.get("Retry-After") == "1"
+    assert api.n_throttled >= 1
+
+
+def test_recorded_data(tmp_path, http_settings):
+    data = SyntheticData(n_members=5, n_races=2)
+    paths = ["/players/#ABCP01", "/clans/#ABC/riverracelog", "/cards"]
+    with MockApi(data) as api:
+        RoyaleApi.configure(base_url=api.base_url)
+        RecordedData.record(str(tmp_path), paths)
+    recorded = RecordedData(str(tmp_path))
+    assert recorded.route("/v1/clans/%23ABC/riverracelog") == data.route(
+        "/v1/clans/%23ABC/riverracelog"
+    )
+    assert recorded.route("/v1/players/%23ABCP02")[0] == 404
+    fallback = RecordedData(str(tmp_path), data)
+    assert fallback.route("/v1/players/%23ABCP02")[0] == 200
@@ -0,0 +1,66 @@
+import builtins
+import json
+
+import pytest
+
+from royale_tools import models
+from royale_tools.economy import cards_stats
+from royale_tools.mock_api import SyntheticData
+from royale_tools.models import Card, Player, RiverRace
+from royale_tools.war import WarIndex
+
+
+@pytest.fixture
+def data():
+    return SyntheticData(n_members=10, n_races=4)
+
+
+def test_player_columns(data):
+    player_data = data.player("#ABCP01")
+    player = Player.from_bytes(json.dumps(player_data).encode())
+    assert player.tag == "#ABCP01"
+    assert player.clan_tag == "#ABC"
+    assert len(player.levels) == len(player_data["cards"])
+    first = player_data["cards"][0]
+    assert next(player.cards()) == Card(
+        first["name"], first["level"], first["maxLevel"], first["count"]
+    )
+    all_cards = data.cards()
+    assert cards_stats(player.card_dicts(), all_cards) == cards_stats(
+        player_data["cards"], all_cards
+    )
+
+
+def test_river_races_match_war_index(data):
+    log, current = data.river_race_log("#ABC"), data.current_river_race("#ABC")
+    races = RiverRace.from_log(log, "#ABC")
+    assert [race.season_id for race in races] == [
+        item["seasonId"] for item in log["items"]
+    ]
+    index = WarIndex(log, current)
+    stats = index.get("#ABCP03")
+    points = [p.war_points for race in races for p in race.participants()]
+    tags = [p.tag for race in races for p in race.participants()]
+    assert [pts for tag, pts in zip(tags, points) if tag == "#ABCP03"] == stats[
+        "war_points"
+    ]
+    current_race = RiverRace.from_current(current)
+    assert len(current_race) == 10
+    assert sum(current_race.fame) == current["clan"]["fame"]
+
+
+def test_loads_without_orjson(monkeypatch):
+    real_import = builtins.__import__
+
+    def no_orjson(name, *args, **kwargs):
+        if name == "orjson":
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", no_orjson)
+    models.json_parser.cache_clear()
+    try:
+        assert models.json_parser() is json.loads
+        assert models.loads(b'{"a": [1, 2]}') == {"a": [1, 2]}
+    finally:
+        models.json_parser.cache_clear()
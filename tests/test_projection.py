@@ -0,0 +1,81 @@
+import pytest
+
+from royale_tools.mock_api import SyntheticData
+from royale_tools.projection import WarProjection
+from royale_tools.war import WarIndex
+
+
+@pytest.fixture(scope="module")
+def clan():
+    data = SyntheticData(n_members=20, n_races=6)
+    players = [data.player(tag) for tag in data.member_tags("#ABC")]
+    war_index = WarIndex(data.river_race_log("#ABC"), data.current_river_race("#ABC"))
+    return data, players, war_index
+
+
+def test_single_player_matches_war_window_formula():
+    best_32 = [13] * 20 + [12] * 12
+    projection = WarProjection(["#P"], [best_32], [0.6]).get("#P")
+    base = sum(best_32)
+    assert projection["min_daily"] == base
+    assert projection["max_daily"] == 2 * base
+    assert projection["expected_daily"] == pytest.approx(0.6 * 2 * base + 0.4 * base)
+    assert projection["max_weekly"] == 14 * base
+    assert projection["expected_weekly"] == pytest.approx(7 * 1.6 * base)
+    assert projection["forecast"] == projection["expected_weekly"]
+    assert projection["rank"] == 1
+
+
+def test_winrate_is_clipped():
+    projection = WarProjection(["#A", "#B"], [[10], [10]], [-1.0, 1.5])
+    assert projection.get("#A")["expected_daily"] == 10
+    assert projection.get("#B")["expected_daily"] == 20
+
+
+def test_numpy_matches_python(clan):
+    _, players, war_index = clan
+    best_32 = [[13 - i % 5] * (32 - i) for i in range(len(players))]
+    winrates = [i / len(players) for i in range(len(players))]
+    war_points = [war_index.get(p["tag"])["war_points"] for p in players]
+    war_points[0] = []
+    expected = WarProjection.compute_python(best_32, winrates, war_points)
+    columns = WarProjection.compute_numpy(best_32, winrates, war_points)
+    for field in WarProjection.FIELDS:
+        assert columns[field] == pytest.approx(expected[field]), field
+
+
+def test_from_members_ranking(clan):
+    data, players, war_index = clan
+    projection = WarProjection.from_members(players, data.cards(), war_index)
+    assert len(projection) == len(players)
+    ranking = projection.ranking()
+    forecasts = [forecast for _, forecast in ranking]
+    assert forecasts == sorted(forecasts, reverse=True)
+    best_tag = ranking[0][0]
+    assert projection.get(best_tag)["rank"] == 1
+    stats = war_index.get(best_tag)
+    assert forecasts[0] == pytest.approx(
+        sum(stats["war_points"]) / len(stats["war_points"])
+    )
+
+
+def test_finish(clan):
+    data, players, war_index = clan
+    projection = WarProjection.from_members(players, data.cards(), war_index)
+    race = data.current_river_race("#ABC")
+    finish = projection.finish(race)
+    assert len(finish) == len(race["clans"])
+    assert [clan["rank"] for clan in finish] == list(range(1, len(finish) + 1))
+    projected = [clan["projected"] for clan in finish]
+    assert projected == sorted(projected, reverse=True)
+    own = next(clan for clan in finish if clan["tag"] == "#ABC")
+    days_left = 7 - race["periodIndex"] % 7
+    assert own["projected"] == pytest.approx(
+        race["clan"]["fame"] + days_left * projection.daily_total()
+    )
+    rival = race["clans"][1]
+    projected_rival = next(c for c in finish if c["tag"] == rival["tag"])["projected"]
+    assert projected_rival == pytest.approx(rival["fame"] * 7 / race["periodIndex"])
+    # The clan's own variant has no rivals to rank against
+    with pytest.raises(ValueError):
+        projection.finish({key: race[key] for key in race if key != "clans"})
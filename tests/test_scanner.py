@@ -0,0 +1,115 @@
+import json
+import multiprocessing
+import time
+
+import pytest
+
+from royale_tools import cli, scanner
+from royale_tools.api import RoyaleApi
+from royale_tools.exceptions import ApiError
+from royale_tools.mock_api import SyntheticData
+from royale_tools.ratelimit import RateLimiter
+from royale_tools.scanner import rank_rows, scan_leaderboard
+
+
+class ClanData(SyntheticData):
+    """Synthetic data without the #NOPE clan."""
+
+    def route(self, path):
+        if "%23NOPE" in path:
+            return 404, {"reason": "notFound"}
+        return super().route(path)
+
+
+@pytest.fixture
+def mock_api_options():
+    return {"data": ClanData(n_members=4, n_races=2)}
+
+
+def drain(rate_limiter: RateLimiter, n: int):
+    for _ in range(n):
+        rate_limiter.acquire()
+
+
+def test_rate_limiter_tokens():
+    rate_limiter = RateLimiter(["a", "b"], rate=1, burst=2)
+    tokens = [rate_limiter.try_acquire()[0] for _ in range(4)]
+    assert sorted(tokens) == ["a", "a", "b", "b"]
+    token, wait = rate_limiter.try_acquire()
+    assert token is None and 0 < wait <= 1
+    with pytest.raises(ValueError):
+        RateLimiter([], rate=1)
+
+
+def test_rate_limiter_processes():
+    context = multiprocessing.get_context("spawn")
+    rate_limiter = RateLimiter(["a"], rate=20, burst=5, context=context)
+    start = time.monotonic()
+    processes = [
+        context.Process(target=drain, args=(rate_limiter, 10)) for _ in range(2)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    # 20 requests with a burst of 5 take at least 15 refills at 20/s
+    assert time.monotonic() - start >= 0.7
+
+
+def test_rank_rows():
+    rows = rank_rows([{"trophies": 1}, {"trophies": 3}, {"trophies": 2}], "trophies")
+    assert [(row["rank"], row["trophies"]) for row in rows] == [(1, 3), (2, 2), (3, 1)]
+
+
+def test_scan_leaderboard(api):
+    tags = ["#ABC", "#DEF", "#GHI"]
+    done = []
+    rows, errors = scan_leaderboard(
+        tags + ["#NOPE"],
+        ["x"],
+        processes=2,
+        on_clan=lambda tag, error, n, total: done.append(tag),
+    )
+    assert sorted(done) == sorted(tags + ["#NOPE"])
+    assert list(errors) == ["#NOPE"]
+    assert len(rows) == 12
+    assert {row["clan"] for row in rows} == set(tags)
+    assert [row["rank"] for row in rows] == list(range(1, 13))
+    trophies = [row["trophies"] for row in rows]
+    assert trophies == sorted(trophies, reverse=True)
+
+
+def test_scan_chunk_cards_error(api, monkeypatch):
+    def get_cards():
+        raise ApiError("Service unavailable", 503)
+
+    monkeypatch.setattr(scanner, "worker_cards", {})
+    monkeypatch.setattr(RoyaleApi, "get_cards", staticmethod(get_cards))
+    results = scanner.scan_chunk(["#ABC", "#DEF"], 2)
+    assert results == [
+        ("#ABC", None, "Service unavailable"),
+        ("#DEF", None, "Service unavailable"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "mock_api_options",
+    [{"data": SyntheticData(n_members=4, n_races=2), "rate_limit": 20}],
+)
+def test_scan_leaderboard_rate_limit(api):
+    rows, errors = scan_leaderboard(
+        ["#ABC", "#DEF"], ["x", "y"], processes=2, rate=15, burst=10
+    )
+    assert not errors and len(rows) == 8
+    assert api.n_throttled == 0
+    assert {"Bearer x", "Bearer y"} <= set(api.buckets)
+
+
+def test_cli_leaderboard(api, tmp_path):
+    output = tmp_path / "leaderboard.jsonl"
+    args = ["--token", "x,y", "--base-url", api.base_url, "--processes", "2"]
+    args += ["--output", str(output), "leaderboard", "ABC", "DEF"]
+    assert cli.main(args) == 0
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [row["rank"] for row in rows] == list(range(1, 9))
+    assert {row["clan"] for row in rows} == {"#ABC", "#DEF"}
@@ -0,0 +1,134 @@
+import pytest
+
+from royale_tools.api import RoyaleApi
+from royale_tools.cache import ResponseCache
+from royale_tools.exceptions import RateLimitError
+from royale_tools.mock_api import SyntheticData
+from royale_tools.scheduler import DEFAULT_INTERVALS, RefreshJob, RefreshScheduler
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def mock_api_options():
+    return {"data": SyntheticData(n_members=5, n_races=3)}
+
+
+@pytest.fixture
+def api(api):
+    RoyaleApi.cache = ResponseCache()
+    yield api
+    RoyaleApi.cache = None
+
+
+def run_due(scheduler: RefreshScheduler, clock: Clock, seconds: float) -> int:
+    """Run the scheduler for some seconds of the clock, return the refreshes."""
+    end, n_refreshes = clock.now + seconds, 0
+    while clock.now < end:
+        wait = scheduler.run_pending()
+        if wait > 0:
+            clock.now = min(clock.now + wait, end)
+        else:
+            n_refreshes += 1
+    return n_refreshes
+
+
+def test_watched_player_served_from_cache(api):
+    clock = Clock()
+    scheduler = RefreshScheduler(max_rate=10, clock=clock)
+    scheduler.watch_player("ABCP01")
+    # Player, cards, chests, then the river races of their clan
+    assert run_due(scheduler, clock, 1) == 5
+    assert scheduler.get("currentriverrace", "#ABC") is not None
+    n_requests = api.n_requests
+    data = RoyaleApi.load_player("#ABCP01")
+    assert api.n_requests == n_requests
+    assert data["player"] == scheduler.get("players", "#ABCP01")
+
+
+def test_refresh_skips_fresh_cache(api):
+    clock = Clock()
+    scheduler = RefreshScheduler(clock=clock, intervals={"currentriverrace": 5})
+    scheduler.watch_clan("#ABC")
+    run_due(scheduler, clock, 10)
+    n_requests = api.n_requests
+    # The cached response is still fresh, the refresh requests it anyway
+    assert run_due(scheduler, clock, 10) >= 1
+    assert api.n_requests > n_requests
+    assert RoyaleApi.cache.stats()["refreshes"] >= 1
+
+
+def test_rate_limit():
+    clock = Clock()
+    scheduler = RefreshScheduler(max_rate=2, clock=clock)
+    for i in range(10):
+        scheduler.add("players", f"#P{i}", dict, "#P")
+    assert scheduler.run_pending() == 0
+    assert scheduler.run_pending() == 0.5
+    # One refresh every 0.5 seconds
+    assert run_due(scheduler, clock, 2.1) == 4
+
+
+def test_adaptive_intervals():
+    clock = Clock()
+    scheduler = RefreshScheduler(max_rate=100, clock=clock)
+    values = iter(range(1000))
+    scheduler.add("currentriverrace", "#A", lambda: {"fame": next(values)}, "#A")
+    scheduler.add("cards", "", lambda: {"items": []}, "#A")
+    run_due(scheduler, clock, 3600)
+    base = DEFAULT_INTERVALS["currentriverrace"]
+    assert scheduler.jobs[("currentriverrace", "#A")].interval == base / 4
+    assert scheduler.jobs[("cards", "")].interval == DEFAULT_INTERVALS["cards"]
+    stats = scheduler.stats()["currentriverrace #A"]
+    assert stats["changes"] == stats["refreshes"] - 1
+    job = RefreshJob(("players", "#A"), dict, 100)
+    for _ in range(10):
+        job.adapt(changed=False)
+    assert job.interval == 400
+
+
+def test_throttled_pause():
+    clock = Clock()
+    scheduler = RefreshScheduler(max_rate=100, clock=clock)
+
+    def throttled():
+        raise RateLimitError("throttled", retry_after=30)
+
+    scheduler.add("players", "#A", throttled, "#A")
+    scheduler.run_pending()
+    assert scheduler.run_pending() == pytest.approx(30)
+    assert scheduler.stats()["players #A"]["errors"] == 1
+
+
+def test_unwatch_keeps_shared_jobs():
+    scheduler = RefreshScheduler()
+    scheduler.watch_player("#ABCP01")
+    scheduler.watch_clan("#ABC")
+    scheduler.unwatch("#ABCP01")
+    assert set(scheduler.jobs) == {
+        ("cards", ""),
+        ("members", "#ABC"),
+        ("riverracelog", "#ABC"),
+        ("currentriverrace", "#ABC"),
+    }
+    scheduler.unwatch("ABC")
+    assert scheduler.jobs == {}
+    assert scheduler.run_pending() >= 60
+
+
+def test_thread(api):
+    scheduler = RefreshScheduler(max_rate=100)
+    scheduler.start()
+    scheduler.watch_clan("#ABC")
+    for _ in range(100):
+        if scheduler.get("currentriverrace", "#ABC") is not None:
+            break
+        scheduler.stop_event.wait(0.05)
+    scheduler.stop()
+    assert scheduler.get("currentriverrace", "#ABC") is not None
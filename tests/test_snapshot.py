@@ -0,0 +1,108 @@
+import pickle
+
+import pytest
+
+from royale_tools.api import RoyaleApi
+from royale_tools.clan import scan_clan
+from royale_tools.exceptions import NotFoundError
+from royale_tools.mock_api import MockApi, SyntheticData
+from royale_tools.snapshot import Snapshot, SnapshotRecorder, snapshot_key
+
+
+@pytest.fixture
+def data():
+    return SyntheticData(n_members=5, n_races=3)
+
+
+@pytest.fixture
+def recorded(data, tmp_path, http_settings):
+    """Snapshot file of a player and their clan, and the online results."""
+    with MockApi(data) as api:
+        RoyaleApi.configure(base_url=api.base_url)
+        RoyaleApi.recorder = SnapshotRecorder()
+        try:
+            player = RoyaleApi.load_player("#ABCP01")
+            rows = scan_clan("#ABC")
+            path = str(tmp_path / "abc.rts")
+            RoyaleApi.recorder.write(path)
+        finally:
+            RoyaleApi.recorder = None
+    return path, player, rows
+
+
+@pytest.fixture
+def offline():
+    yield
+    if RoyaleApi.source is not None:
+        RoyaleApi.source.close()
+    RoyaleApi.source = None
+
+
+def test_snapshot_key():
+    assert snapshot_key("/players/%23ABC/") == "/players/%23ABC"
+    key = snapshot_key("/v1/clans/%23ABC/riverracelog/#own")
+    assert key == snapshot_key(key) == "/clans/%23ABC/riverracelog#own"
+    assert snapshot_key("/clans?name=abc&limit=5") == "/clans?name=abc&limit=5"
+
+
+def test_offline_source(recorded, offline):
+    path, player, rows = recorded
+    RoyaleApi.source = Snapshot(path)
+    RoyaleApi.memo.clear()
+    assert RoyaleApi.load_player("ABCP01") == player
+    assert scan_clan("#ABC") == rows
+    with pytest.raises(NotFoundError):
+        RoyaleApi.get_player_data("#DEFP01")
+    # Only the own standings were recorded
+    with pytest.raises(NotFoundError):
+        RoyaleApi.get_clan_data("#ABC", "riverracelog")
+
+
+def test_full_response_serves_variant(data, tmp_path, offline):
+    recorder = SnapshotRecorder()
+    recorder.add("/clans/%23ABC/riverracelog", data.river_race_log("#ABC"))
+    recorder.add("/clans/%23ABC/currentriverrace", data.current_river_race("#ABC"))
+    recorder.write(str(tmp_path / "abc.rts"))
+    RoyaleApi.source = Snapshot(str(tmp_path / "abc.rts"))
+    log = RoyaleApi.get_clan_data("#ABC", "riverracelog", own_only=True)
+    assert log["items"] and all(
+        [s["clan"]["tag"] for s in race["standings"]] == ["#ABC"]
+        for race in log["items"]
+    )
+    race = RoyaleApi.get_clan_data("#ABC", "currentriverrace", own_only=True)
+    assert race["clan"]["tag"] == "#ABC" and "clans" not in race
+    # The full responses are still served unfiltered
+    assert RoyaleApi.get_clan_data("#ABC", "riverracelog") == data.river_race_log(
+        "#ABC"
+    )
+
+
+@pytest.mark.parametrize("compression", ["zlib", None])
+def test_compressions(recorded, tmp_path, compression):
+    path, player, _ = recorded
+    recorder = SnapshotRecorder()
+    with Snapshot(path) as snapshot:
+        for key in snapshot.entries:
+            recorder.add(key, snapshot.get(key))
+    size = recorder.write(str(tmp_path / "copy.rts"), compression)
+    with Snapshot(str(tmp_path / "copy.rts")) as snapshot:
+        assert snapshot.compression == (compression or "zstd")
+        assert len(snapshot) == len(recorder) and size > 0
+        assert snapshot.route("/players/%23ABCP01") == (200, player["player"])
+        copy = pickle.loads(pickle.dumps(snapshot))
+        assert copy.get("/cards") == player["cards"]
+        copy.close()
+
+
+def test_served_by_mock_api(recorded, http_settings):
+    path, player, _ = recorded
+    with Snapshot(path) as snapshot, MockApi(snapshot) as api:
+        RoyaleApi.configure(base_url=api.base_url)
+        assert RoyaleApi.get_player_data("#ABCP01") == player["player"]
+
+
+def test_not_a_snapshot(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text('{"items": []}')
+    with pytest.raises(ValueError):
+        Snapshot(str(path))
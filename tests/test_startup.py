@@ -0,0 +1,24 @@
+import subprocess
+import sys
+
+HEAVY_MODULES = ("PySimpleGUI", "requests", "pkg_resources", "loguru")
+
+
+def loaded_modules(module: str) -> set:
+    """Heavy modules loaded after importing a module in a new interpreter."""
+    code = f"import sys, {module}; print(' '.join(sys.modules))"
+    out = subprocess.run(
+        [sys.executable, "-c", code], stdout=subprocess.PIPE, check=True
+    ).stdout.decode()
+    return set(out.split()) & set(HEAVY_MODULES)
+
+
+def test_cli_lazy_imports():
+    assert loaded_modules("royale_tools.cli") == set()
+
+
+def test_version_without_pkg_resources():
+    from royale_tools.version import VERSION
+
+    assert VERSION
+    assert loaded_modules("royale_tools.version") == set()
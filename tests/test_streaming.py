@@ -0,0 +1,63 @@
+import builtins
+import io
+import json
+
+import pytest
+
+from royale_tools.api import RoyaleApi
+from royale_tools.cache import ResponseCache
+from royale_tools.mock_api import MockApi, SyntheticData
+from royale_tools.streaming import own_current_river_race, own_river_race_log
+
+
+@pytest.fixture
+def data():
+    return SyntheticData(n_members=10, n_races=4)
+
+
+@pytest.fixture(params=[True, False], ids=["ijson", "json"])
+def ijson(request, monkeypatch):
+    if request.param:
+        pytest.importorskip("ijson")
+    else:
+        real_import = builtins.__import__
+
+        def no_ijson(name, *args, **kwargs):
+            if name == "ijson":
+                raise ImportError(name)
+            return real_import(name, *args, **kwargs)
+
+        monkeypatch.setattr(builtins, "__import__", no_ijson)
+
+
+def test_own_river_race_log(data, ijson):
+    log = data.river_race_log("#ABC")
+    own = own_river_race_log(io.BytesIO(json.dumps(log).encode()), "#ABC")
+    assert len(own["items"]) == 4
+    for race, own_race in zip(log["items"], own["items"]):
+        assert own_race["seasonId"] == race["seasonId"]
+        assert own_race["standings"] == race["standings"][:1]
+
+
+def test_own_current_river_race(data, ijson):
+    current = data.current_river_race("#ABC")
+    own = own_current_river_race(io.BytesIO(json.dumps(current).encode()))
+    assert "clans" not in own
+    assert own == {key: value for key, value in current.items() if key != "clans"}
+
+
+def test_api_own_only(data, http_settings):
+    RoyaleApi.cache = ResponseCache()
+    try:
+        with MockApi(data) as api:
+            RoyaleApi.configure(base_url=api.base_url)
+            n_connections = api.n_connections
+            own = RoyaleApi.get_clan_data("#ABC", "riverracelog", own_only=True)
+            full = RoyaleApi.get_clan_data("#ABC", "riverracelog")
+            assert RoyaleApi.get_clan_data("#ABC", "riverracelog", True) is own
+            assert api.n_requests == 2
+            assert api.n_connections - n_connections <= 1
+        assert len(full["items"][0]["standings"]) == 5
+        assert len(own["items"][0]["standings"]) == 1
+    finally:
+        RoyaleApi.cache = None
@@ -0,0 +1,106 @@
+import cProfile
+import os
+import pstats
+import threading
+
+import pytest
+
+from royale_tools import tracing
+from royale_tools.api import RoyaleApi
+from royale_tools.cache import ResponseCache
+from royale_tools.exceptions import NotFoundError
+from royale_tools.mock_api import SyntheticData
+from royale_tools.tracing import Tracer
+
+
+@pytest.fixture
+def mock_api_options():
+    return {"data": SyntheticData(n_members=5, n_races=2)}
+
+
+@pytest.fixture
+def tracer(api):
+    RoyaleApi.tracer = Tracer()
+    RoyaleApi.cache = ResponseCache()
+    yield RoyaleApi.tracer
+    RoyaleApi.tracer = None
+    RoyaleApi.cache = None
+
+
+def test_request_metrics(tracer):
+    RoyaleApi.get_cards()
+    RoyaleApi.get_cards()
+    with pytest.raises(NotFoundError):
+        RoyaleApi.get_clan_data("#ABC", "unknown")
+    requests = tracer.counters["royale_tools_requests_total"]
+    assert requests[(("cache", "miss"), ("endpoint", "cards"), ("status", "200"))] == 1
+    assert requests[(("cache", "hit"), ("endpoint", "cards"), ("status", "200"))] == 1
+    assert requests[(("cache", "miss"), ("endpoint", "unknown"), ("status", "404"))]
+    seconds = tracer.histograms["royale_tools_request_seconds"]
+    phases = {dict(labels)["phase"] for labels in seconds}
+    assert {"cache", "response", "headers", "decode", "total"} <= phases
+    sizes = tracer.histograms["royale_tools_response_bytes"]
+    assert sizes[(("endpoint", "cards"),)].total > 1000
+
+
+def test_prometheus_export(tracer):
+    data = RoyaleApi.load_player("#ABCP01")
+    assert "war_stats" in data
+    text = tracer.prometheus()
+    assert "# TYPE royale_tools_requests_total counter" in text
+    assert 'royale_tools_function_seconds_count{function="cards_stats"} 1' in text
+    assert (
+        'royale_tools_function_seconds_bucket{function="war_stats",le="+Inf"} 1' in text
+    )
+
+
+def test_profiled(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv(tracing.PROFILE_VARIABLE, "cprofile")
+    with tracing.profiled("block"):
+        sum(range(1000))
+    assert os.path.exists("block.prof")
+
+
+def test_profiled_worker_tasks(tracer, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv(tracing.PROFILE_VARIABLE, "cprofile")
+    RoyaleApi.load_player("#ABCP01")
+    stats = pstats.Stats("load_player.prof").stats  # type: ignore
+    functions = {function for _, _, function in stats}
+    # Requests of the worker threads
+    assert {"get_player_data", "get_clan_data", "send_request"} <= functions
+
+
+def test_profiled_blocks_apart(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv(tracing.PROFILE_VARIABLE, "cprofile")
+    barrier, collected = threading.Barrier(2, timeout=5), {}
+
+    def block(name):
+        with tracing.profiled(name):
+            barrier.wait()
+            collected[name] = tracing.task_profiles()
+            tracing.profiled_task(collected[name], sum, range(1000))
+            barrier.wait()
+
+    threads = [threading.Thread(target=block, args=(name,)) for name in "ab"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Each block collects the profiles of its own tasks only
+    assert len(collected["a"][1]) == len(collected["b"][1]) == 1
+    assert tracing.task_profiles() is None
+
+
+def test_profiled_task_other_profiler(monkeypatch):
+    class ActiveProfile(cProfile.Profile):
+        def enable(self):
+            raise ValueError("Another profiling tool is already active")
+
+    # Python 3.12+ only allows one active cProfile
+    monkeypatch.setattr(cProfile, "Profile", ActiveProfile)
+    profiles = ("cprofile", [])
+    assert tracing.profiled_task(profiles, sum, [1, 2]) == 3
+    assert profiles[1] == []
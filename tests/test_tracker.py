@@ -0,0 +1,83 @@
+import copy
+import threading
+
+import pytest
+
+from royale_tools.mock_api import SyntheticData
+from royale_tools.tracker import RaceTracker, follow
+from royale_tools.war import WarIndex
+
+
+@pytest.fixture
+def data():
+    return SyntheticData(n_members=10, n_races=8)
+
+
+@pytest.fixture
+def mock_api_options(data):
+    return {"data": data}
+
+
+def test_aggregates_match_war_index(data):
+    log, current = data.river_race_log("#ABC"), data.current_river_race("#ABC")
+    tracker = RaceTracker("#ABC")
+    tracker.update_current(current)
+    # Older races first, then the whole log again
+    assert tracker.update_log({"items": log["items"][3:]}) == 5
+    assert tracker.update_log(log) == 3
+    assert tracker.update_log(log) == 0
+    assert not tracker.log_pending
+    index = WarIndex(log, current)
+    for tag in data.member_tags("#ABC"):
+        expected, stats = index.get(tag), tracker.get(tag)
+        assert stats["races"] == len(expected["war_points"])
+        assert stats["war_points"] == sum(expected["war_points"])
+        assert stats["avg_war_points"] == pytest.approx(
+            sum(expected["war_points"]) / len(expected["war_points"])
+        )
+        assert stats["current_war_points"] == expected["current_war_points"]
+
+
+def test_update_current_deltas(data):
+    current = data.current_river_race("#ABC")
+    tracker = RaceTracker("#ABC")
+    assert len(tracker.update_current(current)) == 10
+    assert tracker.update_current(current) == []
+    current = copy.deepcopy(current)
+    current["clan"]["participants"][2]["fame"] += 100
+    assert tracker.update_current(current) == ["#ABCP02"]
+    current["sectionIndex"] = 1
+    assert len(tracker.update_current(current)) == 10
+    assert tracker.log_pending
+
+
+def test_poll_requests(api):
+    tracker = RaceTracker("ABC")
+    assert len(tracker.poll()) == 10
+    assert api.n_requests == 2
+    # Unchanged section: only the current river race is requested
+    assert tracker.poll() == []
+    assert api.n_requests == 3
+    stop, updates = threading.Event(), []
+    thread = threading.Thread(
+        target=follow,
+        args=([tracker], 0.01, stop, lambda *args: updates.append(args)),
+    )
+    thread.start()
+    stop.wait(0.1)
+    stop.set()
+    thread.join()
+    assert api.n_requests > 3
+    assert updates == []
+    assert tracker.get("#ABCP01")["races"] == 8
+
+
+@pytest.mark.parametrize(
+    "mock_api_options", [{"data": SyntheticData(n_members=4, n_races=0)}]
+)
+def test_poll_empty_log(api):
+    tracker = RaceTracker("ABC")
+    tracker.poll()
+    # The log was read, even without races it isn't requested again
+    tracker.poll()
+    assert api.n_requests == 3
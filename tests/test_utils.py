@@ -0,0 +1,132 @@
+import pytest
+
+from royale_tools.api import RoyaleApi
+from royale_tools.clan import ClanTable, get_member_row
+from royale_tools.mock_api import SyntheticData
+from royale_tools.utils import CustomWindows as cw
+from royale_tools.utils import WindowManager
+
+
+class FakeElement:
+    def __init__(self):
+        self.value = None
+
+    def update(self, value):
+        self.value = value
+
+
+class FakeWindow:
+    """Window stand-in, PySimpleGUI windows need a display."""
+
+    def __init__(self):
+        self.elements = {}
+        self.visible = False
+        self.closed = False
+
+    def __getitem__(self, key):
+        return self.elements.setdefault(key, FakeElement())
+
+    def finalize(self):
+        self.visible = True
+
+    def hide(self):
+        self.visible = False
+
+    def un_hide(self):
+        self.visible = True
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def data():
+    return SyntheticData(n_members=5, n_races=3)
+
+
+def test_window_reused(monkeypatch):
+    monkeypatch.setattr("PySimpleGUI.theme", lambda *args: "Reddit")
+    manager, built = WindowManager(), []
+
+    def build():
+        built.append(FakeWindow())
+        return built[-1]
+
+    window = manager.show("view", build, {"t.name": "A"})
+    manager.hide("view")
+    assert not window.visible
+    assert manager.show("view", build, {"t.name": "B"}) is window
+    assert window.visible and window["t.name"].value == "B"
+    assert len(built) == 1
+    # Rebuilt when the layout changes or the window is closed
+    assert manager.show("view", build, layout=2) is not window
+    assert window.closed
+    manager.close("view")
+    manager.show("view", build, layout=2)
+    manager.close()
+    assert len(built) == 3 and all(w.closed for w in built)
+    assert manager.windows == {}
+
+
+def test_window_rebuilt_with_theme(monkeypatch):
+    theme = ["Reddit"]
+    monkeypatch.setattr("PySimpleGUI.theme", lambda *args: theme[0])
+    manager = WindowManager()
+    window = manager.show("view", FakeWindow)
+    theme[0] = "Dark"
+    assert manager.show("view", FakeWindow) is not window
+
+
+def test_player_values(data):
+    player = data.player("#ABCP01")
+    values = cw.player_main_values(player)
+    assert values["t.tag"] == "Tag: #ABCP01"
+    del player["leagueStatistics"]["bestSeason"]
+    assert cw.player_main_values(player)["t.best_season"] == " + Best: Not found"
+    stats = RoyaleApi.get_cards_stats(player["cards"], data.cards())
+    values = cw.player_cards_values(player, stats)
+    assert values["t.collected"] == "Obtained cards: {}/{}".format(*stats["collected"])
+    assert len(values) == 2 + 4 * 4
+    chests = data.upcoming_chests("#ABCP01")
+    assert len(cw.player_chests_values(chests)) == len(chests["items"])
+
+
+def test_player_war_values(data):
+    player = data.player("#ABCP01")
+    stats = RoyaleApi.get_cards_stats(player["cards"], data.cards())
+    war = RoyaleApi.get_war_stats(
+        "#ABCP01", data.river_race_log("#ABC"), data.current_river_race("#ABC")
+    )
+    values = cw.player_war_values(player, stats["best_32"], war)
+    # Truncated daily estimate, 7 times for the war
+    daily = int(values["t.daily"].split(": ")[1])
+    assert values["t.weekly"] == f"Estimated war WP: {7 * daily}"
+    decks = [values[f"t.deck.{i}"] for i in range(4)]
+    assert decks[0].startswith("Deck 1: ")
+    # Without constraints, the best decks are the best 32 cards
+    levels = [float(deck.split("\n")[0].split(": ")[1]) for deck in decks]
+    assert 8 * sum(levels) == pytest.approx(sum(stats["best_32"]), abs=0.2)
+    names = [name for deck in decks for name in deck.split("\n")[1].split(", ")]
+    assert len(set(names)) == 32
+    values = cw.player_war_values(dict(player, cards=[]), [13] * 32, war)
+    assert values["t.deck.0"] == "Deck 1: -"
+
+
+def test_clan_values(data):
+    table = ClanTable(page_size=2)
+    for tag in data.member_tags("#ABC"):
+        table.set_row(get_member_row(data.player(tag), data.cards(), None))
+    values = cw.clan_values("#ABC", table, loading=True)
+    assert values["t.clan"] == "Clan #ABC: 5 members (loading...)"
+    assert values["tbl.members"] == table.page_values()
+    assert values["t.page"] == "Page 1/3"
+    assert values["cmb.sort"] == "Trophies" and values["chk.descending"]
+    assert values["t.finish"] == "Projected race finish: -"
+    finish = [
+        {"tag": "#DEF", "rank": 1, "projected": 9000.4, "fame": 3000},
+        {"tag": "#ABC", "rank": 2, "projected": 8000.4, "fame": 2000},
+    ]
+    values = cw.clan_values("#ABC", table, finish=finish)
+    assert values["t.finish"] == (
+        "Projected race finish: #2/2 with 8000 fame (2000 now)"
+    )
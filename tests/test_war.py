@@ -0,0 +1,42 @@
+from typing import Dict
+
+from royale_tools.mock_api import SyntheticData
+from royale_tools.war import WarIndex
+
+
+def nested_war_stats(player_tag: str, river_race_log: Dict, curr_river_race) -> Dict:
+    """Previous RoyaleApi.get_war_stats implementation."""
+    clan_tag = curr_river_race["clan"]["tag"]
+    stats = {"fame_points": [], "repair_points": [], "war_points": []}
+    for race in river_race_log["items"]:
+        for clan in race["standings"]:
+            if clan["clan"]["tag"] != clan_tag:
+                continue
+            for player in clan["clan"]["participants"]:
+                if player["tag"] != player_tag:
+                    continue
+                stats["fame_points"].append(float(player["fame"]))
+                stats["repair_points"].append(float(player["repairPoints"]))
+                stats["war_points"].append(
+                    float(player["fame"]) + float(player["repairPoints"])
+                )
+    for player in curr_river_race["clan"]["participants"]:
+        if player["tag"] != player_tag:
+            continue
+        stats["current_fame_points"] = player["fame"]
+        stats["current_repair_points"] = player["repairPoints"]
+        stats["current_war_points"] = player["fame"] + player["repairPoints"]
+    return stats
+
+
+def test_war_index_matches_nested_scan():
+    data = SyntheticData(n_members=20, n_races=6)
+    log, current = data.river_race_log("#ABC"), data.current_river_race("#ABC")
+    # Former member only found in the log and unknown player
+    log["items"][0]["standings"][0]["clan"]["participants"].append(
+        {"tag": "#OLD", "fame": 100, "repairPoints": 0}
+    )
+    index = WarIndex(log, current)
+    for tag in data.member_tags("#ABC") + ["#OLD", "#UNKNOWN"]:
+        assert index.get(tag) == nested_war_stats(tag, log, current)
+    assert len(index) == 21